@@ -0,0 +1,28 @@
+"""Frame pacing shared by the pygame clients' game loops.
+
+Instead of redrawing at a fixed frame rate, a loop sleeps until an event arrives or the
+timer shown on screen reaches its next second, so an idle window costs next to no CPU.
+"""
+
+import math
+import time
+
+import pygame
+
+PRESSED_FPS = 60
+
+
+def wait_for_next_frame(clock: pygame.time.Clock, start_time: float = None, next_tick: float = None):
+    """Run at PRESSED_FPS while a mouse button is held, otherwise sleep until an event arrives or
+    the running timer ticks: its next second after start_time (a time.time()), or in next_tick seconds"""
+    if any(pygame.mouse.get_pressed()):
+        clock.tick(PRESSED_FPS)
+        return
+
+    if start_time:
+        next_tick = 1 - (time.time() - start_time) % 1
+    # a timeout of 0 waits for an event however long it takes
+    event = pygame.event.wait(0 if next_tick is None else max(math.ceil(next_tick * 1000), 1))
+    if event.type != pygame.NOEVENT:
+        pygame.event.post(event)  # handled by the next frame along with whatever came after it
+    clock.tick()
@@ -2,6 +2,7 @@ import pygame
 import pygame.image
 from pygame import Surface
 
+import draw_atlas
 import field
 
 border_tl: Surface
@@ -26,77 +27,107 @@ tile_false_flag: Surface
 tiles: list[pygame.Surface]
 
 
+_atlas: pygame.Surface = None
+_atlas_rects: dict[str, pygame.Rect] = None
+
+
 def load_assets():
+    """Load the sprite atlas, set_screen converts it to the display's format once there is one"""
+    global _atlas, _atlas_rects
+    _atlas, _atlas_rects = draw_atlas.load()
+    _serve_sprites(_atlas)
+
+
+def _serve_sprites(atlas: pygame.Surface):
+    sprite = draw_atlas.sprites(atlas, _atlas_rects)
+
     global border_tl, border_tr, border_tm, border_tf, border_l, border_r, border_bl, border_b, border_br
-    border_tl = pygame.image.load('assets/border_top_left.png')
-    border_tr = pygame.image.load('assets/border_top_right.png')
-    border_tm = pygame.image.load('assets/border_top_mid.png')
-    border_tf = pygame.image.load('assets/border_top_fill.png')
+    border_tl = sprite['border_top_left']
+    border_tr = sprite['border_top_right']
+    border_tm = sprite['border_top_mid']
+    border_tf = sprite['border_top_fill']
 
-    border_l = pygame.image.load('assets/border_left.png')
-    border_r = pygame.image.load('assets/border_right.png')
-    border_bl = pygame.image.load('assets/border_bottom_left.png')
-    border_b = pygame.image.load('assets/border_bottom.png')
-    border_br = pygame.image.load('assets/border_bottom_right.png')
+    border_l = sprite['border_left']
+    border_r = sprite['border_right']
+    border_bl = sprite['border_bottom_left']
+    border_b = sprite['border_bottom']
+    border_br = sprite['border_bottom_right']
 
     global face_normal, face_cool, face_oh, face_dead
-    face_normal = pygame.image.load('assets/face_n.png')
-    face_cool = pygame.image.load('assets/face_c.png')
-    face_oh = pygame.image.load('assets/face_o.png')
-    face_dead = pygame.image.load('assets/face_x.png')
+    face_normal = sprite['face_n']
+    face_cool = sprite['face_c']
+    face_oh = sprite['face_o']
+    face_dead = sprite['face_x']
 
     global numbers
-    numbers = [
-        pygame.image.load('assets/number_0.png'),
-        pygame.image.load('assets/number_1.png'),
-        pygame.image.load('assets/number_2.png'),
-        pygame.image.load('assets/number_3.png'),
-        pygame.image.load('assets/number_4.png'),
-        pygame.image.load('assets/number_5.png'),
-        pygame.image.load('assets/number_6.png'),
-        pygame.image.load('assets/number_7.png'),
-        pygame.image.load('assets/number_8.png'),
-        pygame.image.load('assets/number_9.png'),
-    ]
+    numbers = [sprite[f'number_{n}'] for n in range(10)]
 
     global tile_hidden, tile_flag, tile_false_flag, tiles
-    tile_hidden = pygame.image.load('assets/tile_hidden.png')
-    tile_flag = pygame.image.load('assets/tile_flag.png')
-    tile_false_flag = pygame.image.load('assets/tile_false_flag.png')
-    tiles = [
-        pygame.image.load('assets/tile_0.png'),
-        pygame.image.load('assets/tile_1.png'),
-        pygame.image.load('assets/tile_2.png'),
-        pygame.image.load('assets/tile_3.png'),
-        pygame.image.load('assets/tile_4.png'),
-        pygame.image.load('assets/tile_5.png'),
-        pygame.image.load('assets/tile_6.png'),
-        pygame.image.load('assets/tile_7.png'),
-        pygame.image.load('assets/tile_8.png'),
-        pygame.image.load('assets/tile_boom.png'),
-        pygame.image.load('assets/tile_mine.png'),
-    ]
+    tile_hidden = sprite['tile_hidden']
+    tile_flag = sprite['tile_flag']
+    tile_false_flag = sprite['tile_false_flag']
+    tiles = [sprite[f'tile_{n}'] for n in range(9)] + [sprite['tile_boom'], sprite['tile_mine']]
 
 
 _screen: pygame.Surface = None
 _background: pygame.Surface = None
 
+# Dirty rectangles: what is on screen, so a frame only redraws what changed since the last one
+_field: pygame.Surface = None  # the tiles in view as last drawn
+_drawn_board = None  # board shown on _field, a new game or a load repaints all of it
+_dirty: set[tuple[int, int]] = set()  # cells changed since they were drawn, fed by field's change sets
+_drawn_preview: set[tuple[int, int]] = set()
+_drawn_hint: tuple[int, int] = None
+_drawn_header: tuple = None  # mines left, time, face and hints shown in the header
+_header_rect: pygame.Rect = None  # area the header was drawn over, the hint counter reaches into the field
+_drawn_popup: bool = False
+_redraw_all: bool = True
+_repaint_view: bool = True  # the camera moved, every tile in view is drawn again
+
+# Camera: the part of the board the window shows and how big a tile is, so drawing costs
+# what the window holds whatever the size of the board
+ZOOM_LEVELS = (1, 2, 3, 4)  # a tile is 16 * zoom pixels
+_zoom: int = 1
+_camera: list[int] = [0, 0]  # board pixel at the current zoom shown at the top left of the view
+_scaled: dict[tuple[Surface, int], Surface] = {}  # sprite and zoom -> scaled sprite
+
+FIELD_X, FIELD_Y = 4, 40
+WINDOW_MARGIN = 64  # desktop height kept free for title bars and task bars
+MAX_CELL_RECTS = 100  # past this many changed cells, update their bounding box in one go
+
 
 def set_screen(field_width: int, field_height: int):
-    global _screen
-    scr_w, scr_h = field_width * 16 + 4 * 2, field_height * 16 + 44
+    """Size the window to the board at the current zoom, as far as the desktop allows"""
+    global _screen, _field
+    max_w, max_h = _max_view_size()
+    view_w = min(field_width * 16 * _zoom, max_w)
+    view_h = min(field_height * 16 * _zoom, max_h)
+    scr_w, scr_h = view_w + 4 * 2, view_h + 44
+    field.subscribe(_cells_changed)
+    invalidate()
+    _move_camera(*_camera)
 
     if _screen is not None:
         w, h = _screen.get_size()
         if scr_w == w and scr_h == h:
             return
     _screen = pygame.display.set_mode((scr_w, scr_h), pygame.SCALED | pygame.RESIZABLE)
-    prepare_background(field_width, field_height)
+    _serve_sprites(_atlas.convert_alpha())
+    _scaled.clear()
+    _field = pygame.Surface((view_w, view_h))
+    prepare_background(view_w // 16, view_h // 16)
+
+
+def _max_view_size() -> tuple[int, int]:
+    """Biggest field area that fits on the desktop, in whole 16 pixel border pieces"""
+    desktop_w, desktop_h = pygame.display.get_desktop_sizes()[0]
+    return max((desktop_w - 4 * 2) // 16, 9) * 16, max((desktop_h - 44 - WINDOW_MARGIN) // 16, 9) * 16
 
 
 def prepare_background(field_width: int, field_height: int):
+    """Draw the borders around a field area of field_width by field_height 16 pixel pieces"""
     global _background
-    if _background is None:
+    if _background is None or _background.get_size() != _screen.get_size():
         _background = pygame.Surface(_screen.get_size())
 
     scr_w, scr_h = _screen.get_size()
@@ -122,48 +153,207 @@ def prepare_background(field_width: int, field_height: int):
     _background.blit(border_tm, (scr_w // 2 - 16, 0))
 
 
-def draw_screen():
-    draw_borders(_screen)
-    draw_field(_screen)
-    draw_mine_count(_screen)
-    draw_timer(_screen)
-    draw_face(_screen)
-    draw_hint_counter(_screen)
-    draw_hint_popup(_screen)
+def invalidate():
+    """Redraw the whole screen next frame, e.g. after the window was exposed"""
+    global _redraw_all
+    _redraw_all = True
+
+
+def _cells_changed(changes: list[tuple[int, int, int, int]]):
+    _dirty.update((x, y) for x, y, _, _ in changes)
+
+
+def _view_rect() -> pygame.Rect:
+    return pygame.Rect(FIELD_X, FIELD_Y, *_field.get_size())
+
+
+def _move_camera(x: int, y: int):
+    """Put the camera at board pixel x, y or as close as the edges of the board allow"""
+    global _repaint_view
+    if _field is None:
+        return
+    tile = 16 * _zoom
+    view_w, view_h = _field.get_size()
+    camera = [min(max(x, 0), max(field.get_field_width() * tile - view_w, 0)),
+              min(max(y, 0), max(field.get_field_height() * tile - view_h, 0))]
+    if camera != _camera:
+        _camera[:] = camera
+        _repaint_view = True
+
+
+def scroll(dx: int, dy: int):
+    """Move the camera by dx, dy window pixels, stopping at the edges of the board"""
+    _move_camera(_camera[0] + dx, _camera[1] + dy)
+
+
+def zoom(steps: int, anchor: tuple[int, int] = None):
+    """Zoom in (steps > 0) or out by whole levels, keeping the board point under the window
+    position anchor (default: the middle of the view) where it is"""
+    global _zoom, _repaint_view
+    level = min(max(ZOOM_LEVELS.index(_zoom) + steps, 0), len(ZOOM_LEVELS) - 1)
+    if ZOOM_LEVELS[level] == _zoom:
+        return
+    view = _view_rect()
+    ax, ay = (anchor[0] - view.x, anchor[1] - view.y) if anchor else (view.w // 2, view.h // 2)
+    new_zoom = ZOOM_LEVELS[level]
+    x, y = (_camera[0] + ax) * new_zoom // _zoom - ax, (_camera[1] + ay) * new_zoom // _zoom - ay
+    _zoom = new_zoom
+    _repaint_view = True
+    _move_camera(x, y)
+
+
+def get_zoom() -> int:
+    return _zoom
+
+
+def cell_at(mx: int, my: int) -> tuple[int, int]:
+    """Cell under a window position, None outside the board's visible part"""
+    if _field is None or not _view_rect().collidepoint(mx, my):
+        return None
+    tile = 16 * _zoom
+    x, y = (mx - FIELD_X + _camera[0]) // tile, (my - FIELD_Y + _camera[1]) // tile
+    if x < field.get_field_width() and y < field.get_field_height():
+        return x, y
+    return None
+
+
+def _visible_cells() -> tuple[range, range]:
+    tile = 16 * _zoom
+    view_w, view_h = _field.get_size()
+    return (range(_camera[0] // tile, min((_camera[0] + view_w - 1) // tile + 1, field.get_field_width())),
+            range(_camera[1] // tile, min((_camera[1] + view_h - 1) // tile + 1, field.get_field_height())))
+
+
+def _scaled_sprite(sprite: Surface) -> Surface:
+    if _zoom == 1:
+        return sprite
+    scaled = _scaled.get((sprite, _zoom))
+    if scaled is None:
+        w, h = sprite.get_size()
+        scaled = _scaled[sprite, _zoom] = pygame.transform.scale(sprite, (w * _zoom, h * _zoom))
+    return scaled
+
+
+def _preview_cells() -> set[tuple[int, int]]:
+    pos = field.get_preview_pos()
+    if pos is None:
+        return set()
+    return {cell for cell in (pos, *field.iter_neighbors(*pos)) if field.in_preview(*cell)}
+
+
+def draw_screen() -> list[pygame.Rect]:
+    """Bring the screen up to date, returns the areas that changed for pygame.display.update"""
+    global _drawn_board, _drawn_preview, _drawn_hint, _drawn_header, _drawn_popup, _redraw_all, _repaint_view
+    board = field.get_session().board
+    if board is not _drawn_board:
+        _drawn_board = board
+        _move_camera(*_camera)
+        _repaint_view = _redraw_all = True
+
+    preview, hint = _preview_cells(), field.get_hint_cell()
+    _dirty.update(preview ^ _drawn_preview)
+    if hint != _drawn_hint:
+        _dirty.update(cell for cell in (hint, _drawn_hint) if cell is not None)
+    _drawn_preview, _drawn_hint = preview, hint
+
+    columns, rows = _visible_cells()
+    if _repaint_view:
+        _field.fill((0, 0, 0))  # a board smaller than the view leaves its right and bottom empty
+        cells = [(x, y) for x in columns for y in rows]
+    else:
+        cells = [(x, y) for x, y in _dirty if x in columns and y in rows]
+    _dirty.clear()
+    draw_field(_field, cells)
+
+    header = _header_state()
+    popup = field.show_hint_popup()
+    if _redraw_all or popup != _drawn_popup or (popup and (cells or header != _drawn_header)):
+        # the popup's overlay darkens everything, so anything under it changing means a full frame
+        _redraw_all, _repaint_view, _drawn_popup = False, False, popup
+        draw_borders(_screen)
+        _screen.blit(_field, (FIELD_X, FIELD_Y))
+        draw_header(_screen)
+        draw_hint_popup(_screen)
+        return [_screen.get_rect()]
+
+    if _repaint_view:
+        _repaint_view = False
+        rects = [_screen.blit(_field, (FIELD_X, FIELD_Y))]
+    else:
+        tile, view = 16 * _zoom, _view_rect()
+        rects = []
+        for x, y in cells:
+            rect = pygame.Rect(FIELD_X + x * tile - _camera[0], FIELD_Y + y * tile - _camera[1], tile, tile).clip(view)
+            rects.append(_screen.blit(_field, rect, rect.move(-FIELD_X, -FIELD_Y)))
+    if header != _drawn_header or _header_rect.collidelist(rects) != -1:
+        rects.append(draw_header(_screen))
+    if len(rects) > MAX_CELL_RECTS:
+        rects = [rects[0].unionall(rects)]
+    return rects
 
 
 def draw_borders(screen: pygame.Surface):
     screen.blit(_background, (0, 0))
 
 
-def draw_field(screen: pygame.Surface):
-    w, h = field.get_field_width(), field.get_field_height()
+def draw_field(surface: pygame.Surface, cells: list[tuple[int, int]]):
+    """Draw the tiles of cells onto the view surface, at the camera's position and zoom"""
     hint_cell = field.get_hint_cell()
+    tile = 16 * _zoom
 
-    for x in range(w):
-        for y in range(h):
-            contents, state = field.get_cell_state(x, y)
-            pos = x * 16 + 4, y * 16 + 40
-
-            # Check if this is the hint cell
-            is_hint = hint_cell is not None and hint_cell == (x, y)
-
-            if state == 0:
-                if field.in_preview(x, y):
-                    screen.blit(tiles[0], pos)  # preview hidden
-                else:
-                    screen.blit(tile_hidden, pos)  # normal hidden
-
-                # Draw hint highlight (yellow border)
-                if is_hint:
-                    hint_rect = pygame.Rect(pos[0], pos[1], 16, 16)
-                    pygame.draw.rect(screen, (255, 255, 0), hint_rect, 2)
-            elif state == 2:
-                screen.blit(tile_flag, pos)
-            elif state == 3:
-                screen.blit(tile_false_flag, pos)
+    for x, y in cells:
+        contents, state = field.get_cell_state(x, y)
+        pos = x * tile - _camera[0], y * tile - _camera[1]
+
+        # Check if this is the hint cell
+        is_hint = hint_cell is not None and hint_cell == (x, y)
+
+        if state == 0:
+            if field.in_preview(x, y):
+                surface.blit(_scaled_sprite(tiles[0]), pos)  # preview hidden
             else:
-                screen.blit(tiles[contents], pos)
+                surface.blit(_scaled_sprite(tile_hidden), pos)  # normal hidden
+
+            # Draw hint highlight (yellow border)
+            if is_hint:
+                hint_rect = pygame.Rect(pos[0], pos[1], tile, tile)
+                pygame.draw.rect(surface, (255, 255, 0), hint_rect, 2 * _zoom)
+        elif state == 2:
+            surface.blit(_scaled_sprite(tile_flag), pos)
+        elif state == 3:
+            surface.blit(_scaled_sprite(tile_false_flag), pos)
+        else:
+            surface.blit(_scaled_sprite(tiles[contents]), pos)
+
+
+def _header_state() -> tuple:
+    return field.get_mines_left(), field.get_time(), _face(), field.get_hints_remaining()
+
+
+def draw_header(screen: pygame.Surface) -> pygame.Rect:
+    """Redraw the mine count, timer, face and hint counter, returns the area drawn over"""
+    global _drawn_header, _header_rect
+    scr_w, _ = screen.get_size()
+    area = pygame.Rect(0, 0, scr_w, FIELD_Y)
+    if _header_rect is not None:
+        area.union_ip(_header_rect)
+
+    # put back what the last header covered, the hint counter overlaps the first row of tiles
+    screen.blit(_background, area, area)
+    under_field = area.clip(pygame.Rect(FIELD_X, FIELD_Y, *_field.get_size()))
+    if under_field:
+        screen.blit(_field, under_field, under_field.move(-FIELD_X, -FIELD_Y))
+
+    draw_mine_count(screen)
+    draw_timer(screen)
+    draw_face(screen)
+    counter = draw_hint_counter(screen)
+
+    _drawn_header = _header_state()
+    _header_rect = pygame.Rect(0, 0, scr_w, FIELD_Y)
+    if counter is not None:
+        _header_rect.union_ip(counter)
+    return area.union(_header_rect)
 
 
 def draw_mine_count(screen: pygame.Surface):
@@ -183,17 +373,20 @@ def draw_number(screen: pygame.Surface, number: int, x: int, y: int):
         screen.blit(numbers[(number // 100) % 10], (x, y))
 
 
-def draw_face(screen: pygame.Surface):
-    scr_w, _ = screen.get_size()
-    pos = scr_w // 2 - 11, 7
+def _face() -> Surface:
     if field.game_over():
-        screen.blit(face_dead, pos)
+        return face_dead
     elif field.game_won():
-        screen.blit(face_cool, pos)
+        return face_cool
     elif field.is_preview():
-        screen.blit(face_oh, pos)
+        return face_oh
     else:
-        screen.blit(face_normal, pos)
+        return face_normal
+
+
+def draw_face(screen: pygame.Surface):
+    scr_w, _ = screen.get_size()
+    screen.blit(_face(), (scr_w // 2 - 11, 7))
 
 
 def is_face(x: int, y: int) -> bool:
@@ -236,11 +429,12 @@ def draw_hint_popup(screen: pygame.Surface):
     screen.blit(text4, (popup_x + 50, popup_y + 72))
 
 
-def draw_hint_counter(screen: pygame.Surface):
-    """Draw hints remaining counter"""
+def draw_hint_counter(screen: pygame.Surface) -> pygame.Rect:
+    """Draw hints remaining counter, returns where it went or None when there is none"""
     hints = field.get_hints_remaining()
     if hints > 0:
         font = pygame.font.Font(None, 14)
         text = font.render(f"Hints: {hints}", True, (255, 200, 0))
         scr_w, _ = screen.get_size()
-        screen.blit(text, (scr_w // 2 - 20, 32))
+        return screen.blit(text, (scr_w // 2 - 20, 32))
+    return None
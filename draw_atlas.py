@@ -0,0 +1,79 @@
+"""Sprite atlas: every sprite in assets/ packed into one image, loaded and converted once.
+
+    python -m draw_atlas    # rebuild assets/atlas.png and assets/atlas.json after changing a sprite
+
+Sprites are packed on shelves, tallest first, and served as subsurfaces of the single
+atlas surface. Startup reads one file instead of ~40, and once the atlas is converted to
+the display's pixel format no blit pays for a per-pixel format conversion.
+"""
+
+import glob
+import json
+import os
+
+import pygame
+
+ASSET_DIR = 'assets'
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_INDEX = 'atlas.json'
+ATLAS_WIDTH = 256
+
+
+def pack(images: dict[str, pygame.Surface], width: int = ATLAS_WIDTH) -> tuple[pygame.Surface, dict[str, pygame.Rect]]:
+    """Lay images out on shelves of an atlas width pixels wide, or as wide as the widest image,
+    returns it and where each image went"""
+    width = max([width] + [image.get_width() for image in images.values()])
+    rects = {}
+    x = y = shelf_height = 0
+    for name in sorted(images, key=lambda name: (-images[name].get_height(), name)):
+        w, h = images[name].get_size()
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w
+        shelf_height = max(shelf_height, h)
+
+    atlas = pygame.Surface((width, y + shelf_height), pygame.SRCALPHA)
+    for name, rect in rects.items():
+        atlas.blit(images[name], rect)
+    return atlas, rects
+
+
+def build(asset_dir: str = ASSET_DIR) -> tuple[pygame.Surface, dict[str, pygame.Rect]]:
+    """Pack the sprites of asset_dir, every png but the atlas itself, named after their files"""
+    images = {}
+    for path in glob.glob(os.path.join(asset_dir, '*.png')):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name != os.path.splitext(ATLAS_IMAGE)[0]:
+            images[name] = pygame.image.load(path)
+    return pack(images)
+
+
+def save(asset_dir: str = ASSET_DIR):
+    atlas, rects = build(asset_dir)
+    pygame.image.save(atlas, os.path.join(asset_dir, ATLAS_IMAGE))
+    with open(os.path.join(asset_dir, ATLAS_INDEX), 'w') as f:
+        # one sprite per line: name and x, y, width, height in the atlas
+        f.write('{\n' + ',\n'.join(f'  {json.dumps(name)}: {json.dumps(list(rect))}'
+                                    for name, rect in sorted(rects.items())) + '\n}\n')
+
+
+def load(asset_dir: str = ASSET_DIR) -> tuple[pygame.Surface, dict[str, pygame.Rect]]:
+    """The saved atlas, or one packed from the sprites on the spot when none was saved"""
+    try:
+        with open(os.path.join(asset_dir, ATLAS_INDEX)) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return build(asset_dir)
+    atlas = pygame.image.load(os.path.join(asset_dir, ATLAS_IMAGE))
+    return atlas, {name: pygame.Rect(rect) for name, rect in index.items()}
+
+
+def sprites(atlas: pygame.Surface, rects: dict[str, pygame.Rect]) -> dict[str, pygame.Surface]:
+    """Every sprite as a subsurface sharing the atlas's pixels"""
+    return {name: atlas.subsurface(rect) for name, rect in rects.items()}
+
+
+if __name__ == '__main__':
+    save()
+    print(f'Wrote {os.path.join(ASSET_DIR, ATLAS_IMAGE)} and {os.path.join(ASSET_DIR, ATLAS_INDEX)}')
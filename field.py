@@ -1,460 +1,934 @@
+import collections
 import random
 import dataclasses
+import functools
 import time
-from typing import Iterable
+from typing import Callable, Iterable
+
+import field_history
+import field_noguess
+import field_snapshot
+from field_solver import Solver
+from field_topology import neighbor_table
+from server.board_generator import generate_mines
 
 MAX_MINES_PCT = 0.5
 MIN_FIELD_SIZE = 5
-MAX_FIELD_SIZE = 64
-
-
-@dataclasses.dataclass
-class Cell:
-    content: int  # 0 - no mines around, 8 - 8 mines around, -1 - mine, -2 - exploded mine
-    state: int  # 0 - hidden, 1 - revealed, 2 - flagged, 3 - false flagged
-
-
-_field: list[list[Cell]] = None
-_width: int = 9
-_height: int = 9
-_mine_count: int = 0
-_flags_count: int = 0
-_revealed_count: int = 0
-_start_time: float = None
-_victory: bool = False
-_game_over: bool = False
-_game_finish_time: int = None
-
-_preview_pos: tuple[int, int] = None
-
-# Hint system variables
-_hints_remaining: int = 3
-_hint_cell: tuple[int, int] = None
-_show_hint_popup: bool = False
-_hint_popup_timer: float = 0
-
-
-def get_field_width() -> int:
-    return _width
-
-
-def get_field_height() -> int:
-    return _height
-
-
-def get_mines_left() -> int:
-    return max(_mine_count - _flags_count, 0)
-
-
-def get_time() -> int:
-    if _game_over or _victory:
-        return _game_finish_time
-    if _start_time is None:
-        return 0
-    return int(time.monotonic() - _start_time)
-
-
-def get_cell_state(x: int, y: int) -> tuple[int, int]:
-    return _field[x][y].content, _field[x][y].state
-
-
-def game_won() -> bool:
-    return _victory
-
-
-def game_over() -> bool:
-    return _game_over
+MAX_FIELD_SIZE = 64  # for the default 'list' engine; see CellBoard.max_size / ArrayBoard.max_size
 
 
-def start_game(width: int, height: int, mine_count: int):
-    global _width, _height, _field, _mine_count, _flags_count, _revealed_count, _start_time, _victory, _game_over, _game_finish_time, _preview_pos, _hints_remaining, _hint_cell, _show_hint_popup, _hint_popup_timer
-
-    if width < MIN_FIELD_SIZE or height < MIN_FIELD_SIZE:
-        raise ValueError(f'Requested field size is too small.\nMinimum dimension is {MIN_FIELD_SIZE}')
-    if width > MAX_FIELD_SIZE or height > MAX_FIELD_SIZE:
-        raise ValueError(f'Requested field size is too big.\nMaximum dimension is {MAX_FIELD_SIZE}')
-    if mine_count > width * height * MAX_MINES_PCT:
-        raise ValueError(f'Requested mine count is too large.\n Mine count cannot exceed cell count times {MAX_MINES_PCT}')
-
-    _width = width
-    _height = height
-    _field = [[Cell(content=0, state=0) for _ in range(height)] for _ in range(width)]
-
-    c = 0
-    while c < mine_count:
-        x, y = random.randint(0, width - 1), random.randint(0, height - 1)
-        if _field[x][y].content != 0:
-            continue
-        _field[x][y].content = -1
-        c += 1
-
-    for x in range(width):
-        for y in range(height):
-            if _field[x][y].content != 0:
-                continue
-
-            _field[x][y].content = _count_neighbor_mines(x, y)
-
-    _mine_count = mine_count
-    _flags_count = _revealed_count = 0
-    _victory = _game_over = False
-    _start_time = _game_finish_time = None
-    _preview_pos = None
-    _hints_remaining = 3
-    _hint_cell = None
-    _show_hint_popup = False
-    _hint_popup_timer = 0
-
-
-def iter_neighbors(x: int, y: int) -> Iterable[tuple[int, int]]:
+def _iter_neighbors(width: int, height: int, x: int, y: int) -> Iterable[tuple[int, int]]:
     if y > 0:
         yield x, y - 1
-    if y < _height - 1:
+    if y < height - 1:
         yield x, y + 1
 
     if x > 0:
         yield x - 1, y
         if y > 0:
             yield x - 1, y - 1
-        if y < _height - 1:
+        if y < height - 1:
             yield x - 1, y + 1
 
-    if x < _width - 1:
+    if x < width - 1:
         yield x + 1, y
         if y > 0:
             yield x + 1, y - 1
-        if y < _height - 1:
+        if y < height - 1:
             yield x + 1, y + 1
 
 
-def _count_neighbor_mines(x: int, y: int) -> int:
-    count = 0
-    for i, j in iter_neighbors(x, y):
-        count += _field[i][j].content == -1
-    return count
-
-
-def _count_neighbor_flags(x: int, y: int) -> int:
-    count = 0
-    for i, j in iter_neighbors(x, y):
-        count += _field[i][j].state == 2
-    return count
-
-
-def flag_cell(x: int, y: int):
-    global _flags_count
-
-    if _game_over or _victory:
-        return
-
-    if _field[x][y].state == 1:
-        return
-
-    if _field[x][y].state == 2:
-        _field[x][y].state = 0
-        _flags_count -= 1
-    else:
-        _field[x][y].state = 2
-        _flags_count += 1
-
+@dataclasses.dataclass
+class Cell:
+    content: int  # 0 - no mines around, 8 - 8 mines around, -1 - mine, -2 - exploded mine
+    state: int  # 0 - hidden, 1 - revealed, 2 - flagged, 3 - false flagged
 
-def cell_up(x: int, y: int):
-    if _game_over or _victory:
-        return
 
-    if _field[x][y].state == 0:
-        reveal_cell(x, y)
-    elif _field[x][y].state == 1 and _field[x][y].content > 0:
-        if _count_neighbor_flags(x, y) != _field[x][y].content:
+class CellBoard:
+    """Default board storage: a list of columns of Cell objects, indexed as [x][y].
+
+    Every engine exposes the same small interface (content/state/set_content/set_state,
+    place_mines, move_mine, reveal_mines, flag_mines, and packed_cells unless it is lazy)
+    so the game logic below does not care how the board is stored. Mines are passed as flat indices ``x * height + y``;
+    the bulk operations return the (x, y) of every cell whose state they changed.
+    """
+
+    name = 'list'
+    max_size = MAX_FIELD_SIZE
+    lazy = False  # True for engines that generate cells on demand instead of taking place_mines
+
+    def __init__(self, width: int, height: int, topology: str = 'square'):
+        self.width = width
+        self.height = height
+        self.cells = [[Cell(content=0, state=0) for _ in range(height)] for _ in range(width)]
+        self.offsets, self.indices = neighbor_table(width, height, topology)
+
+    def content(self, x: int, y: int) -> int:
+        return self.cells[x][y].content
+
+    def state(self, x: int, y: int) -> int:
+        return self.cells[x][y].state
+
+    def set_content(self, x: int, y: int, content: int):
+        self.cells[x][y].content = content
+
+    def set_state(self, x: int, y: int, state: int):
+        self.cells[x][y].state = state
+
+    def packed_cells(self) -> bytearray:
+        """Every cell as field_history.pack_cell, in flat order x * height + y"""
+        pack_cell = field_history.pack_cell
+        return bytearray(pack_cell(cell.content, cell.state) for column in self.cells for cell in column)
+
+    def _neighbors(self, x: int, y: int) -> list[tuple[int, int]]:
+        i = x * self.height + y
+        return [divmod(k, self.height) for k in self.indices[self.offsets[i]:self.offsets[i + 1]]]
+
+    def place_mines(self, mines: Iterable[int]):
+        mines = list(mines)
+        for i in mines:
+            self.cells[i // self.height][i % self.height].content = -1
+
+        for i in mines:
+            for k in self.indices[self.offsets[i]:self.offsets[i + 1]]:
+                cell = self.cells[k // self.height][k % self.height]
+                if cell.content >= 0:
+                    cell.content += 1
+
+    def move_mine(self, x: int, y: int, new_x: int, new_y: int):
+        self.cells[x][y].content = self._count_neighbor_mines(x, y)
+        for i, j in self._neighbors(x, y):
+            if self.cells[i][j].content >= 0:
+                self.cells[i][j].content = self._count_neighbor_mines(i, j)
+
+        self.cells[new_x][new_y].content = -1
+        for i, j in self._neighbors(new_x, new_y):
+            if self.cells[i][j].content >= 0:
+                self.cells[i][j].content = self._count_neighbor_mines(i, j)
+
+    def _count_neighbor_mines(self, x: int, y: int) -> int:
+        count = 0
+        for i, j in self._neighbors(x, y):
+            count += self.cells[i][j].content == -1
+        return count
+
+    def reveal_mines(self) -> list[tuple[int, int]]:
+        changed = []
+        for x, row in enumerate(self.cells):
+            for y, cell in enumerate(row):
+                if -2 <= cell.content <= -1 and cell.state == 0:
+                    cell.state = 1
+                    changed.append((x, y))
+                if 0 <= cell.content <= 8 and cell.state == 2:
+                    cell.state = 3
+                    changed.append((x, y))
+        return changed
+
+    def flag_mines(self) -> list[tuple[int, int]]:
+        changed = []
+        for x, row in enumerate(self.cells):
+            for y, cell in enumerate(row):
+                if cell.content == -1 and cell.state != 2:
+                    cell.state = 2
+                    changed.append((x, y))
+        return changed
+
+
+ENGINES = ('list', 'numpy', 'bits', 'chunks')
+
+
+def _board_class(engine: str, topology: str = 'square') -> type:
+    """The board class of an engine, to check its limits before a board is built"""
+    if engine == 'list':
+        return CellBoard
+    if topology != 'square' and engine in ENGINES:
+        # the other engines count mines with fixed square stencils
+        raise ValueError(f'The {engine} engine only supports the square topology')
+    if engine == 'numpy':
+        # numpy is optional, only import it when the array engine is requested
+        from field_numpy import ArrayBoard
+        return ArrayBoard
+    if engine == 'bits':
+        from field_bits import BitBoard
+        return BitBoard
+    if engine == 'chunks':
+        from field_chunks import ChunkBoard
+        return ChunkBoard
+    raise ValueError(f'Unknown field engine: {engine}')
+
+
+def _create_board(engine: str, width: int, height: int, topology: str = 'square'):
+    board_class = _board_class(engine, topology)
+    if width > board_class.max_size or height > board_class.max_size:
+        raise ValueError(f'Requested field size is too big.\nMaximum dimension is {board_class.max_size}')
+    if board_class is CellBoard:
+        return CellBoard(width, height, topology)
+    return board_class(width, height)
+
+
+def _emits_changes(func):
+    """Make a mutating call return its change set: a list of (x, y, content, state) per changed cell.
+
+    Nested mutating calls (cell_up -> reveal_cell -> victory_flag) add to the outermost
+    call's change set and return an empty list themselves.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs) -> list[tuple[int, int, int, int]]:
+        if self._pending_changes is not None:
+            func(self, *args, **kwargs)
+            return []
+
+        self._pending_changes = {}
+        try:
+            func(self, *args, **kwargs)
+            changes = [(x, y, self.board.content(x, y), self.board.state(x, y)) for x, y in self._pending_changes]
+        finally:
+            self._pending_changes = None
+
+        if changes:
+            if self._history is not None:
+                self._history.record(func.__name__, args, changes, self._counters())
+            self._publish(changes)
+        return changes
+    return wrapper
+
+
+class GameSession:
+    """State of one game: the board, counters, timer, preview, openings and hints.
+
+    The module level functions below drive a default session so a single local game can
+    keep using ``field.start_game()`` and friends; create more sessions to run several
+    games side by side in one process (bots, tests, a server hosting many rooms).
+    """
+
+    __slots__ = ('board', 'width', 'height', 'topology', 'mine_count', 'flags_count', 'revealed_count', 'solver',
+                 '_start_time', '_victory', '_game_over', '_game_finish_time', '_preview_pos',
+                 '_opening_of', '_openings', '_3bv', '_pending_changes', '_subscribers', '_history',
+                 '_neighbor_offsets', '_neighbor_indices',
+                 '_mine_cells', '_flag_cells', '_flags_around', '_revealed_around',
+                 '_hints_remaining', '_hint_cell', '_show_hint_popup', '_hint_popup_timer', 'rng')
+
+    def __init__(self, rng: random.Random = None):
+        # Mine layouts, relocated first-click mines and guessed hints; the global generator by default
+        self.rng = rng or random
+        self.board: CellBoard = None
+        self.width: int = 9
+        self.height: int = 9
+        self.topology: str = 'square'
+        self.mine_count: int = 0
+        self.flags_count: int = 0
+        self.revealed_count: int = 0
+        self.solver: Solver = None
+        self._start_time: float = None
+        self._victory: bool = False
+        self._game_over: bool = False
+        self._game_finish_time: int = None
+
+        self._preview_pos: tuple[int, int] = None
+
+        # Neighbour table of the board in CSR form (see field_topology), only the list engine has one
+        self._neighbor_offsets: memoryview = None
+        self._neighbor_indices: memoryview = None
+
+        # Openings: connected zero regions with their numbered border, as flat indices x * height + y
+        self._opening_of: list[int] = None  # opening id of every zero cell, -1 for other cells
+        self._openings: list[list[int]] = None
+        self._3bv: int = 0
+
+        # Incremental counts per cell (flat index x * height + y) of flagged and revealed neighbours,
+        # and where the mines and flags are, so chords and the end of the game never scan the field
+        self._mine_cells: set[tuple[int, int]] = None  # None on lazy boards, mines are not all known
+        self._flag_cells: set[tuple[int, int]] = set()
+        self._flags_around: list[int] = None
+        self._revealed_around: list[int] = None
+
+        # Change sets: cells touched by the mutating call in progress, and who to tell about them
+        self._pending_changes: dict[tuple[int, int], None] = None
+        self._subscribers: list[Callable[[list[tuple[int, int, int, int]]], None]] = []
+
+        # Moves made so far, for undo and redo; None on lazy boards
+        self._history: field_history.MoveLog = None
+
+        # Hint system variables
+        self._hints_remaining: int = 3
+        self._hint_cell: tuple[int, int] = None
+        self._show_hint_popup: bool = False
+        self._hint_popup_timer: float = 0
+
+    def get_field_width(self) -> int:
+        return self.width
+
+    def get_field_height(self) -> int:
+        return self.height
+
+    def get_mines_left(self) -> int:
+        return max(self.mine_count - self.flags_count, 0)
+
+    def get_time(self) -> int:
+        if self._game_over or self._victory:
+            return self._game_finish_time
+        if self._start_time is None:
+            return 0
+        return int(time.monotonic() - self._start_time)
+
+    def time_to_next_second(self) -> float:
+        """Seconds until get_time changes, None while the clock is stopped"""
+        if self._game_over or self._victory or self._start_time is None:
+            return None
+        return 1 - (time.monotonic() - self._start_time) % 1
+
+    def get_cell_state(self, x: int, y: int) -> tuple[int, int]:
+        return self.board.content(x, y), self.board.state(x, y)
+
+    def get_3bv(self) -> int:
+        """Minimum number of clicks needed to clear the board (Bechtel's Board Benchmark Value)"""
+        return self._3bv
+
+    def get_engine(self) -> str:
+        return self.board.name
+
+    def game_won(self) -> bool:
+        return self._victory
+
+    def game_over(self) -> bool:
+        return self._game_over
+
+    def start_game(self, width: int, height: int, mine_count: int, engine: str = 'list', no_guess: bool = False,
+                   topology: str = 'square'):
+        if width < MIN_FIELD_SIZE or height < MIN_FIELD_SIZE:
+            raise ValueError(f'Requested field size is too small.\nMinimum dimension is {MIN_FIELD_SIZE}')
+        if mine_count > width * height * MAX_MINES_PCT:
+            raise ValueError(f'Requested mine count is too large.\n Mine count cannot exceed cell count times {MAX_MINES_PCT}')
+
+        board = _create_board(engine, width, height, topology)
+
+        if no_guess and board.lazy:
+            raise ValueError('No-guess boards need an engine with a fixed layout')
+
+        self._use_board(board, width, height, topology)
+        if board.lazy:
+            # chunks are generated from the seed as the game reaches them
+            mine_count = board.generate(self.rng.getrandbits(32), mine_count / (width * height))
+        elif no_guess:
+            seed = field_noguess.draw(width, height, mine_count)
+            self.board.place_mines(field_noguess.layout(seed, width, height, mine_count))
+        else:
+            # the first click relocates a mine if it hits one, so no safe zone is needed here
+            mines = generate_mines(self.rng.getrandbits(32), height, width, mine_count)
+            self.board.place_mines((i % width) * height + i // width for i in mines)
+        self._label_openings()
+
+        self._reset_play(mine_count)
+        # a no-guess board is only guaranteed from its start cell, point the player at it
+        self._hint_cell = field_noguess.start_cell(width, height) if no_guess else None
+        self._start_history()
+
+    def _use_board(self, board, width: int, height: int, topology: str):
+        self.width = width
+        self.height = height
+        self.topology = topology
+        self.board = board
+        if isinstance(board, CellBoard):
+            self._neighbor_offsets, self._neighbor_indices = board.offsets, board.indices
+        else:
+            # the other engines only play the square topology, whose neighbours are worked out on the fly
+            self._neighbor_offsets = self._neighbor_indices = None
+
+    def _reset_play(self, mine_count: int):
+        self.mine_count = mine_count
+        self.flags_count = self.revealed_count = 0
+        self._flag_cells = set()
+        if self.board.lazy:
+            self._flags_around, self._revealed_around = collections.Counter(), collections.Counter()
+        else:
+            size = self.width * self.height
+            self._flags_around, self._revealed_around = [0] * size, [0] * size
+        self._victory = self._game_over = False
+        self._start_time = self._game_finish_time = None
+        self._preview_pos = None
+        self.solver = Solver(self.iter_neighbors)
+        self._hints_remaining = 3
+        self._hint_cell = None
+        self._show_hint_popup = False
+        self._hint_popup_timer = 0
+
+    def save(self) -> bytes:
+        """Binary snapshot of the board and play state (see field_snapshot), about 3 KB for 64x64"""
+        if self.board.lazy:
+            raise ValueError('Lazily generated boards cannot be saved')
+        cells = [(x, y) for x in range(self.width) for y in range(self.height)]
+        _, _, status = self._counters()
+        if self._game_finish_time is not None:
+            elapsed = float(self._game_finish_time)
+        elif self._start_time is not None:
+            elapsed = time.monotonic() - self._start_time
+        else:
+            elapsed = 0.0
+
+        return field_snapshot.pack(field_snapshot.Snapshot(
+            self.width, self.height, self.mine_count, self.flags_count, self.revealed_count,
+            [self.board.content(*pos) for pos in cells], [self.board.state(*pos) for pos in cells],
+            self.topology, elapsed, self._hints_remaining, status))
+
+    def load(self, data: bytes, engine: str = 'list'):
+        """Resume the game saved in a snapshot"""
+        snapshot = field_snapshot.unpack(data)
+        width, height = snapshot.width, snapshot.height
+        board = _create_board(engine, width, height, snapshot.topology)
+        if board.lazy:
+            raise ValueError('Snapshots cannot be loaded into a lazily generated board')
+
+        self._use_board(board, width, height, snapshot.topology)
+        board.place_mines([i for i, content in enumerate(snapshot.contents) if content < 0])
+        for i, content in enumerate(snapshot.contents):
+            if content == -2:
+                board.set_content(i // height, i % height, -2)
+        self._label_openings()
+        self._reset_play(snapshot.mine_count)
+
+        changes = []
+        for i, state in enumerate(snapshot.states):
+            if not state:
+                continue
+            x, y = divmod(i, height)
+            self._set_state(x, y, state)
+            changes.append((x, y, board.content(x, y), state))
+        self.solver.update(changes)
+
+        self.flags_count = snapshot.flags_count
+        self.revealed_count = snapshot.revealed_count
+        self._hints_remaining = snapshot.hints_remaining
+        self._victory = bool(snapshot.status & field_snapshot.VICTORY)
+        self._game_over = bool(snapshot.status & field_snapshot.GAME_OVER)
+        if self._victory or self._game_over:
+            self._game_finish_time = int(snapshot.elapsed)
+        if snapshot.status & field_snapshot.STARTED:
+            self._start_time = time.monotonic() - snapshot.elapsed
+        self._start_history()
+
+    def _start_history(self):
+        """Begin an empty move log at the current board"""
+        if self.board.lazy:
+            self._history = None
             return
-        for i, j in iter_neighbors(x, y):
-            reveal_cell(i, j)
-
-
-def reveal_cell(x: int, y: int):
-    global _start_time, _game_over, _game_finish_time, _victory
-
-    if _game_over or _victory:
-        return
-
-    if _field[x][y].state == 2 or _field[x][y].state == 1:
-        return
-
-    if _field[x][y].content == -1:
-        if _start_time is not None:
-            _field[x][y].content = -2
-            _game_finish_time = get_time()
-            _game_over = True
-            game_over_reveal()
+        self._history = field_history.MoveLog(self.board.packed_cells(), self.height, self._counters())
+
+    def _counters(self) -> tuple[int, int, int]:
+        status = field_snapshot.STARTED if self._start_time is not None else 0
+        if self._victory:
+            status |= field_snapshot.VICTORY
+        if self._game_over:
+            status |= field_snapshot.GAME_OVER
+        return self.flags_count, self.revealed_count, status
+
+    def get_move_log(self) -> field_history.MoveLog:
+        return self._history
+
+    def can_undo(self) -> bool:
+        return self._history is not None and self._history.position > 0
+
+    def can_redo(self) -> bool:
+        return self._history is not None and self._history.position < len(self._history)
+
+    def undo(self) -> list[tuple[int, int, int, int]]:
+        """Take back the last move, returns its change set"""
+        if not self.can_undo():
+            return []
+        return self.jump_to(self._history.position - 1)
+
+    def redo(self) -> list[tuple[int, int, int, int]]:
+        """Make the last undone move again, returns its change set"""
+        if not self.can_redo():
+            return []
+        return self.jump_to(self._history.position + 1)
+
+    def jump_to(self, move: int) -> list[tuple[int, int, int, int]]:
+        """Put the game back to how it was after that many moves, returns the change set.
+
+        Only the cells that differ between here and there are touched. The clock keeps running.
+        """
+        if self._history is None:
+            raise ValueError('Lazily generated boards keep no move log')
+        move = max(0, min(move, len(self._history)))
+        height = self.height
+        changes, mines_gone, mines_added, exploded = [], [], [], []
+        for i, old, new in self._history.seek(move):
+            x, y = divmod(i, height)
+            old_content, old_state = field_history.unpack_cell(old)
+            content, state = field_history.unpack_cell(new)
+            if old_content == -2 and content != -2:
+                self.board.set_content(x, y, -1)
+            elif content == -2 and old_content != -2:
+                exploded.append((x, y))
+            if (old_content < 0) != (content < 0):
+                (mines_added if content < 0 else mines_gone).append((x, y))
+            if state != old_state:
+                self._set_state(x, y, state)
+            changes.append((x, y, content, state))
+
+        if mines_gone:
+            # only the first click moves a mine
+            for (x, y), (new_x, new_y) in zip(mines_gone, mines_added):
+                self.board.move_mine(x, y, new_x, new_y)
+            self._label_openings()
+        for x, y in exploded:
+            self.board.set_content(x, y, -2)
+
+        self.flags_count, self.revealed_count, status = self._history.counters(move)
+        self._victory = bool(status & field_snapshot.VICTORY)
+        self._game_over = bool(status & field_snapshot.GAME_OVER)
+        self._game_finish_time = None
+        if not status & field_snapshot.STARTED:
+            self._start_time = None
+        elif self._start_time is None:
+            self._start_time = time.monotonic()
+        if self._victory or self._game_over:
+            self._game_finish_time = self.get_time()
+        self._preview_pos = None
+
+        if changes:
+            self._publish(changes)
+        return changes
+
+    def _publish(self, changes: list[tuple[int, int, int, int]]):
+        self.solver.update(changes)
+        for callback in list(self._subscribers):
+            callback(changes)
+
+    def subscribe(self, callback: Callable[[list[tuple[int, int, int, int]]], None]):
+        """Call callback with the change set of every mutating call that changed something"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[list[tuple[int, int, int, int]]], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _set_state(self, x: int, y: int, state: int):
+        old = self.board.state(x, y)
+        self.board.set_state(x, y, state)
+
+        flagged = (state == 2) - (old == 2)
+        revealed = (state == 1) - (old == 1)
+        if flagged > 0:
+            self._flag_cells.add((x, y))
+        elif flagged < 0:
+            self._flag_cells.discard((x, y))
+        if flagged or revealed:
+            for k in self._flat_neighbors(x * self.height + y):
+                self._flags_around[k] += flagged
+                self._revealed_around[k] += revealed
+
+        if self._pending_changes is not None:
+            self._pending_changes[x, y] = None
+
+    def _touched(self, cells: Iterable[tuple[int, int]]):
+        if self._pending_changes is not None:
+            for pos in cells:
+                self._pending_changes[pos] = None
+
+    def iter_neighbors(self, x: int, y: int) -> Iterable[tuple[int, int]]:
+        if self._neighbor_indices is None:
+            return _iter_neighbors(self.width, self.height, x, y)
+        height = self.height
+        i = x * height + y
+        return [divmod(k, height) for k in self._neighbor_indices[self._neighbor_offsets[i]:self._neighbor_offsets[i + 1]]]
+
+    def _flat_neighbors(self, i: int) -> list[int]:
+        if self._neighbor_indices is None:
+            height = self.height
+            return [x * height + y for x, y in _iter_neighbors(self.width, height, i // height, i % height)]
+        return self._neighbor_indices[self._neighbor_offsets[i]:self._neighbor_offsets[i + 1]]
+
+    def flagged_neighbors(self, x: int, y: int) -> int:
+        return self._flags_around[x * self.height + y]
+
+    def hidden_neighbors(self, x: int, y: int) -> int:
+        """Neighbours that are neither revealed nor flagged"""
+        i = x * self.height + y
+        if self._neighbor_indices is None:
+            neighbors = (min(x + 2, self.width) - max(x - 1, 0)) * (min(y + 2, self.height) - max(y - 1, 0)) - 1
+        else:
+            neighbors = self._neighbor_offsets[i + 1] - self._neighbor_offsets[i]
+        return neighbors - self._flags_around[i] - self._revealed_around[i]
+
+    def _label_openings(self):
+        """Label every opening and list its cells (the zeros plus their border), then count 3BV.
+
+        3BV is one click per opening plus one per number that does not border any opening.
+        Has to run again whenever mines move. Lazy boards cannot be scanned up front,
+        reveal_emply_cell floods them cell by cell instead and their 3BV stays 0.
+        """
+        if self.board.lazy:
+            self._opening_of = self._openings = self._mine_cells = None
+            self._3bv = 0
+            return
+        if hasattr(self.board, 'label_openings'):
+            # the numpy engine labels the whole board in a few array operations
+            self._opening_of, self._openings, self._mine_cells, self._3bv = self.board.label_openings()
             return
 
-        while True:
-            new_x, new_y = random.randint(0, _width - 1), random.randint(0, _height - 1)
-            if new_x == x and new_y == y:
-                continue
-            if _field[new_x][new_y].content < 0:
-                continue
-
-            _field[x][y].content = _count_neighbor_mines(x, y)
-            for i, j in iter_neighbors(x, y):
-                if _field[i][j].content >= 0:
-                    _field[i][j].content = _count_neighbor_mines(i, j)
-
-            _field[new_x][new_y].content = -1
-            for i, j in iter_neighbors(new_x, new_y):
-                if _field[i][j].content >= 0:
-                    _field[i][j].content = _count_neighbor_mines(i, j)
-            break
-
-    if _start_time is None:
-        _start_time = time.monotonic()
-
-    reveal_emply_cell(x, y)
-
-    if _width * _height - _mine_count == _revealed_count:
-        # Victory!
-        _game_finish_time = get_time()
-        _victory = True
-        victory_flag()
-
-
-def reveal_emply_cell(x: int, y: int):
-    global _revealed_count
-
-    if _field[x][y].content > 0:
-        if _field[x][y].state == 0:
-            _field[x][y].state = 1
-            _revealed_count += 1
-        return
-
-    visited: set[tuple[int, int]] = set()
-    to_visit: list[tuple[int, int]] = [(x, y)]
-    while len(to_visit) > 0:
-        x, y = to_visit.pop()
-        if x < 0 or y < 0 or x >= _width or y >= _height:
-            continue
-        if (x, y) in visited:
-            continue
-
-        if _field[x][y].state == 0:
-            _field[x][y].state = 1
-            _revealed_count += 1
-        visited.add((x, y))
-
-        if _field[x][y].content != 0:
-            continue
-        to_visit.extend(
-            (
-                (x - 1, y),
-                (x + 1, y),
-                (x - 1, y - 1),
-                (x + 1, y + 1),
-                (x - 1, y + 1),
-                (x + 1, y - 1),
-                (x, y - 1),
-                (x, y + 1),
-            )
-        )
-
-
-def game_over_reveal():
-    for row in _field:
-        for cell in row:
-            if -2 <= cell.content <= -1 and cell.state == 0:
-                cell.state = 1
-            if 0 <= cell.content <= 8 and cell.state == 2:
-                cell.state = 3
-
-
-def victory_flag():
-    global _flags_count
-    for row in _field:
-        for cell in row:
-            if cell.content == -1:
-                cell.state = 2
-    _flags_count = _mine_count
-
-
-def set_preview(x: int, y: int):
-    global _preview_pos
-    if _game_over or _victory:
-        return
-
-    if 0 <= _field[x][y].state <= 1:
-        _preview_pos = x, y
-    else:
-        _preview_pos = None
-
-
-def clear_preview():
-    global _preview_pos
-    _preview_pos = None
-
-
-def in_preview(x: int, y: int):
-    if _preview_pos is None:
-        return False
-
-    if _field[_preview_pos[0]][_preview_pos[1]].state == 0:  # hidden
-        return (x, y) == _preview_pos
-    elif _field[_preview_pos[0]][_preview_pos[1]].state == 1 and _field[_preview_pos[0]][_preview_pos[1]].content > 0:  # number
-        return abs(x - _preview_pos[0]) < 2 and abs(y - _preview_pos[1]) < 2 and _field[x][y].state == 0
-    return False
-
-
-def is_preview():
-    if _game_over or _victory:
-        return
-    return _preview_pos is not None
-
-
-# Hint system functions
-def get_hints_remaining() -> int:
-    return _hints_remaining
-
-
-def get_hint_cell() -> tuple[int, int]:
-    return _hint_cell
-
-
-def clear_hint():
-    global _hint_cell
-    _hint_cell = None
-
-
-def show_hint_popup() -> bool:
-    return _show_hint_popup
-
-
-def set_hint_popup(show: bool):
-    global _show_hint_popup, _hint_popup_timer
-    _show_hint_popup = show
-    if show:
-        _hint_popup_timer = time.monotonic()
-
-
-def update_hint_popup():
-    global _show_hint_popup
-    if _show_hint_popup and time.monotonic() - _hint_popup_timer > 0.1:  # Check frequently
-        pass  # Keep showing until user responds
-
-
-def has_logical_moves() -> bool:
-    """Check if there are any safe logical moves available"""
-    if _game_over or _victory or _start_time is None:
-        return True  # Game not started or finished
-
-    # Check for cells that can be logically determined
-    for x in range(_width):
-        for y in range(_height):
-            cell = _field[x][y]
+        height = self.height
+        flat_neighbors = self._flat_neighbors
+        contents = [(cell & 0x0F) - 2 for cell in self.board.packed_cells()]
+        opening_of = [-1] * len(contents)
+        openings = []
+        in_opening = [False] * len(contents)
 
-            # Skip if not revealed or is a mine
-            if cell.state != 1 or cell.content <= 0:
+        for start, content in enumerate(contents):
+            if content != 0 or opening_of[start] != -1:
                 continue
 
-            # Count neighbors
-            hidden_neighbors = []
-            flagged_count = 0
-
-            for nx, ny in iter_neighbors(x, y):
-                neighbor = _field[nx][ny]
-                if neighbor.state == 2:  # Flagged
-                    flagged_count += 1
-                elif neighbor.state == 0:  # Hidden
-                    hidden_neighbors.append((nx, ny))
-
-            # If all mines are flagged and there are hidden cells, those are safe
-            if flagged_count == cell.content and len(hidden_neighbors) > 0:
-                return True
-
-            # If remaining hidden cells equals remaining mines, all are mines
-            remaining_mines = cell.content - flagged_count
-            if remaining_mines == len(hidden_neighbors) and remaining_mines > 0:
-                return True
-
-    return False
-
-
-def find_safe_hint() -> tuple[int, int]:
-    """Find a safe cell to reveal as a hint"""
-    # First, look for cells that are logically safe
-    for x in range(_width):
-        for y in range(_height):
-            cell = _field[x][y]
-
-            # Skip if not revealed or is a mine
-            if cell.state != 1 or cell.content <= 0:
-                continue
+            label = len(openings)
+            opening_of[start] = label
+            cells = [start]
+            seen = {start}
+            to_visit = [start]
+            while to_visit:
+                i = to_visit.pop()
+                for j in flat_neighbors(i):
+                    if j in seen:
+                        continue
+                    seen.add(j)
+                    cells.append(j)
+                    if contents[j] == 0:
+                        opening_of[j] = label
+                        to_visit.append(j)
+
+            for i in cells:
+                in_opening[i] = True
+            openings.append(cells)
+
+        self._opening_of = opening_of
+        self._openings = openings
+        self._mine_cells = {divmod(i, height) for i, content in enumerate(contents) if content < 0}
+        self._3bv = len(openings) + sum(1 for i, content in enumerate(contents) if content > 0 and not in_opening[i])
+
+    @_emits_changes
+    def flag_cell(self, x: int, y: int):
+        if self._game_over or self._victory:
+            return
 
-            # Count neighbors
-            hidden_neighbors = []
-            flagged_count = 0
+        state = self.board.state(x, y)
+        if state == 1:
+            return
 
-            for nx, ny in iter_neighbors(x, y):
-                neighbor = _field[nx][ny]
-                if neighbor.state == 2:  # Flagged
-                    flagged_count += 1
-                elif neighbor.state == 0:  # Hidden
-                    hidden_neighbors.append((nx, ny))
+        if state == 2:
+            self._set_state(x, y, 0)
+            self.flags_count -= 1
+        else:
+            self._set_state(x, y, 2)
+            self.flags_count += 1
 
-            # If all mines are flagged, hidden neighbors are safe
-            if flagged_count == cell.content and len(hidden_neighbors) > 0:
-                # Return a safe cell that isn't a mine
-                for hx, hy in hidden_neighbors:
-                    if _field[hx][hy].content >= 0:  # Not a mine
-                        return (hx, hy)
+    @_emits_changes
+    def cell_up(self, x: int, y: int):
+        if self._game_over or self._victory:
+            return
 
-    # If no logical move, find any safe unrevealed cell
-    safe_cells = []
-    for x in range(_width):
-        for y in range(_height):
-            if _field[x][y].state == 0 and _field[x][y].content >= 0:
-                safe_cells.append((x, y))
+        state, content = self.board.state(x, y), self.board.content(x, y)
+        if state == 0:
+            self.reveal_cell(x, y)
+        elif state == 1 and content > 0:
+            if self.flagged_neighbors(x, y) != content:
+                return
+            for i, j in self.iter_neighbors(x, y):
+                self.reveal_cell(i, j)
+
+    @_emits_changes
+    def reveal_cell(self, x: int, y: int):
+        if self._game_over or self._victory:
+            return
 
-    if safe_cells:
-        return random.choice(safe_cells)
+        if self.board.state(x, y) == 2 or self.board.state(x, y) == 1:
+            return
 
-    return None
+        if self.board.content(x, y) == -1:
+            if self._start_time is not None:
+                self.board.set_content(x, y, -2)
+                self._touched([(x, y)])
+                self._game_finish_time = self.get_time()
+                self._game_over = True
+                self.game_over_reveal()
+                return
+
+            while True:
+                new_x, new_y = self.rng.randint(0, self.width - 1), self.rng.randint(0, self.height - 1)
+                if new_x == x and new_y == y:
+                    continue
+                if self.board.content(new_x, new_y) < 0:
+                    continue
+
+                self.board.move_mine(x, y, new_x, new_y)
+                self._touched([(x, y), (new_x, new_y), *self.iter_neighbors(x, y), *self.iter_neighbors(new_x, new_y)])
+                self._label_openings()
+                break
+
+        if self._start_time is None:
+            self._start_time = time.monotonic()
+
+        self.reveal_emply_cell(x, y)
+
+        if self.width * self.height - self.mine_count == self.revealed_count:
+            # Victory!
+            self._game_finish_time = self.get_time()
+            self._victory = True
+            self.victory_flag()
+
+    def reveal_emply_cell(self, x: int, y: int):
+        if self.board.content(x, y) > 0:
+            if self.board.state(x, y) == 0:
+                self._set_state(x, y, 1)
+                self.revealed_count += 1
+            return
 
+        if self._openings is None:
+            self._flood(x, y)
+            return
 
-def use_hint():
-    """Use a hint - directly highlight a safe cell"""
-    global _hints_remaining, _hint_cell
+        height = self.height
+        for i in self._openings[self._opening_of[x * height + y]]:
+            x, y = i // height, i % height
+            if self.board.state(x, y) == 0:
+                self._set_state(x, y, 1)
+                self.revealed_count += 1
+
+    def _flood(self, x: int, y: int):
+        """Reveal the opening around a zero without precomputed openings"""
+        if self.board.state(x, y) == 0:
+            self._set_state(x, y, 1)
+            self.revealed_count += 1
+        to_visit = [(x, y)]
+        while to_visit:
+            for i, j in self.iter_neighbors(*to_visit.pop()):
+                if self.board.state(i, j) != 0:
+                    continue
+                self._set_state(i, j, 1)
+                self.revealed_count += 1
+                if self.board.content(i, j) == 0:
+                    to_visit.append((i, j))
+
+    @_emits_changes
+    def game_over_reveal(self):
+        if self._mine_cells is None:
+            self._touched(self.board.reveal_mines())
+            return
 
-    if _game_over or _victory or _start_time is None:
-        return False
+        for x, y in self._mine_cells:
+            if self.board.state(x, y) == 0:
+                self._set_state(x, y, 1)
+        for x, y in list(self._flag_cells):
+            if self.board.content(x, y) >= 0:
+                self._set_state(x, y, 3)
+
+    @_emits_changes
+    def victory_flag(self):
+        if self._mine_cells is None:
+            self._touched(self.board.flag_mines())
+        else:
+            for x, y in self._mine_cells:
+                if self.board.state(x, y) != 2:
+                    self._set_state(x, y, 2)
+        self.flags_count = self.mine_count
+
+    def set_preview(self, x: int, y: int):
+        if self._game_over or self._victory:
+            return
 
-    if _hints_remaining <= 0:
+        if 0 <= self.board.state(x, y) <= 1:
+            self._preview_pos = x, y
+        else:
+            self._preview_pos = None
+
+    def clear_preview(self):
+        self._preview_pos = None
+
+    def get_preview_pos(self) -> tuple[int, int]:
+        """Cell the mouse is held down on, None when there is no preview"""
+        return self._preview_pos
+
+    def in_preview(self, x: int, y: int):
+        if self._preview_pos is None:
+            return False
+
+        px, py = self._preview_pos
+        if self.board.state(px, py) == 0:  # hidden
+            return (x, y) == self._preview_pos
+        elif self.board.state(px, py) == 1 and self.board.content(px, py) > 0:  # number
+            if self.topology == 'square':
+                near = abs(x - px) < 2 and abs(y - py) < 2
+            else:
+                near = (x, y) in self.iter_neighbors(px, py)
+            return near and self.hidden_neighbors(px, py) > 0 and self.board.state(x, y) == 0
         return False
 
-    # Find and highlight a safe cell
-    safe_cell = find_safe_hint()
-    if safe_cell:
-        _hint_cell = safe_cell
-        _hints_remaining -= 1
-        return True
-
-    return False
-
-
-def accept_hint():
-    """Accept the hint and highlight a safe cell"""
-    global _hints_remaining, _hint_cell
+    def is_preview(self):
+        if self._game_over or self._victory:
+            return
+        return self._preview_pos is not None
+
+    # Hint system functions
+    def get_hints_remaining(self) -> int:
+        return self._hints_remaining
+
+    def get_hint_cell(self) -> tuple[int, int]:
+        return self._hint_cell
+
+    def clear_hint(self):
+        self._hint_cell = None
+
+    def show_hint_popup(self) -> bool:
+        return self._show_hint_popup
+
+    def set_hint_popup(self, show: bool):
+        self._show_hint_popup = show
+        if show:
+            self._hint_popup_timer = time.monotonic()
+
+    def update_hint_popup(self):
+        if self._show_hint_popup and time.monotonic() - self._hint_popup_timer > 0.1:  # Check frequently
+            pass  # Keep showing until user responds
+
+    def has_logical_moves(self) -> bool:
+        """Check if there are any safe logical moves available"""
+        if self._game_over or self._victory or self._start_time is None:
+            return True  # Game not started or finished
+
+        # the bits engine checks the single-number rules on the whole board at once
+        if hasattr(self.board, 'has_logical_moves') and self.board.has_logical_moves():
+            return True
+        # The solver keeps its deductions up to date after every move
+        return self.solver.has_moves()
+
+    def find_safe_hint(self) -> tuple[int, int]:
+        """Find a safe cell to reveal as a hint"""
+        # First, look for cells that are logically safe
+        if hasattr(self.board, 'find_safe_hint'):
+            hint = self.board.find_safe_hint(self.rng, guess=False)
+            if hint is not None:
+                return hint
+        for x, y in self.solver.safe:
+            if self.board.content(x, y) >= 0:  # Not a mine (flags may be wrong)
+                return x, y
+
+        # If no logical move, pick the safe unrevealed cell that looked least likely to be a mine
+        probabilities = self.mine_probabilities()
+        safe_cells = [pos for pos in probabilities if self.board.content(*pos) >= 0]
+        if safe_cells:
+            lowest = min(probabilities[pos] for pos in safe_cells)
+            return self.rng.choice([pos for pos in safe_cells if probabilities[pos] == lowest])
+
+        return None
+
+    def mine_probabilities(self) -> dict[tuple[int, int], float]:
+        """Chance that each hidden, unflagged cell is a mine, given the numbers and flags shown"""
+        mines_left = self.mine_count - self.flags_count
+        if self.board.lazy:
+            # only the explored part of the board is listed, the rest is all interior
+            hidden_count = self.width * self.height - self.revealed_count - self.flags_count
+            frontier, interior = self.solver.probabilities(hidden_count, mines_left)
+            hidden = {pos for pos in self.board.explored() if self.board.state(*pos) == 0}
+            hidden.update(frontier)
+            return {pos: frontier.get(pos, interior) for pos in hidden}
+
+        hidden = [(x, y) for x in range(self.width) for y in range(self.height) if self.board.state(x, y) == 0]
+        frontier, interior = self.solver.probabilities(len(hidden), mines_left)
+        return {pos: frontier.get(pos, interior) for pos in hidden}
+
+    def get_hint_reason(self) -> str:
+        """Why the current hint cell is safe, None if it was picked without a logical reason"""
+        if self._hint_cell is None:
+            return None
+        return self.solver.explain(*self._hint_cell)
+
+    def use_hint(self):
+        """Use a hint - directly highlight a safe cell"""
+        if self._game_over or self._victory or self._start_time is None:
+            return False
+
+        if self._hints_remaining <= 0:
+            return False
+
+        # Find and highlight a safe cell
+        safe_cell = self.find_safe_hint()
+        if safe_cell:
+            self._hint_cell = safe_cell
+            self._hints_remaining -= 1
+            return True
 
-    if _hints_remaining <= 0:
         return False
 
-    safe_cell = find_safe_hint()
-    if safe_cell:
-        _hint_cell = safe_cell
-        _hints_remaining -= 1
-        set_hint_popup(False)
-        return True
+    def accept_hint(self):
+        """Accept the hint and highlight a safe cell"""
+        if self._hints_remaining <= 0:
+            return False
 
-    return False
+        safe_cell = self.find_safe_hint()
+        if safe_cell:
+            self._hint_cell = safe_cell
+            self._hints_remaining -= 1
+            self.set_hint_popup(False)
+            return True
 
+        return False
 
-def decline_hint():
-    """Decline the hint offer"""
-    set_hint_popup(False)
+    def decline_hint(self):
+        """Decline the hint offer"""
+        self.set_hint_popup(False)
+
+
+# The default session behind the module level API
+_session = GameSession()
+
+
+def get_session() -> GameSession:
+    return _session
+
+
+get_field_width = _session.get_field_width
+get_field_height = _session.get_field_height
+get_mines_left = _session.get_mines_left
+get_time = _session.get_time
+time_to_next_second = _session.time_to_next_second
+get_cell_state = _session.get_cell_state
+get_3bv = _session.get_3bv
+get_engine = _session.get_engine
+game_won = _session.game_won
+game_over = _session.game_over
+start_game = _session.start_game
+save = _session.save
+load = _session.load
+get_move_log = _session.get_move_log
+can_undo = _session.can_undo
+can_redo = _session.can_redo
+undo = _session.undo
+redo = _session.redo
+jump_to = _session.jump_to
+subscribe = _session.subscribe
+unsubscribe = _session.unsubscribe
+iter_neighbors = _session.iter_neighbors
+flagged_neighbors = _session.flagged_neighbors
+hidden_neighbors = _session.hidden_neighbors
+flag_cell = _session.flag_cell
+cell_up = _session.cell_up
+reveal_cell = _session.reveal_cell
+reveal_emply_cell = _session.reveal_emply_cell
+game_over_reveal = _session.game_over_reveal
+victory_flag = _session.victory_flag
+set_preview = _session.set_preview
+clear_preview = _session.clear_preview
+get_preview_pos = _session.get_preview_pos
+in_preview = _session.in_preview
+is_preview = _session.is_preview
+get_hints_remaining = _session.get_hints_remaining
+get_hint_cell = _session.get_hint_cell
+clear_hint = _session.clear_hint
+show_hint_popup = _session.show_hint_popup
+set_hint_popup = _session.set_hint_popup
+update_hint_popup = _session.update_hint_popup
+has_logical_moves = _session.has_logical_moves
+find_safe_hint = _session.find_safe_hint
+mine_probabilities = _session.mine_probabilities
+get_hint_reason = _session.get_hint_reason
+use_hint = _session.use_hint
+accept_hint = _session.accept_hint
+decline_hint = _session.decline_hint
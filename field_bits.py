@@ -0,0 +1,230 @@
+import random
+
+from typing import Iterable
+
+MAX_BIT_FIELD_SIZE = 256
+
+_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _pack_key(key: int) -> int:
+    """field_history.pack_cell of a cell keyed number | mine << 4 | exploded << 5 | state << 6"""
+    content = -2 if key & 0x20 else -1 if key & 0x10 else key & 0x0F
+    return content + 2 | key >> 6 << 4
+
+
+_PACK_KEYS = bytes(_pack_key(key) for key in range(256))
+
+
+def _add(planes: list[int], bits: int) -> list[int]:
+    """Add a 0/1 bitset to a bit-sliced counter (planes[k] holds bit k of every cell's count)"""
+    result = []
+    for plane in planes:
+        result.append(plane ^ bits)
+        bits &= plane
+    if bits:
+        result.append(bits)
+    return result
+
+
+def _equal(a: list[int], b: list[int], mask: int) -> int:
+    """Cells of mask where two bit-sliced counters hold the same value"""
+    eq = mask
+    for i in range(max(len(a), len(b))):
+        pa = a[i] if i < len(a) else 0
+        pb = b[i] if i < len(b) else 0
+        eq &= ~(pa ^ pb)
+    return eq
+
+
+def _nth_bit(n: int, k: int) -> int:
+    """Index of the k-th (0-based) set bit of n, by halving"""
+    base = 0
+    width = n.bit_length()
+    while width > 1:
+        half = width // 2
+        low = n & ((1 << half) - 1)
+        c = low.bit_count()
+        if k < c:
+            n, width = low, half
+        else:
+            k -= c
+            n >>= half
+            base += half
+            width -= half
+    return base
+
+
+class BitBoard:
+    """Bitboard storage: mines, revealed and flagged cells as arbitrary-precision int bitsets.
+
+    Same interface and cell codes as field.CellBoard. Cell (x, y) is bit (x + 1) * stride + y + 1
+    with stride = height + 2, so every cell is surrounded by always-zero guard bits and a
+    neighbourhood is just the eight shifts by 1, stride - 1, stride and stride + 1.
+    Numbers are not stored; they are popcounts of the mine bits under a 3x3 window.
+    """
+
+    name = 'bits'
+    max_size = MAX_BIT_FIELD_SIZE
+    lazy = False
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.stride = height + 2
+        self.window = 0b111 | 0b101 << self.stride | 0b111 << 2 * self.stride
+
+        column = ((1 << height) - 1) << 1
+        self.cells = 0
+        for x in range(width):
+            self.cells |= column << (x + 1) * self.stride
+
+        self.mines = 0
+        self.exploded = 0
+        self.revealed = 0
+        self.flagged = 0
+        self.false_flagged = 0
+
+    def _bit(self, x: int, y: int) -> int:
+        return 1 << (x + 1) * self.stride + y + 1
+
+    def _position(self, i: int) -> tuple[int, int]:
+        return i // self.stride - 1, i % self.stride - 1
+
+    def _hidden(self) -> int:
+        return self.cells & ~self.revealed & ~self.flagged & ~self.false_flagged
+
+    def content(self, x: int, y: int) -> int:
+        bit = self._bit(x, y)
+        if self.exploded & bit:
+            return -2
+        if self.mines & bit:
+            return -1
+        return ((self.mines >> x * self.stride + y) & self.window).bit_count()
+
+    def state(self, x: int, y: int) -> int:
+        bit = self._bit(x, y)
+        if self.revealed & bit:
+            return 1
+        if self.false_flagged & bit:
+            return 3
+        if self.flagged & bit:
+            return 2
+        return 0
+
+    def set_content(self, x: int, y: int, content: int):
+        bit = self._bit(x, y)
+        self.mines &= ~bit
+        self.exploded &= ~bit
+        if content == -1:
+            self.mines |= bit
+        elif content == -2:
+            self.mines |= bit
+            self.exploded |= bit
+
+    def set_state(self, x: int, y: int, state: int):
+        bit = self._bit(x, y)
+        self.revealed &= ~bit
+        self.flagged &= ~bit
+        self.false_flagged &= ~bit
+        if state == 1:
+            self.revealed |= bit
+        elif state == 2:
+            self.flagged |= bit
+        elif state == 3:
+            self.false_flagged |= bit
+
+    def _cell_bytes(self, bits: int) -> int:
+        """bits as one byte per cell, 0 or 1, in flat order x * height + y, read as a little-endian int"""
+        digits = format(bits, f'0{(self.width + 2) * self.stride}b')[::-1]
+        rows = [digits[(x + 1) * self.stride + 1:(x + 1) * self.stride + 1 + self.height] for x in range(self.width)]
+        return int.from_bytes(''.join(rows).encode().translate(_DIGITS), 'little')
+
+    def packed_cells(self) -> bytearray:
+        """field_history.pack_cell of every cell, in flat order x * height + y.
+
+        Each bitset becomes one byte per cell, and those are or-ed into an 8-bit key per cell
+        as big integers: the parts sit in different bits, so nothing carries between cells.
+        One translate turns the keys into packed cells.
+        """
+        key = 0
+        for k, plane in enumerate(self._neighbor_count(self.mines)):
+            key |= self._cell_bytes(plane) << k
+        key |= self._cell_bytes(self.mines) << 4 | self._cell_bytes(self.exploded) << 5
+        key |= self._cell_bytes(self.revealed | self.false_flagged) << 6
+        key |= self._cell_bytes(self.flagged | self.false_flagged) << 7
+        return bytearray(key.to_bytes(self.width * self.height, 'little').translate(_PACK_KEYS))
+
+    def place_mines(self, mines: Iterable[int]):
+        for i in mines:
+            self.mines |= self._bit(i // self.height, i % self.height)
+
+    def move_mine(self, x: int, y: int, new_x: int, new_y: int):
+        self.mines ^= self._bit(x, y) | self._bit(new_x, new_y)
+
+    def _positions(self, bits: int) -> list[tuple[int, int]]:
+        positions = []
+        while bits:
+            low = bits & -bits
+            positions.append(self._position(low.bit_length() - 1))
+            bits ^= low
+        return positions
+
+    def reveal_mines(self) -> list[tuple[int, int]]:
+        mines = self.mines & self._hidden()
+        false_flags = self.flagged & ~self.mines
+        self.revealed |= mines
+        self.false_flagged |= false_flags
+        self.flagged &= self.mines
+        return self._positions(mines | false_flags)
+
+    def flag_mines(self) -> list[tuple[int, int]]:
+        mines = self.mines & ~self.flagged
+        self.flagged |= mines
+        return self._positions(mines)
+
+    def _shifts(self, bits: int) -> list[int]:
+        s = self.stride
+        return [bits << s + 1, bits << s, bits << s - 1, bits << 1,
+                bits >> 1, bits >> s - 1, bits >> s, bits >> s + 1]
+
+    def _dilate(self, bits: int) -> int:
+        """Every cell that has at least one neighbour in bits"""
+        result = 0
+        for shifted in self._shifts(bits):
+            result |= shifted
+        return result & self.cells
+
+    def _neighbor_count(self, bits: int) -> list[int]:
+        """Bit-sliced count of neighbours in bits, for every cell at once"""
+        planes = []
+        for shifted in self._shifts(bits):
+            planes = _add(planes, shifted & self.cells)
+        return planes
+
+    def _logical_cells(self) -> tuple[int, int]:
+        """Hidden cells proven safe and proven mines by the single-number rules"""
+        hidden = self._hidden()
+        numbers = self.revealed & ~self.mines & self._dilate(self.mines) & self._dilate(hidden)
+
+        mine_count = self._neighbor_count(self.mines)
+        satisfied = numbers & _equal(mine_count, self._neighbor_count(self.flagged), self.cells)
+        saturated = numbers & ~satisfied & _equal(mine_count, self._neighbor_count(self.cells & ~self.revealed), self.cells)
+
+        return self._dilate(satisfied) & hidden, self._dilate(saturated) & hidden
+
+    def has_logical_moves(self) -> bool:
+        safe, mines = self._logical_cells()
+        return (safe | mines) != 0
+
+    def find_safe_hint(self, rng: random.Random = random, guess: bool = True) -> tuple[int, int]:
+        """A hidden cell proven safe, else (when guess) a random hidden safe cell drawn from rng"""
+        safe, _ = self._logical_cells()
+        safe &= ~self.mines
+        if safe:
+            return self._position((safe & -safe).bit_length() - 1)
+
+        candidates = self._hidden() & ~self.mines
+        if candidates and guess:
+            return self._position(_nth_bit(candidates, rng.randrange(candidates.bit_count())))
+        return None
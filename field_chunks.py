@@ -0,0 +1,191 @@
+import hashlib
+
+from array import array
+from typing import Iterable
+
+from server.board_generator import generate_mines
+
+MAX_CHUNK_FIELD_SIZE = 1 << 20
+CHUNK_SIZE = 32
+
+Chunk = tuple[int, int]
+
+
+class ChunkBoard:
+    """Lazily generated board split into square chunks, for boards far too big to allocate.
+
+    Same interface and cell codes as field.CellBoard. Nothing is stored up front: a chunk's
+    mines are drawn from hash(seed, chunk_x, chunk_y) the first time a cell in or next to it
+    is looked at, its numbers when one of its cells is first read and its states when one of
+    them is first set. Memory follows the explored area, not width * height.
+
+    Call generate() instead of place_mines() to lay out the whole board; place_mines() and
+    move_mine() still work on top of it for single mines.
+    """
+
+    name = 'chunks'
+    max_size = MAX_CHUNK_FIELD_SIZE
+    lazy = True
+
+    def __init__(self, width: int, height: int, chunk_size: int = None):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.seed = 0
+        self.density = 0.0
+
+        # every chunk is a flat array indexed local_x * chunk_size + local_y
+        self._mines: dict[Chunk, bytearray] = {}  # 1 - mine, 2 - exploded mine
+        self._contents: dict[Chunk, array] = {}  # neighbouring mines, only read for cells without one
+        self._states: dict[Chunk, bytearray] = {}
+
+    def generate(self, seed: int, density: float) -> int:
+        """Start a seeded layout with the given share of mines, returns the board's mine count"""
+        self.seed = seed
+        self.density = density
+        self._mines.clear()
+        self._contents.clear()
+        self._states.clear()
+
+        size = self.chunk_size
+        total = 0
+        for w, columns in ((size, self.width // size), (self.width % size, 1)):
+            for h, rows in ((size, self.height // size), (self.height % size, 1)):
+                if w and h:
+                    total += columns * rows * self._chunk_mine_count(w, h)
+        return total
+
+    def _chunk_mine_count(self, w: int, h: int) -> int:
+        return round(self.density * w * h)
+
+    def _chunk_size(self, cx: int, cy: int) -> tuple[int, int]:
+        size = self.chunk_size
+        return min(size, self.width - cx * size), min(size, self.height - cy * size)
+
+    def _chunk_seed(self, cx: int, cy: int) -> int:
+        digest = hashlib.blake2b(f'{self.seed}:{cx}:{cy}'.encode(), digest_size=4).digest()
+        return int.from_bytes(digest, 'little')
+
+    def _chunk_mines(self, cx: int, cy: int) -> bytearray:
+        mines = self._mines.get((cx, cy))
+        if mines is None:
+            size = self.chunk_size
+            w, h = self._chunk_size(cx, cy)
+            mines = bytearray(size * size)
+            for i in generate_mines(self._chunk_seed(cx, cy), h, w, self._chunk_mine_count(w, h)):
+                ly, lx = divmod(i, w)
+                mines[lx * size + ly] = 1
+            self._mines[cx, cy] = mines
+        return mines
+
+    def _chunk_contents(self, cx: int, cy: int) -> array:
+        contents = self._contents.get((cx, cy))
+        if contents is None:
+            size = self.chunk_size
+            w, h = self._chunk_size(cx, cy)
+            contents = array('b', bytes(size * size))
+            # add every mine of this chunk and the ring around it to the cells of this chunk it touches
+            for ncx in range(max(cx - 1, 0), cx + 2):
+                for ncy in range(max(cy - 1, 0), cy + 2):
+                    if ncx * size >= self.width or ncy * size >= self.height:
+                        continue
+                    dx, dy = (ncx - cx) * size, (ncy - cy) * size
+                    for k, mine in enumerate(self._chunk_mines(ncx, ncy)):
+                        if not mine:
+                            continue
+                        mx, my = dx + k // size, dy + k % size
+                        for lx in range(max(mx - 1, 0), min(mx + 2, w)):
+                            for ly in range(max(my - 1, 0), min(my + 2, h)):
+                                contents[lx * size + ly] += 1
+            self._contents[cx, cy] = contents
+        return contents
+
+    def _forget_contents(self, x: int, y: int):
+        """Drop cached numbers of every chunk that has a cell next to (x, y)"""
+        size = self.chunk_size
+        for i in (x - 1, x, x + 1):
+            for j in (y - 1, y, y + 1):
+                self._contents.pop((i // size, j // size), None)
+
+    def content(self, x: int, y: int) -> int:
+        cx, lx = divmod(x, self.chunk_size)
+        cy, ly = divmod(y, self.chunk_size)
+        k = lx * self.chunk_size + ly
+        mine = self._chunk_mines(cx, cy)[k]
+        if mine:
+            return -mine
+        return self._chunk_contents(cx, cy)[k]
+
+    def state(self, x: int, y: int) -> int:
+        cx, lx = divmod(x, self.chunk_size)
+        cy, ly = divmod(y, self.chunk_size)
+        states = self._states.get((cx, cy))
+        if states is None:
+            return 0
+        return states[lx * self.chunk_size + ly]
+
+    def set_content(self, x: int, y: int, content: int):
+        cx, lx = divmod(x, self.chunk_size)
+        cy, ly = divmod(y, self.chunk_size)
+        mines = self._chunk_mines(cx, cy)
+        k = lx * self.chunk_size + ly
+        was_mine = mines[k] != 0
+        mines[k] = -content if content < 0 else 0
+        if was_mine != (content < 0):
+            self._forget_contents(x, y)
+
+    def set_state(self, x: int, y: int, state: int):
+        cx, lx = divmod(x, self.chunk_size)
+        cy, ly = divmod(y, self.chunk_size)
+        states = self._states.get((cx, cy))
+        if states is None:
+            states = self._states[cx, cy] = bytearray(self.chunk_size * self.chunk_size)
+        states[lx * self.chunk_size + ly] = state
+
+    def place_mines(self, mines: Iterable[int]):
+        for i in mines:
+            self.set_content(i // self.height, i % self.height, -1)
+
+    def move_mine(self, x: int, y: int, new_x: int, new_y: int):
+        self.set_content(x, y, 0)
+        self.set_content(new_x, new_y, -1)
+
+    def explored(self) -> list[tuple[int, int]]:
+        """Every cell of the chunks whose numbers or states exist so far"""
+        size = self.chunk_size
+        positions = []
+        for cx, cy in self._contents.keys() | self._states.keys():
+            w, h = self._chunk_size(cx, cy)
+            positions.extend((cx * size + lx, cy * size + ly) for lx in range(w) for ly in range(h))
+        return positions
+
+    def _generated(self) -> Iterable[tuple[Chunk, int, int, int]]:
+        """(chunk, x, y, index in chunk) of every in-bounds cell of the chunks generated so far"""
+        size = self.chunk_size
+        for (cx, cy) in list(self._mines):
+            w, h = self._chunk_size(cx, cy)
+            for lx in range(w):
+                for ly in range(h):
+                    yield (cx, cy), cx * size + lx, cy * size + ly, lx * size + ly
+
+    def reveal_mines(self) -> list[tuple[int, int]]:
+        # mines nobody has reached yet stay ungenerated
+        changed = []
+        for chunk, x, y, k in self._generated():
+            mine = self._mines[chunk][k]
+            state = self.state(x, y)
+            if mine and state == 0:
+                self.set_state(x, y, 1)
+                changed.append((x, y))
+            if not mine and state == 2:
+                self.set_state(x, y, 3)
+                changed.append((x, y))
+        return changed
+
+    def flag_mines(self) -> list[tuple[int, int]]:
+        changed = []
+        for chunk, x, y, k in self._generated():
+            if self._mines[chunk][k] == 1 and self.state(x, y) != 2:
+                self.set_state(x, y, 2)
+                changed.append((x, y))
+        return changed
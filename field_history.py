@@ -0,0 +1,107 @@
+"""Move log of a game: every move as its action plus packed cell deltas, with periodic keyframes.
+
+A cell packs into one byte, (content + 2) | state << 4, and a change to it into one integer,
+flat index << 12 | old cell << 6 | new cell, so a flag costs 4 bytes and a reveal 4 bytes per
+cell it opens. Moving through the history walks the deltas in between, O(cells changed)
+instead of copying the board; a keyframe of the whole board every KEYFRAME_INTERVAL moves
+lets a far jump start from the nearest keyframe when that is cheaper. The actions alone
+replay a game from its seed, e.g. to check a result on the server.
+"""
+
+import dataclasses
+
+from array import array
+
+KEYFRAME_INTERVAL = 64
+
+Counters = tuple[int, int, int]  # flags placed, cells revealed, field_snapshot status bits
+
+
+def pack_cell(content: int, state: int) -> int:
+    return content + 2 | state << 4
+
+
+def unpack_cell(cell: int) -> tuple[int, int]:
+    return (cell & 0x0F) - 2, cell >> 4
+
+
+@dataclasses.dataclass
+class Move:
+    action: str  # name of the GameSession method, 'cell_up', 'flag_cell', ...
+    args: tuple
+    deltas: array  # index << 12 | old << 6 | new per changed cell
+    counters: Counters  # after the move
+
+
+class MoveLog:
+    """Moves made so far and where in them the board currently is.
+
+    cells mirrors the board at the current position, packed one byte per cell in
+    field.py's flat order x * height + y.
+    """
+
+    def __init__(self, cells: bytearray, height: int, counters: Counters, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.cells = cells
+        self.height = height
+        self.moves: list[Move] = []
+        self.position = 0
+        self.keyframe_interval = keyframe_interval
+        self.keyframes: dict[int, bytes] = {0: bytes(cells)}
+        self._initial = counters
+        self._typecode = 'I' if len(cells) < 1 << 20 else 'Q'
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def counters(self, position: int) -> Counters:
+        return self.moves[position - 1].counters if position else self._initial
+
+    def actions(self) -> list[tuple]:
+        """(action, *args) of every move up to the current position"""
+        return [(move.action, *move.args) for move in self.moves[:self.position]]
+
+    def record(self, action: str, args: tuple, changes: list[tuple[int, int, int, int]], counters: Counters):
+        """Add a move made at the current position from its change set, dropping any moves that were undone"""
+        del self.moves[self.position:]
+        for position in [p for p in self.keyframes if p > self.position]:
+            del self.keyframes[position]
+
+        cells, height = self.cells, self.height
+        deltas = array(self._typecode)
+        for x, y, content, state in changes:
+            i = x * height + y
+            new = content + 2 | state << 4
+            deltas.append(i << 12 | cells[i] << 6 | new)
+            cells[i] = new
+        self.moves.append(Move(action, args, deltas, counters))
+        self.position += 1
+        if self.position % self.keyframe_interval == 0:
+            self.keyframes[self.position] = bytes(cells)
+
+    def seek(self, position: int) -> list[tuple[int, int, int]]:
+        """Move to a position, returns (flat index, old cell, new cell) of every cell that differs there"""
+        start = self.position
+        walk = sum(len(move.deltas) for move in self.moves[min(start, position):max(start, position)])
+        keyframe = max(p for p in self.keyframes if p <= position)
+        if len(self.cells) + sum(len(move.deltas) for move in self.moves[keyframe:position]) < walk:
+            target = bytearray(self.keyframes[keyframe])
+            for move in self.moves[keyframe:position]:
+                for delta in move.deltas:
+                    target[delta >> 12] = delta & 0x3F
+            changed = [(i, old, new) for i, (old, new) in enumerate(zip(self.cells, target)) if old != new]
+        else:
+            target = {}
+            if position < start:
+                for move in reversed(self.moves[position:start]):
+                    for delta in reversed(move.deltas):
+                        target[delta >> 12] = delta >> 6 & 0x3F
+            else:
+                for move in self.moves[start:position]:
+                    for delta in move.deltas:
+                        target[delta >> 12] = delta & 0x3F
+            changed = [(i, self.cells[i], new) for i, new in target.items() if self.cells[i] != new]
+
+        for i, _, new in changed:
+            self.cells[i] = new
+        self.position = position
+        return changed
@@ -0,0 +1,183 @@
+"""No-guess board generation.
+
+A board is described by a seed: layout() turns (seed, width, height, mines) into mine
+positions that leave the 3x3 block around start_cell() empty, so clicking the start cell
+always opens a region. is_solvable() plays the board from there with the hint solver only,
+and find_seed() rejects seeds until one can be cleared without guessing.
+
+Rejection sampling is expensive on Hard, so SeedPool keeps a bounded pool of good seeds
+per board size on disk and refills it with a ProcessPoolExecutor; drawing a seed is O(1).
+Fill the pools ahead of time with ``python field_noguess.py``.
+"""
+
+import argparse
+import json
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+from field_solver import Solver
+from server.board_generator import ALGORITHM, generate_mines
+
+DEFAULT_POOL_DIR = os.environ.get('NOGUESS_POOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'noguess_pool'))
+POOL_SIZE = 50
+MAX_ATTEMPTS = 10000
+
+PRESETS = {
+    'easy': (9, 9, 10),
+    'medium': (16, 16, 40),
+    'hard': (30, 16, 99),
+}
+
+
+def start_cell(width: int, height: int) -> tuple[int, int]:
+    return width // 2, height // 2
+
+
+def layout(seed: int, width: int, height: int, mine_count: int) -> list[int]:
+    """Mine positions (flat indices x * height + y) of a seeded board"""
+    sx, sy = start_cell(width, height)
+    mines = generate_mines(seed, height, width, mine_count, first_click=(sy, sx), safe_radius=1)
+    return [(i % width) * height + i // width for i in mines]
+
+
+def is_solvable(mines: list[int], width: int, height: int) -> bool:
+    """Whether the board can be cleared from the start cell by logic alone"""
+    mine_set = set(mines)
+
+    def neighbors(x, y):
+        for i in range(max(x - 1, 0), min(x + 2, width)):
+            for j in range(max(y - 1, 0), min(y + 2, height)):
+                if i != x or j != y:
+                    yield i, j
+
+    contents = {}
+    for x in range(width):
+        for y in range(height):
+            if x * height + y in mine_set:
+                contents[x, y] = -1
+            else:
+                contents[x, y] = sum(i * height + j in mine_set for i, j in neighbors(x, y))
+
+    revealed = set()
+    flagged = set()
+
+    def reveal(cells):
+        changes = []
+        to_visit = list(cells)
+        while to_visit:
+            pos = to_visit.pop()
+            if pos in revealed:
+                continue
+            revealed.add(pos)
+            changes.append((*pos, contents[pos], 1))
+            if contents[pos] == 0:
+                to_visit.extend(neighbors(*pos))
+        return changes
+
+    solver = Solver(neighbors)
+    solver.update(reveal([start_cell(width, height)]))
+    safe_count = width * height - len(mine_set)
+    while len(revealed) < safe_count:
+        if solver.safe or solver.mines:
+            changes = reveal(list(solver.safe))
+            for pos in list(solver.mines):
+                flagged.add(pos)
+                changes.append((*pos, -1, 2))
+            solver.update(changes)
+            continue
+
+        # out of local deductions: the global mine count can still settle cells
+        hidden = [pos for pos in contents if pos not in revealed and pos not in flagged]
+        frontier, interior = solver.probabilities(len(hidden), len(mine_set) - len(flagged))
+        safe = [pos for pos in hidden if frontier.get(pos, interior) == 0]
+        if not safe:
+            return False
+        solver.update(reveal(safe))
+    return True
+
+
+def find_seed(width: int, height: int, mine_count: int, first_seed: int = None, attempts: int = MAX_ATTEMPTS) -> int:
+    """First seed from first_seed onwards whose board needs no guessing"""
+    if first_seed is None:
+        first_seed = secrets.randbits(31)
+    for seed in range(first_seed, first_seed + attempts):
+        if is_solvable(layout(seed, width, height, mine_count), width, height):
+            return seed
+    raise RuntimeError(f'No no-guess board found in {attempts} attempts')
+
+
+def _find_seed_task(size: tuple[int, int, int]) -> int:
+    return find_seed(*size)
+
+
+class SeedPool:
+    """Bounded on-disk pool of no-guess seeds, one JSON list per board size"""
+
+    def __init__(self, directory: str = DEFAULT_POOL_DIR, size: int = POOL_SIZE):
+        self.directory = directory
+        self.size = size
+
+    def _path(self, width: int, height: int, mine_count: int) -> str:
+        # seeds only mean something to the generator that checked them
+        return os.path.join(self.directory, f'{width}x{height}x{mine_count}-{ALGORITHM}.json')
+
+    def _load(self, width: int, height: int, mine_count: int) -> list[int]:
+        try:
+            with open(self._path(width, height, mine_count), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, width: int, height: int, mine_count: int, seeds: list[int]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(width, height, mine_count)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(seeds[:self.size], f)
+        os.replace(path + '.tmp', path)
+
+    def available(self, width: int, height: int, mine_count: int) -> int:
+        return len(self._load(width, height, mine_count))
+
+    def draw(self, width: int, height: int, mine_count: int) -> int:
+        """Take a seed from the pool, generating one on the spot if the pool is empty"""
+        seeds = self._load(width, height, mine_count)
+        if not seeds:
+            return find_seed(width, height, mine_count)
+        seed = seeds.pop()
+        self._save(width, height, mine_count, seeds)
+        return seed
+
+    def fill(self, width: int, height: int, mine_count: int, workers: int = None) -> int:
+        """Top the pool up to its size using worker processes, returns the number of seeds added"""
+        seeds = self._load(width, height, mine_count)
+        missing = self.size - len(seeds)
+        if missing <= 0:
+            return 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            seeds.extend(executor.map(_find_seed_task, [(width, height, mine_count)] * missing))
+        self._save(width, height, mine_count, seeds)
+        return missing
+
+
+_default_pool: SeedPool = None
+
+
+def draw(width: int, height: int, mine_count: int) -> int:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = SeedPool()
+    return _default_pool.draw(width, height, mine_count)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-generate no-guess board seeds')
+    parser.add_argument('--size', type=int, default=POOL_SIZE, help='seeds to keep per difficulty')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--dir', default=DEFAULT_POOL_DIR, help='pool directory')
+    args = parser.parse_args()
+
+    pool = SeedPool(args.dir, args.size)
+    for name, (width, height, mine_count) in PRESETS.items():
+        added = pool.fill(width, height, mine_count, args.workers)
+        print(f'{name}: added {added}, {pool.available(width, height, mine_count)} in pool')
@@ -0,0 +1,235 @@
+from typing import Iterable
+
+import numpy as np
+
+from server.board_generator import SAFE_RADIUS, safe_zone
+
+MAX_ARRAY_FIELD_SIZE = 1024
+
+
+def _neighbor_views(values: np.ndarray, fill) -> list[np.ndarray]:
+    """The 8 neighbours of every cell of the last two axes, cells off the board read as fill"""
+    w, h = values.shape[-2:]
+    padded = np.full(values.shape[:-2] + (w + 2, h + 2), fill, dtype=values.dtype)
+    padded[..., 1:-1, 1:-1] = values
+    return [padded[..., dx:dx + w, dy:dy + h] for dx in range(3) for dy in range(3) if dx != 1 or dy != 1]
+
+
+def count_neighbors(mask: np.ndarray) -> np.ndarray:
+    """Number of set cells in the 8-neighbourhood of every cell, as a padded 3x3 sum.
+
+    Works on a single board or on a (batch, rows, cols) stack of boards.
+    """
+    counts = np.zeros(mask.shape, dtype=np.int8)
+    for view in _neighbor_views(mask.astype(np.int8), 0):
+        counts += view
+    return counts
+
+
+def _positions(mask: np.ndarray) -> list[tuple[int, int]]:
+    return [(x, y) for x, y in np.argwhere(mask).tolist()]
+
+
+class ArrayBoard:
+    """Array-backed board storage: content and state kept in two (width, height) int8 arrays.
+
+    Same interface and cell codes as field.CellBoard. Neighbour counts are computed for the
+    whole board at once, so start_game does a fixed number of numpy calls whatever the size.
+    """
+
+    name = 'numpy'
+    max_size = MAX_ARRAY_FIELD_SIZE
+    lazy = False
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.contents = np.zeros((width, height), dtype=np.int8)
+        self.states = np.zeros((width, height), dtype=np.int8)
+
+    def content(self, x: int, y: int) -> int:
+        return int(self.contents[x, y])
+
+    def state(self, x: int, y: int) -> int:
+        return int(self.states[x, y])
+
+    def set_content(self, x: int, y: int, content: int):
+        self.contents[x, y] = content
+
+    def set_state(self, x: int, y: int, state: int):
+        self.states[x, y] = state
+
+    def packed_cells(self) -> bytearray:
+        """field_history.pack_cell of every cell at once, in flat order x * height + y"""
+        return bytearray(((self.contents + 2) | self.states << 4).astype(np.uint8).tobytes())
+
+    def place_mines(self, mines: Iterable[int]):
+        mask = np.zeros(self.width * self.height, dtype=bool)
+        mask[np.fromiter(mines, dtype=np.int64)] = True
+        self._fill(mask.reshape(self.width, self.height))
+
+    def move_mine(self, x: int, y: int, new_x: int, new_y: int):
+        mask = self.contents < 0
+        mask[x, y] = False
+        mask[new_x, new_y] = True
+        self._fill(mask)
+
+    def _fill(self, mask: np.ndarray):
+        self.contents = np.where(mask, np.int8(-1), count_neighbors(mask))
+
+    def reveal_mines(self) -> list[tuple[int, int]]:
+        mines = (self.contents < 0) & (self.states == 0)
+        false_flags = (self.contents >= 0) & (self.states == 2)
+        self.states[mines] = 1
+        self.states[false_flags] = 3
+        return _positions(mines | false_flags)
+
+    def flag_mines(self) -> list[tuple[int, int]]:
+        mines = (self.contents == -1) & (self.states != 2)
+        self.states[mines] = 2
+        return _positions(mines)
+
+    def label_openings(self) -> tuple[np.ndarray, 'Openings', set[tuple[int, int]], int]:
+        """Openings of the whole board at once, in place of field.GameSession's flood over every cell.
+
+        Returns the opening id of every cell (flat index x * height + y, -1 off openings), the
+        cells of each opening, the mine positions and the 3BV.
+        """
+        zero = self.contents == 0
+        roots, compact = np.unique(_zero_components(zero), return_inverse=True)
+        labels = np.full(zero.shape, -1, dtype=np.int32)
+        labels[zero] = compact
+        isolated = (self.contents > 0) & (count_neighbors(zero) == 0)
+        bbbv = len(roots) + int(isolated.sum())
+        return labels.ravel(), Openings(labels), set(_positions(self.contents < 0)), bbbv
+
+
+class Openings:
+    """Cells of each opening of a labelled board, its zeros plus their border, found when first asked for"""
+
+    def __init__(self, labels: np.ndarray):
+        self.labels = labels
+        self._cells: dict[int, list[int]] = {}
+
+    def __getitem__(self, label: int) -> list[int]:
+        label = int(label)
+        cells = self._cells.get(label)
+        if cells is None:
+            zeros = self.labels == label
+            cells = self._cells[label] = np.flatnonzero(zeros | (count_neighbors(zeros) > 0)).tolist()
+        return cells
+
+
+# Batch generation and analysis: many boards stacked in (batch, rows, cols) arrays, row-major
+# like server/board_generator.py. Every step is a fixed number of numpy calls for the whole
+# batch, the only Python loops run over mines or propagation rounds, never over boards.
+
+def _mulberry32(state: np.ndarray) -> np.ndarray:
+    """Advance a uint64 array of mulberry32 states in place and return the next uint32 outputs"""
+    mask = np.uint64(0xFFFFFFFF)
+    state += np.uint64(0x6D2B79F5)
+    state &= mask
+    t = state.copy()
+    t = ((t ^ (t >> np.uint64(15))) * (t | np.uint64(1))) & mask
+    t ^= (t + ((t ^ (t >> np.uint64(7))) * (t | np.uint64(61)))) & mask
+    return t ^ (t >> np.uint64(14))
+
+
+def batch_mines(seeds: Iterable[int], rows: int, cols: int, mine_count: int,
+                first_click: tuple[int, int] = None, safe_radius: int = SAFE_RADIUS) -> np.ndarray:
+    """Mine masks of shape (batch, rows, cols), board b identical to generate_mines(seeds[b], ...)"""
+    seeds = np.asarray(list(seeds) if not isinstance(seeds, np.ndarray) else seeds, dtype=np.int64)
+    allowed = np.setdiff1d(np.arange(rows * cols), safe_zone(rows, cols, first_click, safe_radius))
+    if mine_count > len(allowed):
+        raise ValueError(f'Cannot place {mine_count} mines in {len(allowed)} available cells')
+
+    batch = len(seeds)
+    state = (seeds & 0xFFFFFFFF).astype(np.uint64)
+    order = np.tile(np.arange(len(allowed)), (batch, 1))
+    boards = np.arange(batch)
+    for i in range(mine_count):
+        # the same partial Fisher-Yates step as generate_mines, on every board at once
+        j = i + ((_mulberry32(state) * np.uint64(len(allowed) - i)) >> np.uint64(32)).astype(np.int64)
+        picked = order[boards, j]
+        order[boards, j] = order[:, i]
+        order[:, i] = picked
+
+    mines = np.zeros((batch, rows * cols), dtype=bool)
+    mines[boards[:, None], allowed[order[:, :mine_count]]] = True
+    return mines.reshape(batch, rows, cols)
+
+
+def batch_numbers(mines: np.ndarray) -> np.ndarray:
+    """Cell values of a stack of mine masks: -1 for a mine, otherwise the adjacent mine count"""
+    return np.where(mines, np.int8(-1), count_neighbors(mines))
+
+
+def _zero_components(zero: np.ndarray) -> np.ndarray:
+    """Component root of every zero cell, zero cells numbered in C order.
+
+    Works on the edges between neighbouring zeros: every round hooks each root onto the
+    smallest root next to it, then pointer jumping flattens the trees. A handful of rounds
+    covers the whole stack.
+    """
+    rows, cols = zero.shape[-2:]
+    zero_count = int(zero.sum())
+    ids = np.full(zero.shape, -1, dtype=np.int64)
+    ids[zero] = np.arange(zero_count)
+
+    # each edge once: right, down, down-right and down-left neighbours
+    first, second = [], []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        a = ids[..., :rows - dr, max(-dc, 0):cols - max(dc, 0)]
+        b = ids[..., dr:, max(dc, 0):cols - max(-dc, 0)]
+        both = (a >= 0) & (b >= 0)
+        first.append(a[both])
+        second.append(b[both])
+    first, second = np.concatenate(first), np.concatenate(second)
+
+    root = np.arange(zero_count)
+    while True:
+        smallest = np.minimum(root[first], root[second])
+        hooked = root.copy()
+        np.minimum.at(hooked, root[first], smallest)
+        np.minimum.at(hooked, root[second], smallest)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, root):
+            return root
+        root = hooked
+
+
+def batch_openings(numbers: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Label the openings of a stack of boards.
+
+    Returns (labels, sizes, owners): labels has the opening id of every zero cell and -1
+    elsewhere, sizes[k] is the number of cells opening k reveals (its zeros plus their
+    numbered border) and owners[k] the board it belongs to.
+    """
+    zero = numbers == 0
+    roots, compact = np.unique(_zero_components(zero), return_inverse=True)
+    labels = np.full(numbers.shape, -1, dtype=np.int32)
+    labels[zero] = compact
+    sizes = np.bincount(compact, minlength=len(roots))
+
+    # every number counts once for each distinct opening it borders
+    border = (numbers > 0) & (count_neighbors(zero) > 0)
+    around = np.sort(np.stack([view[border] for view in _neighbor_views(labels, -1)], axis=1), axis=1)
+    distinct = around >= 0
+    distinct[:, 1:] &= around[:, 1:] != around[:, :-1]
+    sizes += np.bincount(around[distinct], minlength=len(roots))
+
+    owners = np.nonzero(zero)[0][roots]
+    return labels, sizes, owners
+
+
+def batch_3bv(numbers: np.ndarray) -> np.ndarray:
+    """3BV of every board in a stack: its openings plus the numbers that border none of them"""
+    zero = numbers == 0
+    roots = np.unique(_zero_components(zero))
+    openings = np.bincount(np.nonzero(zero)[0][roots], minlength=numbers.shape[0])
+    isolated = (numbers > 0) & (count_neighbors(zero) == 0)
+    return openings + isolated.sum(axis=(-2, -1))
@@ -0,0 +1,105 @@
+"""Compact binary snapshots of a board and its play state.
+
+Layout, little-endian:
+
+    header   magic b'MSWP', format version, topology, width, height, mine count, flags,
+             revealed cells, elapsed seconds, hints left, status bits
+    contents one 4-bit nibble per cell, content + 2 (so -2..8 becomes 0..10), low nibble first
+    states   one 2-bit field per cell (0 hidden, 1 revealed, 2 flagged, 3 false flag), lowest bits first
+
+Cells are in field.py's flat order x * height + y. A 64x64 board takes 3 KB plus the header.
+Only the standard library is used, so the list engine saves without numpy. Nibbles and bit
+fields are combined as big integers, one byte per cell: the shifted values never carry into
+the next byte, so packing never loops over cells in Python.
+"""
+
+import dataclasses
+import struct
+from array import array
+
+from field_topology import TOPOLOGIES
+
+MAGIC = b'MSWP'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sBBHHIIIdBB')
+
+STARTED, VICTORY, GAME_OVER = 1, 2, 4  # status bits, also kept in field_history's counters
+
+# bytes.translate tables: a signed content byte to its nibble and back, and a packed byte to its parts
+_TO_NIBBLE = bytes((i + 2) % 256 for i in range(256))
+_FROM_NIBBLE = bytes((i - 2) % 256 for i in range(256))
+_LOW_NIBBLE = bytes(i & 0x0F for i in range(256))
+_HIGH_NIBBLE = bytes(i >> 4 for i in range(256))
+_STATE_FIELDS = [bytes(i >> shift & 3 for i in range(256)) for shift in (0, 2, 4, 6)]
+
+
+@dataclasses.dataclass
+class Snapshot:
+    width: int
+    height: int
+    mine_count: int
+    flags_count: int
+    revealed_count: int
+    contents: array  # 'b', one per cell in flat order
+    states: array  # 'B', one per cell in flat order
+    topology: str = 'square'
+    elapsed: float = 0.0
+    hints_remaining: int = 3
+    status: int = 0  # STARTED | VICTORY | GAME_OVER bits
+
+
+def pack(snapshot: Snapshot) -> bytes:
+    cells = snapshot.width * snapshot.height
+    header = _HEADER.pack(MAGIC, VERSION, TOPOLOGIES.index(snapshot.topology), snapshot.width, snapshot.height,
+                          snapshot.mine_count, snapshot.flags_count, snapshot.revealed_count,
+                          snapshot.elapsed, snapshot.hints_remaining, snapshot.status)
+
+    nibbles = array('b', snapshot.contents).tobytes().translate(_TO_NIBBLE) + bytes(cells % 2)
+    fields = bytes(array('B', snapshot.states)) + bytes(-cells % 4)
+
+    contents = _combine([nibbles[i::2] for i in range(2)], 4)
+    states = _combine([fields[i::4] for i in range(4)], 2)
+    return header + contents + states
+
+
+def _combine(parts: list[bytes], bits: int) -> bytes:
+    """Byte-wise parts[0] | parts[1] << bits | parts[2] << 2 * bits ..., each part fitting in bits"""
+    combined = 0
+    for i, part in enumerate(parts):
+        combined |= int.from_bytes(part, 'little') << i * bits
+    return combined.to_bytes(len(parts[0]), 'little')
+
+
+def unpack(data: bytes) -> Snapshot:
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError('Snapshot is truncated')
+    magic, version, topology, width, height, mine_count, flags_count, revealed_count, elapsed, hints, status = \
+        _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError('Not a minesweeper snapshot')
+    if version != VERSION:
+        raise ValueError(f'Unsupported snapshot version {version}')
+    if topology >= len(TOPOLOGIES):
+        raise ValueError(f'Unknown snapshot topology {topology}')
+
+    cells = width * height
+    content_bytes, state_bytes = -(-cells // 2), -(-cells // 4)
+    if len(view) != _HEADER.size + content_bytes + state_bytes:
+        raise ValueError('Snapshot size does not match its board size')
+
+    packed = bytes(view[_HEADER.size:_HEADER.size + content_bytes])
+    nibbles = bytearray(content_bytes * 2)
+    nibbles[0::2] = packed.translate(_LOW_NIBBLE)
+    nibbles[1::2] = packed.translate(_HIGH_NIBBLE)
+    contents = array('b', nibbles[:cells].translate(_FROM_NIBBLE))
+
+    packed = bytes(view[_HEADER.size + content_bytes:])
+    fields = bytearray(state_bytes * 4)
+    for i, table in enumerate(_STATE_FIELDS):
+        fields[i::4] = packed.translate(table)
+    states = array('B', fields[:cells])
+
+    return Snapshot(width, height, mine_count, flags_count, revealed_count, contents, states,
+                    TOPOLOGIES[topology], elapsed, hints, status)
@@ -0,0 +1,339 @@
+import math
+
+from bisect import bisect_right
+from typing import Callable, Iterable
+
+Position = tuple[int, int]
+
+MAX_COMPONENT_CELLS = 400  # larger components are not enumerated, their cells count as interior
+EXACT_INTERIOR_CELLS = 10000  # above this C(interior, k) is taken in log space, the exact integers get too big
+
+
+def _enumerate(cells: list[Position], constraints: list[tuple[set[Position], int]]) -> dict[int, tuple[int, tuple]]:
+    """Count the mine layouts of one component that satisfy all its constraints.
+
+    Returns {k: (layouts with k mines, per-cell number of those layouts with a mine there)}.
+    Backtracks over cells in the given order and memoises on (cell index, mines left per
+    constraint): with a frontier ordered along its length only a few constraints are open
+    at any point, so the number of distinct states stays small.
+    """
+    index = {cell: i for i, cell in enumerate(cells)}
+    members = [sorted(index[c] for c in unknown) for unknown, _ in constraints]
+    touching = [[] for _ in cells]
+    for ci, vs in enumerate(members):
+        for v in vs:
+            touching[v].append(ci)
+    memo = {}
+
+    def count(i: int, remaining: tuple) -> dict[int, tuple[int, tuple]]:
+        if i == len(cells):
+            return {0: (1, ())}
+        key = i, remaining
+        if key in memo:
+            return memo[key]
+
+        result = {}
+        for mine in (0, 1):
+            after = list(remaining)
+            for ci in touching[i]:
+                left = after[ci] - mine
+                unassigned = len(members[ci]) - bisect_right(members[ci], i)
+                if left < 0 or left > unassigned:
+                    break
+                after[ci] = left
+            else:
+                for k, (ways, hits) in count(i + 1, tuple(after)).items():
+                    row = (mine * ways,) + hits
+                    if k + mine in result:
+                        total, totals = result[k + mine]
+                        result[k + mine] = total + ways, tuple(a + b for a, b in zip(totals, row))
+                    else:
+                        result[k + mine] = ways, row
+        memo[key] = result
+        return result
+
+    return count(0, tuple(r for _, r in constraints))
+
+
+def _interior_weights(interior: int, counts: Iterable[int]) -> dict[int, float]:
+    """C(interior, j) for every wanted j, as floats scaled by a common factor on huge boards"""
+    counts = [j for j in set(counts) if 0 <= j <= interior]
+    if interior <= EXACT_INTERIOR_CELLS:
+        return {j: math.comb(interior, j) for j in counts}
+    logs = {j: math.lgamma(interior + 1) - math.lgamma(j + 1) - math.lgamma(interior - j + 1) for j in counts}
+    top = max(logs.values(), default=0.0)
+    return {j: math.exp(v - top) for j, v in logs.items()}
+
+
+def _convolve(a: dict[int, int], b: dict[int, int]) -> dict[int, int]:
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+class Solver:
+    """Incremental frontier solver behind the hint system.
+
+    Every revealed number is a constraint: its hidden, unflagged neighbours hold
+    (number - flags around it) mines. The solver is fed field.py change sets and only
+    re-examines the numbers around cells that changed, applying two reductions:
+
+    * single - a number with no mines left makes its unknowns safe, a number with as many
+      mines left as unknowns makes them all mines
+    * subset/pairwise - for two numbers A and B sharing unknowns, if B has exactly
+      |B \\ A| more mines left than A, all of B \\ A are mines and all of A \\ B are safe
+      (this covers the subset case where A \\ B is empty)
+
+    Flags count as mines, like the player sees them. Deduced cells are cached with the
+    reason they were deduced until the cell is revealed or flagged, or the numbers they
+    rest on are hidden again by an undo.
+    """
+
+    def __init__(self, neighbors: Callable[[int, int], Iterable[Position]]):
+        self.neighbors = neighbors
+        self.numbers: dict[Position, int] = {}
+        self.revealed: set[Position] = set()
+        self.flagged: set[Position] = set()
+        self.safe: dict[Position, tuple] = {}
+        self.mines: dict[Position, tuple] = {}
+        self._active: set[Position] = set()  # numbers that still have hidden, unflagged neighbours
+        self._dirty: set[Position] = set()
+
+    def update(self, changes: Iterable[tuple[int, int, int, int]]):
+        """Apply a field.py change set and deduce whatever the changed cells allow"""
+        reset = False
+        hidden_again = []
+        for x, y, content, state in changes:
+            pos = x, y
+            self.safe.pop(pos, None)
+            if state == 1:
+                self.revealed.add(pos)
+                self.flagged.discard(pos)
+                self.mines.pop(pos, None)
+                if content > 0:
+                    self.numbers[pos] = content
+                    self._dirty.add(pos)
+            elif state == 2:
+                self.flagged.add(pos)
+                self.mines.pop(pos, None)
+            elif pos in self.flagged:
+                # a removed flag may have been the premise of earlier deductions
+                self.flagged.discard(pos)
+                reset = True
+            elif pos in self.revealed:
+                # an undone reveal
+                self.revealed.discard(pos)
+                self.numbers.pop(pos, None)
+                self._active.discard(pos)
+                hidden_again.append(pos)
+
+            for n in self.neighbors(x, y):
+                if n in self.numbers:
+                    self._dirty.add(n)
+
+        if reset:
+            self.safe.clear()
+            self.mines.clear()
+            self._dirty |= self._active
+        elif hidden_again:
+            self._retract(set(hidden_again).union(*(self.neighbors(*pos) for pos in hidden_again)))
+        self._solve()
+
+    def _retract(self, suspects: set[Position]):
+        """Forget the deductions that rest on the given numbers, then those that counted on the forgotten ones"""
+        while suspects:
+            dropped = [cell for deduced in (self.safe, self.mines) for cell, reason in deduced.items()
+                       if not suspects.isdisjoint(reason[1:])]
+            for cell in dropped:
+                self.safe.pop(cell, None)
+                self.mines.pop(cell, None)
+            # a number next to a forgotten cell may have used it to deduce more
+            suspects = {n for cell in dropped for n in self.neighbors(*cell) if n in self.numbers}
+            self._dirty |= suspects
+
+    def has_moves(self) -> bool:
+        return bool(self.safe or self.mines)
+
+    def probabilities(self, hidden_count: int, mines_left: int) -> tuple[dict[Position, float], float]:
+        """Exact chance of a mine for every frontier cell, and for any cell off the frontier.
+
+        hidden_count is the number of hidden, unflagged cells and mines_left the mine count
+        minus flags. The frontier is split into independent components (no number sees
+        cells of two components) which are enumerated separately, then combined with
+        C(interior cells, mines left for the interior) as the weight of each mine total.
+        """
+        constraints = []
+        for pos in list(self._active):
+            unknown, remaining = self._constraint(pos)
+            if unknown:
+                constraints.append((unknown, remaining))
+
+        # union the constraints that share cells into components
+        parent = list(range(len(constraints)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner = {}
+        for ci, (unknown, _) in enumerate(constraints):
+            for cell in unknown:
+                if cell in owner:
+                    parent[find(ci)] = find(owner[cell])
+                else:
+                    owner[cell] = ci
+        groups = {}
+        for ci in range(len(constraints)):
+            groups.setdefault(find(ci), []).append(constraints[ci])
+
+        components = []
+        for group in groups.values():
+            cells = self._frontier_order(group)
+            if len(cells) <= MAX_COMPONENT_CELLS:
+                components.append((cells, _enumerate(cells, group)))
+
+        probabilities = {cell: 1.0 for cell in self.mines}
+        probabilities.update({cell: 0.0 for cell in self.safe})
+        interior = hidden_count - len(self.mines) - len(self.safe) - sum(len(cells) for cells, _ in components)
+        mines_left -= len(self.mines)
+
+        totals = [{k: ways for k, (ways, _) in layouts.items()} for _, layouts in components]
+        everything = {0: 1}
+        for t in totals:
+            everything = _convolve(everything, t)
+        # every mine total of one component plus the rest is a total of everything, so these are all the weights needed
+        interior_weight = _interior_weights(interior, (mines_left - k for k in everything))
+        weight = sum(ways * interior_weight.get(mines_left - k, 0) for k, ways in everything.items())
+
+        if weight == 0:
+            # inconsistent flags: nothing better than the average
+            uniform = max(mines_left, 0) / max(hidden_count - len(self.mines) - len(self.safe), 1)
+            for cells, _ in components:
+                probabilities.update({cell: uniform for cell in cells})
+            return probabilities, uniform
+
+        for j, (cells, layouts) in enumerate(components):
+            rest = {0: 1}
+            for other, t in enumerate(totals):
+                if other != j:
+                    rest = _convolve(rest, t)
+            hits = [0] * len(cells)
+            for k, (_, cell_hits) in layouts.items():
+                factor = sum(ways * interior_weight.get(mines_left - k - r, 0) for r, ways in rest.items())
+                for i, h in enumerate(cell_hits):
+                    hits[i] += h * factor
+            for cell, h in zip(cells, hits):
+                probabilities[cell] = h / weight
+
+        if interior <= 0:
+            return probabilities, 0.0
+        expected = sum(ways * interior_weight.get(mines_left - k, 0) * (mines_left - k) for k, ways in everything.items())
+        return probabilities, expected / weight / interior
+
+    def _frontier_order(self, constraints: list[tuple[set[Position], int]]) -> list[Position]:
+        """Cells of a component ordered by walking from constraint to neighbouring constraint"""
+        by_cell = {}
+        for ci, (unknown, _) in enumerate(constraints):
+            for cell in unknown:
+                by_cell.setdefault(cell, []).append(ci)
+
+        order, placed, seen = [], set(), {0}
+        to_visit = [0]
+        while to_visit:
+            ci = to_visit.pop(0)
+            for cell in sorted(constraints[ci][0]):
+                if cell not in placed:
+                    placed.add(cell)
+                    order.append(cell)
+                for other in by_cell[cell]:
+                    if other not in seen:
+                        seen.add(other)
+                        to_visit.append(other)
+        return order
+
+    def explain(self, x: int, y: int) -> str:
+        """Human readable reason why a cell was deduced safe or a mine, None if it was not"""
+        pos = x, y
+        if pos in self.safe:
+            verdict, reason = 'safe', self.safe[pos]
+        elif pos in self.mines:
+            verdict, reason = 'a mine', self.mines[pos]
+        else:
+            return None
+
+        if reason[0] == 'single':
+            source = reason[1]
+            return f'{pos} is {verdict}: the {self.numbers[source]} at {source} accounts for it alone'
+        a, b = reason[1], reason[2]
+        return (f'{pos} is {verdict}: comparing the {self.numbers[a]} at {a} '
+                f'with the {self.numbers[b]} at {b} which share hidden cells')
+
+    def _constraint(self, pos: Position) -> tuple[set[Position], int]:
+        """Unknown neighbours of a number and how many mines are left among them"""
+        unknown = set()
+        remaining = self.numbers[pos]
+        hidden = False
+        for n in self.neighbors(*pos):
+            if n in self.revealed:
+                continue
+            if n in self.flagged:
+                remaining -= 1
+                continue
+            hidden = True
+            if n in self.mines:
+                remaining -= 1
+            elif n not in self.safe:
+                unknown.add(n)
+
+        if hidden:
+            self._active.add(pos)
+        else:
+            self._active.discard(pos)
+        return unknown, remaining
+
+    def _deduce(self, cells: Iterable[Position], is_mine: bool, reason: tuple):
+        target = self.mines if is_mine else self.safe
+        for cell in cells:
+            target[cell] = reason
+            for n in self.neighbors(*cell):
+                if n in self.numbers:
+                    self._dirty.add(n)
+
+    def _solve(self):
+        while self._dirty:
+            pos = self._dirty.pop()
+            if pos not in self.numbers:
+                continue  # hidden again since it was marked
+            unknown, remaining = self._constraint(pos)
+            if not unknown:
+                continue
+
+            if remaining == 0:
+                self._deduce(unknown, False, ('single', pos))
+                continue
+            if remaining == len(unknown):
+                self._deduce(unknown, True, ('single', pos))
+                continue
+
+            nearby = {n for cell in unknown for n in self.neighbors(*cell) if n in self.numbers and n != pos}
+            for other in nearby:
+                other_unknown, other_remaining = self._constraint(other)
+                if not unknown & other_unknown:
+                    continue
+                only_here = unknown - other_unknown
+                only_there = other_unknown - unknown
+
+                if other_remaining - remaining == len(only_there):
+                    self._deduce(only_there, True, ('pair', pos, other))
+                    self._deduce(only_here, False, ('pair', pos, other))
+                elif remaining - other_remaining == len(only_here):
+                    self._deduce(only_here, True, ('pair', pos, other))
+                    self._deduce(only_there, False, ('pair', pos, other))
+                else:
+                    continue
+                if only_here or only_there:
+                    break
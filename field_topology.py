@@ -0,0 +1,55 @@
+import functools
+from array import array
+
+TOPOLOGIES = ('square', 'torus', 'hex')
+
+
+def _square(width: int, height: int, x: int, y: int, wrap: bool) -> list[tuple[int, int]]:
+    cells = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            i, j = x + dx, y + dy
+            if wrap:
+                cells.append((i % width, j % height))
+            elif 0 <= i < width and 0 <= j < height:
+                cells.append((i, j))
+    return cells
+
+
+def _hex(width: int, height: int, x: int, y: int) -> list[tuple[int, int]]:
+    # flat-topped columns, odd columns shifted half a cell down
+    shift = x & 1
+    candidates = [(x, y - 1), (x, y + 1),
+                  (x - 1, y - 1 + shift), (x - 1, y + shift),
+                  (x + 1, y - 1 + shift), (x + 1, y + shift)]
+    return [(i, j) for i, j in candidates if 0 <= i < width and 0 <= j < height]
+
+
+@functools.lru_cache(maxsize=16)
+def neighbor_table(width: int, height: int, topology: str = 'square') -> tuple[memoryview, memoryview]:
+    """Neighbours of every cell in compressed sparse row form over flat indices x * height + y.
+
+    The neighbours of cell i are indices[offsets[i]:offsets[i + 1]]. Built once per board
+    size and topology and shared by every board of that size, so both are read-only views
+    of packed int arrays. The game loops never branch on borders:
+
+    * square - the usual eight neighbours, clipped at the border
+    * torus - eight neighbours, wrapping around both edges
+    * hex - six neighbours on a grid of flat-topped hexagons in offset columns
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f'Unknown field topology: {topology}')
+
+    offsets = array('i', [0])
+    indices = array('i')
+    for x in range(width):
+        for y in range(height):
+            if topology == 'hex':
+                cells = _hex(width, height, x, y)
+            else:
+                cells = _square(width, height, x, y, topology == 'torus')
+            indices.extend(i * height + j for i, j in cells)
+            offsets.append(len(indices))
+    return memoryview(offsets).toreadonly(), memoryview(indices).toreadonly()
@@ -1,10 +1,12 @@
 import pygame
 import pygame.display
+import pygame.event
 import pygame.time
 import pygame.mouse
 
 import field
 import draw
+from client_loop import wait_for_next_frame
 
 # Game settings
 field_width = 16
@@ -12,6 +14,8 @@ field_height = 16
 mine_count = 40
 
 FPS = 60
+SCROLL_STEP = 48  # window pixels per arrow key press or mouse wheel notch
+SAVE_FILE = 'minesweeper.sav'
 mouse_left_down: bool = False
 
 
@@ -20,11 +24,24 @@ def start_new_game():
     draw.set_screen(field_width, field_height)
 
 
+def save_game():
+    with open(SAVE_FILE, 'wb') as f:
+        f.write(field.save())
+
+
+def load_game():
+    try:
+        with open(SAVE_FILE, 'rb') as f:
+            field.load(f.read())
+    except (OSError, ValueError) as e:
+        print(f'Could not load {SAVE_FILE}: {e}')
+        return
+    draw.set_screen(field.get_field_width(), field.get_field_height())
+
+
 def get_mouse_pos():
-    mx, my = pygame.mouse.get_pos()
-    x = (mx - 4) // 16
-    y = (my - 40) // 16
-    return x, y
+    """Cell under the mouse, (-1, -1) when it is not over the board"""
+    return draw.cell_at(*pygame.mouse.get_pos()) or (-1, -1)
 
 
 def process_input():
@@ -33,11 +50,29 @@ def process_input():
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             return True
+        if event.type == pygame.WINDOWEXPOSED:
+            draw.invalidate()
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 return True
             if event.key == pygame.K_F2:
                 start_new_game()
+            if event.key == pygame.K_F5:
+                save_game()
+            if event.key == pygame.K_F9:
+                load_game()
+            if event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                if event.mod & pygame.KMOD_SHIFT:
+                    field.redo()
+                else:
+                    field.undo()
+            if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                draw.scroll(((event.key == pygame.K_RIGHT) - (event.key == pygame.K_LEFT)) * SCROLL_STEP,
+                            ((event.key == pygame.K_DOWN) - (event.key == pygame.K_UP)) * SCROLL_STEP)
+            if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                draw.zoom(1)
+            if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                draw.zoom(-1)
             if event.key == pygame.K_h:
                 # Request hint
                 field.use_hint()
@@ -50,6 +85,12 @@ def process_input():
                 if field.show_hint_popup():
                     field.decline_hint()
 
+        if event.type == pygame.MOUSEWHEEL:
+            if pygame.key.get_mods() & pygame.KMOD_CTRL:
+                draw.zoom(event.y, pygame.mouse.get_pos())
+            else:
+                draw.scroll(-event.x * SCROLL_STEP, -event.y * SCROLL_STEP)
+
         if event.type == pygame.MOUSEBUTTONDOWN:
             x, y = get_mouse_pos()
             if 0 <= x < field.get_field_width() and 0 <= y < field.get_field_height():
@@ -82,21 +123,29 @@ def process_input():
     return False
 
 
-def main():
+def run():
+    """Play until the window is closed"""
+    clock = pygame.time.Clock()
+    while True:
+        if process_input():
+            break
+
+        pygame.display.update(draw.draw_screen())
+        wait_for_next_frame(clock, next_tick=field.time_to_next_second())
+
+
+def setup():
+    """Open the window on a new game"""
     pygame.init()
     pygame.display.set_caption("Minesweeper in Python!")
     draw.load_assets()
-    clock = pygame.time.Clock()
 
     start_new_game()
 
-    while True:
-        if process_input():
-            break
 
-        draw.draw_screen()
-        pygame.display.flip()
-        clock.tick(FPS)
+def main():
+    setup()
+    run()
     pygame.quit()
 
 
@@ -108,6 +157,10 @@ if __name__ == '__main__':
     print('  Left Click  - Reveal cell')
     print('  Right Click - Flag/unflag cell')
     print('  F2          - New game')
+    print('  F5/F9       - Save/load game')
+    print('  Ctrl+Z      - Undo (Ctrl+Shift+Z to redo)')
+    print('  Arrows/Wheel - Scroll boards bigger than the window')
+    print('  +/- or Ctrl+Wheel - Zoom in/out')
     print('  H           - Request hint (3 hints per game)')
     print('  Y/N         - Accept/decline hint when offered')
     print('\nHint System:')
@@ -0,0 +1,302 @@
+"""Micro-benchmarks of the board logic, with a regression gate against a saved baseline.
+
+    python -m minesweeper_bench --save benchmarks/baseline.json
+    python -m minesweeper_bench --compare benchmarks/baseline.json --threshold 25
+    python -m minesweeper_bench --idle-cpu 5
+
+Covers field.py (start_game from Easy to the biggest board, flood fill, chords, hints),
+the board of MinesweeperGame in minesweeper_multiplayer.py (place_mines, flood fill, hints),
+which is driven without opening a window, and startup: a new interpreter until main.py's
+first frame, and until the multiplayer client is imported.
+Every case times one call on a freshly prepared board and keeps the best of as many runs
+as fit in its time budget, which is far more stable than an average. Baselines are per machine
+and not committed: save one before comparing. The startup cases, timing a whole interpreter
+and SDL starting up, are reported but never fail the comparison.
+
+--idle-cpu compares the CPU share of main.py's game loop left idle on a running game,
+ticking at a fixed frame rate versus sleeping until an event or the next timer second.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import types
+
+from typing import Callable
+
+import field
+
+DEFAULT_THRESHOLD = 25.0  # percent slower than the baseline that counts as a regression
+DEFAULT_BUDGET = 0.3  # seconds spent timing each case
+MIN_RUNS = 5
+
+DIFFICULTIES = {
+    'easy': (9, 9, 10),
+    'medium': (16, 16, 40),
+    'hard': (30, 16, 99),
+    'max': (field.MAX_FIELD_SIZE, field.MAX_FIELD_SIZE, field.MAX_FIELD_SIZE ** 2 // 5),
+}
+
+# Every case prepares a board and returns the call to time on it
+Case = Callable[[], Callable[[], object]]
+
+
+def _start(width: int, height: int, mine_count: int) -> Callable[[], object]:
+    random.seed(0)
+    return lambda: field.start_game(width, height, mine_count)
+
+
+def _empty_flood() -> Callable[[], object]:
+    """Worst case flood fill: one click opens a whole mine-free board"""
+    size = field.MAX_FIELD_SIZE
+    field.start_game(size, size, 0)
+    return lambda: field.cell_up(size // 2, size // 2)
+
+
+def _chords() -> Callable[[], object]:
+    """Clear a Hard board with every mine flagged by chording each number"""
+    random.seed(0)
+    width, height, mine_count = DIFFICULTIES['hard']
+    field.start_game(width, height, mine_count)
+    field.cell_up(width // 2, height // 2)
+    cells = [(x, y) for x in range(width) for y in range(height)]
+    for pos in cells:
+        if field.get_cell_state(*pos)[0] < 0:
+            field.flag_cell(*pos)
+    numbers = [pos for pos in cells if field.get_cell_state(*pos)[0] > 0]
+
+    def chord_all():
+        for pos in numbers:
+            field.cell_up(*pos)
+    return chord_all
+
+
+def _hint_frontier() -> Callable[[], object]:
+    """Hint on the biggest board with no safe cell left to deduce, so the whole frontier is enumerated"""
+    random.seed(0)
+    width, height, mine_count = DIFFICULTIES['max']
+    field.start_game(width, height, mine_count)
+    for x in range(2, width, 8):
+        for y in range(2, height, 8):
+            if field.get_cell_state(x, y)[0] >= 0:
+                field.cell_up(x, y)
+    # deduced mines stay unflagged, which keeps thousands of numbers on the frontier
+    solver = field.get_session().solver
+    while solver.safe:
+        for pos in list(solver.safe):
+            field.cell_up(*pos)
+    return field.find_safe_hint
+
+
+def _multiplayer_game(difficulty: str):
+    """A solo MinesweeperGame with a fresh board and no window"""
+    _quiet_pygame()
+    import minesweeper_multiplayer
+
+    game = minesweeper_multiplayer.MinesweeperGame.__new__(minesweeper_multiplayer.MinesweeperGame)
+    game.mode = 'solo'
+    game.network = None
+    game.cheat_mode = False
+    game.game_mode = 'standard'
+    game.difficulty = minesweeper_multiplayer.Difficulty[difficulty.upper()]
+    game.reset_game()
+    return game
+
+
+def _startup(code: str) -> Callable[[], object]:
+    """A fresh interpreter running code, timed from process start to its exit"""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1', SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    command = [sys.executable, '-W', 'ignore', '-c', code]
+    cwd = os.path.dirname(os.path.abspath(__file__))  # assets are loaded relative to the repo
+    return lambda: subprocess.run(command, env=env, cwd=cwd, check=True)
+
+
+def _mp_place_mines(difficulty: str) -> Callable[[], object]:
+    random.seed(0)
+    game = _multiplayer_game(difficulty)
+    return lambda: game.place_mines(0, 0)
+
+
+def _mp_flood() -> Callable[[], object]:
+    """One click opening a Hard board that has only three mines, walled into the last corner"""
+    game = _multiplayer_game('hard')
+    rows, cols = game.difficulty.rows, game.difficulty.cols
+    game.difficulty = types.SimpleNamespace(rows=rows, cols=cols, mines=3)
+    for row, col in ((rows - 2, cols - 1), (rows - 1, cols - 2), (rows - 2, cols - 2)):
+        game.board[row][col].is_mine = True
+    # the pocketed last cell is never reached, so the game is not won and nothing is saved
+    for row in range(rows):
+        for col in range(cols):
+            game.board[row][col].adjacent_mines = sum(
+                game.board[r][c].is_mine for r in range(max(row - 1, 0), min(row + 2, rows))
+                for c in range(max(col - 1, 0), min(col + 2, cols)) if (r, c) != (row, col))
+    game.first_click = False
+    game.start_time = time.time()
+    return lambda: game.reveal_cell(0, 0)
+
+
+def _mp_hint() -> Callable[[], object]:
+    random.seed(0)
+    game = _multiplayer_game('hard')
+    game.place_mines(0, 0)
+    game.start_time = time.time()
+    game.board[0][0].is_revealed = True
+
+    def hint():
+        game.hints_remaining = 3
+        game.use_hint()
+    return hint
+
+
+CASES: dict[str, Case] = {
+    **{f'field-start-{name}': (lambda size=size: _start(*size)) for name, size in DIFFICULTIES.items()},
+    'field-flood-empty': _empty_flood,
+    'field-chords-hard': _chords,
+    'field-hint-frontier': _hint_frontier,
+    **{f'mp-place-mines-{name}': (lambda name=name: _mp_place_mines(name)) for name in ('easy', 'medium', 'hard')},
+    'mp-flood-hard': _mp_flood,
+    'mp-hint-hard': _mp_hint,
+    # first frame of main.py, and the multiplayer client's imports before anyone picks multiplayer
+    'startup-first-frame': lambda: _startup('import main, draw, pygame; main.setup(); '
+                                            'pygame.display.update(draw.draw_screen())'),
+    'startup-import-multiplayer': lambda: _startup('import minesweeper_multiplayer'),
+}
+
+
+# Too noisy to gate on: most of their time is the interpreter and SDL starting up
+UNGATED = ('startup-first-frame', 'startup-import-multiplayer')
+
+
+def _quiet_pygame():
+    """Keep pygame, initialised on import by the clients, quiet and off the screen and speakers"""
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+def idle_cpu(seconds: float = 5.0) -> dict[str, float]:
+    """Percent of a core main.py's loop uses for seconds of an idle, started game, per loop kind"""
+    _quiet_pygame()
+    import pygame
+
+    import draw
+    import main
+
+    def fixed_rate():
+        # the loop before it learnt to idle: a frame every 1/FPS whatever happens
+        clock = pygame.time.Clock()
+        while not main.process_input():
+            pygame.display.update(draw.draw_screen())
+            clock.tick(main.FPS)
+
+    cwd = os.getcwd()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # assets are loaded relative to the repo
+    try:
+        results = {}
+        for name, loop in (('fixed-rate', fixed_rate), ('adaptive', main.run)):
+            random.seed(0)
+            main.setup()
+            field.cell_up(main.field_width // 2, main.field_height // 2)  # the timer is running
+            pygame.event.clear()
+            pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+            started, cpu = time.perf_counter(), time.process_time()
+            loop()
+            results[name] = (time.process_time() - cpu) / (time.perf_counter() - started) * 100
+        return results
+    finally:
+        os.chdir(cwd)
+
+
+def measure(case: Case, budget: float = DEFAULT_BUDGET) -> float:
+    """Best time in seconds of one call, over as many freshly prepared runs as the budget allows"""
+    best = float('inf')
+    runs = 0
+    deadline = time.perf_counter() + budget
+    while runs < MIN_RUNS or time.perf_counter() < deadline:
+        call = case()
+        # like timeit, keep collections from landing inside one run but not another
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - started)
+        finally:
+            gc.enable()
+        runs += 1
+    return best
+
+
+def run(names: list[str] = None, budget: float = DEFAULT_BUDGET) -> dict:
+    results = {name: measure(CASES[name], budget) for name in names or CASES}
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'cases': results}
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Names of the gated cases more than threshold percent slower than in the baseline"""
+    slower = []
+    for name, seconds in results['cases'].items():
+        before = name not in UNGATED and baseline['cases'].get(name)
+        if before and (seconds / before - 1) * 100 > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the board logic and gate on regressions')
+    parser.add_argument('cases', nargs='*', metavar='case', help=f'cases to run (default: all of {", ".join(CASES)})')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='seconds spent timing each case')
+    parser.add_argument('--save', metavar='PATH', help='write the results as the new baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail when a case is slower than in this baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='percent slower than the baseline that fails (default: %(default)s)')
+    parser.add_argument('--idle-cpu', type=float, metavar='SECONDS',
+                        help='instead, compare the CPU use of the idle game loop over this many seconds per loop')
+    args = parser.parse_args(argv)
+
+    if args.idle_cpu:
+        for name, percent in idle_cpu(args.idle_cpu).items():
+            print(f'{"idle loop, " + name:>24}: {percent:12.2f} % CPU')
+        return 0
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f'unknown cases: {", ".join(unknown)}')
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            parser.error(f'no baseline at {args.compare}; baselines are per machine, save one here first with --save')
+
+    results = run(args.cases, args.budget)
+
+    for name, seconds in results['cases'].items():
+        line = f'{name:>24}: {seconds * 1e6:12.1f} us'
+        before = baseline and baseline['cases'].get(name)
+        if before:
+            line += f'  {(seconds / before - 1) * 100:+7.1f}%'
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if baseline:
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print(f'Slower than the baseline by more than {args.threshold}%: {", ".join(slower)}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,6 +6,9 @@ import os
 from datetime import datetime
 from enum import Enum
 
+from client_loop import wait_for_next_frame
+from text_cache import number_tiles, render as render_text
+
 # Initialize Pygame
 pygame.init()
 
@@ -73,7 +76,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=5)
         pygame.draw.rect(screen, TEXT_COLOR, self.rect, 2, border_radius=5)
 
-        text_surface = self.font.render(self.text, True, TEXT_COLOR)
+        text_surface = render_text(self.font, self.text, TEXT_COLOR)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -152,6 +155,7 @@ class MinesweeperGame:
         self.start_time = None
         self.elapsed_time = 0
         self.flags_placed = 0
+        self.revealed_count = 0  # safe cells revealed, the game is won when all of them are
         self.hints_remaining = 3
         self.hint_cell = None
         self.hovered_cell = None
@@ -211,15 +215,28 @@ class MinesweeperGame:
             self.reveal_all_mines()
             return
 
+        self.revealed_count += 1
         if cell.adjacent_mines == 0:
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    if dr == 0 and dc == 0:
-                        continue
-                    self.reveal_cell(row + dr, col + dc)
+            self.flood_fill(row, col)
 
         self.check_win()
 
+    def flood_fill(self, row, col):
+        """Reveal the opening around a revealed zero, iteratively so big openings cannot hit the recursion limit"""
+        rows, cols = self.difficulty.rows, self.difficulty.cols
+        to_visit = [(row, col)]
+        while to_visit:
+            r, c = to_visit.pop()
+            for nr in range(max(r - 1, 0), min(r + 2, rows)):
+                for nc in range(max(c - 1, 0), min(c + 2, cols)):
+                    neighbor = self.board[nr][nc]
+                    if neighbor.is_revealed or neighbor.is_flagged:
+                        continue
+                    neighbor.is_revealed = True
+                    self.revealed_count += 1
+                    if neighbor.adjacent_mines == 0:
+                        to_visit.append((nr, nc))
+
     def reveal_all_mines(self):
         for row in range(self.difficulty.rows):
             for col in range(self.difficulty.cols):
@@ -241,11 +258,8 @@ class MinesweeperGame:
             self.flags_placed -= 1
 
     def check_win(self):
-        for row in range(self.difficulty.rows):
-            for col in range(self.difficulty.cols):
-                cell = self.board[row][col]
-                if not cell.is_mine and not cell.is_revealed:
-                    return
+        if self.revealed_count < self.difficulty.rows * self.difficulty.cols - self.difficulty.mines:
+            return
 
         self.game_won = True
         self.game_over = True
@@ -339,7 +353,7 @@ class MinesweeperGame:
         self.screen.fill(BG_COLOR)
 
         # Draw title
-        title = self.font_large.render("MINESWEEPER", True, TEXT_COLOR)
+        title = render_text(self.font_large, "MINESWEEPER", TEXT_COLOR)
         self.screen.blit(title, (self.padding, self.padding))
 
         # Draw mode buttons
@@ -356,12 +370,14 @@ class MinesweeperGame:
         elif self.game_over:
             info_text += "   💥 GAME OVER"
 
-        info_surface = self.font_medium.render(info_text, True, TEXT_COLOR)
+        info_surface = render_text(self.font_medium, info_text, TEXT_COLOR)
         self.screen.blit(info_surface, (self.padding, info_y))
 
         # Draw game board
         board_x = self.padding
         board_y = self.top_panel_height
+        # revealed cells, blank and numbered, are pre-rendered tiles
+        tiles = number_tiles(self.font_medium, NUMBER_COLORS, self.cell_size - 2, CELL_REVEALED)
 
         for row in range(self.difficulty.rows):
             for col in range(self.difficulty.cols):
@@ -375,16 +391,12 @@ class MinesweeperGame:
                 is_hovered = self.hovered_cell == (row, col)
 
                 if cell.is_revealed:
-                    pygame.draw.rect(self.screen, CELL_REVEALED, rect, border_radius=3)
-
                     if cell.is_mine:
+                        pygame.draw.rect(self.screen, CELL_REVEALED, rect, border_radius=3)
                         pygame.draw.circle(self.screen, MINE_COLOR,
                                          rect.center, self.cell_size // 4)
-                    elif cell.adjacent_mines > 0:
-                        color = NUMBER_COLORS[cell.adjacent_mines]
-                        text = self.font_medium.render(str(cell.adjacent_mines), True, color)
-                        text_rect = text.get_rect(center=rect.center)
-                        self.screen.blit(text, text_rect)
+                    else:
+                        self.screen.blit(tiles[cell.adjacent_mines], rect)
                 else:
                     color = CELL_HOVER if is_hovered and not self.game_over else CELL_HIDDEN
                     pygame.draw.rect(self.screen, color, rect, border_radius=3)
@@ -418,12 +430,12 @@ class MinesweeperGame:
         pygame.draw.rect(self.screen, PANEL_BG, (panel_x, panel_y, panel_width, panel_height), border_radius=5)
 
         # Title
-        title = self.font_medium.render("LEADERBOARD", True, TEXT_COLOR)
+        title = render_text(self.font_medium, "LEADERBOARD", TEXT_COLOR)
         title_rect = title.get_rect(centerx=panel_x + panel_width // 2)
         self.screen.blit(title, (title_rect.x, panel_y + 10))
 
         # Difficulty tabs
-        diff_name = self.font_small.render(f"{self.difficulty.display_name} Mode", True, BUTTON_COLOR)
+        diff_name = render_text(self.font_small, f"{self.difficulty.display_name} Mode", BUTTON_COLOR)
         diff_rect = diff_name.get_rect(centerx=panel_x + panel_width // 2)
         self.screen.blit(diff_name, (diff_rect.x, panel_y + 40))
 
@@ -436,9 +448,9 @@ class MinesweeperGame:
             score_text = f"{entry['score']} pts"
             time_text = f"{int(entry['time'])}s"
 
-            rank = self.font_small.render(rank_text, True, TEXT_COLOR)
-            score = self.font_small.render(score_text, True, BUTTON_COLOR)
-            time = self.font_small.render(time_text, True, TEXT_COLOR)
+            rank = render_text(self.font_small, rank_text, TEXT_COLOR)
+            score = render_text(self.font_small, score_text, BUTTON_COLOR)
+            time = render_text(self.font_small, time_text, TEXT_COLOR)
 
             self.screen.blit(rank, (panel_x + 10, entry_y))
             self.screen.blit(score, (panel_x + 40, entry_y))
@@ -447,10 +459,13 @@ class MinesweeperGame:
             entry_y += 25
 
         if not entries:
-            no_scores = self.font_small.render("No scores yet!", True, TEXT_COLOR)
+            no_scores = render_text(self.font_small, "No scores yet!", TEXT_COLOR)
             no_scores_rect = no_scores.get_rect(centerx=panel_x + panel_width // 2)
             self.screen.blit(no_scores, (no_scores_rect.x, panel_y + 100))
 
+    def wait_for_next_frame(self, clock):
+        wait_for_next_frame(clock, self.start_time if not self.game_over else None)
+
     def run(self):
         clock = pygame.time.Clock()
         running = True
@@ -491,7 +506,7 @@ class MinesweeperGame:
                 self.elapsed_time = int(time.time() - self.start_time)
 
             self.draw()
-            clock.tick(60)
+            self.wait_for_next_frame(clock)
 
         pygame.quit()
 
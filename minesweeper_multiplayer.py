@@ -5,9 +5,15 @@ import json
 import os
 from datetime import datetime
 from enum import Enum
-import socketio
-import requests
-from threading import Thread
+
+import queue
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from threading import Lock
+
+from client_loop import wait_for_next_frame
+from server.board_generator import generate_mines, pack_cells
+from text_cache import number_tiles, render as render_text
 
 # Initialize Pygame
 pygame.init()
@@ -43,6 +49,9 @@ NUMBER_COLORS = {
 # Server configuration - Railway deployment
 SERVER_URL = os.environ.get('SERVER_URL', 'https://minesweeper-server-production-ecec.up.railway.app')
 
+# Posted when a server event is queued, so a game loop sleeping in pygame.event.wait wakes up to poll it
+NETWORK_EVENT = pygame.event.custom_type()
+
 class Difficulty(Enum):
     EASY = ("Easy", 9, 9, 10)
     MEDIUM = ("Medium", 16, 16, 40)
@@ -81,7 +90,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=5)
         pygame.draw.rect(screen, TEXT_COLOR, self.rect, 2, border_radius=5)
 
-        text_surface = self.font.render(self.text, True, TEXT_COLOR)
+        text_surface = render_text(self.font, self.text, TEXT_COLOR)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -399,8 +408,29 @@ def choose_multiplayer_game_mode():
 
     return choice
 
+class ServerError(Exception):
+    """The server answered a request with an error event"""
+
+
 class NetworkManager:
+    """Socket.IO connection to the game server.
+
+    Server events arrive on the Socket.IO background thread, which only queues them;
+    poll() applies them on the game loop's thread once per frame, so the game never sees
+    state change halfway through a frame. Outbound calls return futures: requests with a
+    response event (create_room, join_room) resolve with its data or fail with ServerError,
+    the others resolve with the server's ack.
+    """
+
+    RESPONSE_TIMEOUT = 5  # seconds wait() blocks for a response before giving up
+
+    # Response event of each request; an error event fails the oldest request still waiting
+    RESPONSES = {'create_room': 'room_created', 'join_room': 'room_joined'}
+
     def __init__(self):
+        # networking is only imported once multiplayer is chosen, solo play starts without it
+        import socketio
+
         self.sio = socketio.Client()
         self.connected = False
         self.room_code = None
@@ -411,90 +441,172 @@ class NetworkManager:
         self.current_turn = None  # For Luck Mode: username of player whose turn it is
         self.game_result = None  # "won", "lost", or None
 
+        self.events = queue.SimpleQueue()  # (event, data) waiting for poll()
+        self._pending = deque()  # (response event, future) of requests in the order they were sent
+        self._pending_lock = Lock()
+
         # Setup event handlers
         self.setup_handlers()
 
     def setup_handlers(self):
-        @self.sio.on('connected')
-        def on_connected(data):
-            print(f"Connected to server: {data}")
-            self.connected = True
-
-        @self.sio.on('room_created')
-        def on_room_created(data):
-            self.room_code = data['room_code']
-            print(f"Room created: {self.room_code}")
-
-        @self.sio.on('room_joined')
-        def on_room_joined(data):
-            self.room_code = data['room_code']
-            self.players = data['players']
-            print(f"Joined room: {self.room_code}")
-
-        @self.sio.on('player_joined')
-        def on_player_joined(data):
-            self.players = data['players']
-            print(f"Player joined: {data['username']}")
-
-        @self.sio.on('player_left')
-        def on_player_left(data):
-            print(f"Player left: {data['username']}")
-
-        @self.sio.on('player_ready_update')
-        def on_ready_update(data):
-            self.players = data['players']
-
-        @self.sio.on('game_start')
-        def on_game_start(data):
-            self.game_started = True
-            self.board_seed = data['board_seed']
-            self.game_mode = data.get('game_mode', 'standard')
-            self.current_turn = data.get('current_turn')
-            print(f"Game starting! Mode: {self.game_mode}")
-
-        @self.sio.on('player_action')
-        def on_player_action(data):
-            print(f"Player {data['username']} performed action: {data['action']}")
-
-        @self.sio.on('player_finished')
-        def on_player_finished(data):
-            self.players = data['players']
-            print(f"Player {data['username']} finished! Score: {data['score']}")
-
-        @self.sio.on('game_ended')
-        def on_game_ended(data):
-            print("Game ended! Results:", data['results'])
-            # Set game result based on position
-            results = data['results']
-            my_username = [p['username'] for p in self.players if p['session_id'] == self.sio.sid]
-            if my_username:
-                my_username = my_username[0]
-                if results[0]['username'] == my_username:
-                    self.game_result = "won"
-                else:
-                    self.game_result = "lost"
+        for event in self.handlers:
+            self.sio.on(event, lambda data=None, event=event: self._receive(event, data))
+
+    def _receive(self, event, data):
+        """Runs on the Socket.IO thread: settle the request this answers and queue the event"""
+        with self._pending_lock:
+            if event == 'disconnect':
+                settled = [(future, ConnectionError("Disconnected from server")) for _, future in self._pending]
+                self._pending.clear()
+            elif event == 'error' and self._pending:
+                settled = [(self._pending.popleft()[1], ServerError(self.error_message(data)))]
+            else:
+                settled = [(future, None) for response, future in self._pending if response == event][:1]
+                for future, _ in settled:
+                    self._pending.remove((event, future))
+        self.events.put((event, data))
+        if pygame.display.get_init():
+            pygame.event.post(pygame.event.Event(NETWORK_EVENT))
+        for future, error in settled:
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(data)
 
-        @self.sio.on('turn_changed')
-        def on_turn_changed(data):
-            """Handle turn change in Luck Mode"""
-            self.current_turn = data['current_turn']
-            print(f"Turn changed to: {self.current_turn}")
+    def poll(self):
+        """Apply every event received since the last call, on the calling thread"""
+        while True:
+            try:
+                event, data = self.events.get_nowait()
+            except queue.Empty:
+                return
+            self.handlers[event](self, data)
 
-        @self.sio.on('player_eliminated')
-        def on_player_eliminated(data):
-            """Handle player elimination in Luck Mode"""
-            print(f"Player {data['username']} was eliminated!")
-            if data.get('winner'):
-                self.game_result = "won" if data['winner'] == player_sessions.get(self.sio.sid, {}).get('username') else "lost"
+    def wait(self, future, timeout=RESPONSE_TIMEOUT):
+        """Block on a request from a menu, returns its response data or None on an error or timeout"""
+        try:
+            return future.result(timeout)
+        except (ServerError, ConnectionError, FutureTimeoutError) as e:
+            print(f"Request failed: {e or 'no response from server'}")
+            return None
+        finally:
+            self.poll()
+
+    def _emit(self, event, data):
+        from socketio.exceptions import SocketIOError
+
+        future = Future()
+        response = self.RESPONSES.get(event)
+        try:
+            if response:
+                with self._pending_lock:
+                    self._pending.append((response, future))
+                self.sio.emit(event, data)
+            else:
+                self.sio.emit(event, data, callback=lambda ack=None: future.set_result(ack))
+        except SocketIOError as e:
+            with self._pending_lock:
+                if (response, future) in self._pending:
+                    self._pending.remove((response, future))
+            future.set_exception(ConnectionError(str(e)))
+        return future
+
+    def on_connected(self, data):
+        print(f"Connected to server: {data}")
+        self.connected = True
+
+    def on_disconnect(self, data):
+        self.connected = False
 
-        @self.sio.on('error')
-        def on_error(data):
-            print(f"Error: {data['message']}")
+    def on_room_created(self, data):
+        self.room_code = data['room_code']
+        print(f"Room created: {self.room_code}")
+
+    def on_room_joined(self, data):
+        self.room_code = data['room_code']
+        self.players = data['players']
+        print(f"Joined room: {self.room_code}")
+
+    def on_player_joined(self, data):
+        self.players = data['players']
+        print(f"Player joined: {data['username']}")
+
+    def on_player_left(self, data):
+        print(f"Player left: {data['username']}")
+
+    def on_ready_update(self, data):
+        self.players = data['players']
+
+    def on_game_start(self, data):
+        self.game_started = True
+        self.board_seed = data['board_seed']
+        self.game_mode = data.get('game_mode', 'standard')
+        self.current_turn = data.get('current_turn')
+        print(f"Game starting! Mode: {self.game_mode}")
+
+    def on_player_action(self, data):
+        print(f"Player {data['username']} performed action: {data['action']}")
+
+    def on_player_finished(self, data):
+        self.players = data['players']
+        print(f"Player {data['username']} finished! Score: {data['score']}")
+
+    def my_username(self):
+        return next((p['username'] for p in self.players if p.get('session_id') == self.sio.sid), None)
+
+    def on_game_ended(self, data):
+        print("Game ended! Results:", data['results'])
+        # Set game result based on position
+        results = data['results']
+        my_username = self.my_username()
+        if my_username:
+            if results[0]['username'] == my_username:
+                self.game_result = "won"
+            else:
+                self.game_result = "lost"
+
+    def on_turn_changed(self, data):
+        """Handle turn change in Luck Mode"""
+        self.current_turn = data['current_turn']
+        print(f"Turn changed to: {self.current_turn}")
+
+    def on_player_eliminated(self, data):
+        """Handle player elimination in Luck Mode"""
+        print(f"Player {data['username']} was eliminated!")
+        if data.get('winner'):
+            self.game_result = "won" if data['winner'] == self.my_username() else "lost"
+
+    @staticmethod
+    def error_message(data):
+        """The message of an error event, which is normally {'message': ...} but may be a bare string"""
+        return data.get('message') if isinstance(data, dict) else data
+
+    def on_error(self, data):
+        print(f"Error: {self.error_message(data)}")
+
+    # Server event -> handler applied by poll()
+    handlers = {
+        'connected': on_connected,
+        'disconnect': on_disconnect,
+        'room_created': on_room_created,
+        'room_joined': on_room_joined,
+        'player_joined': on_player_joined,
+        'player_left': on_player_left,
+        'player_ready_update': on_ready_update,
+        'game_start': on_game_start,
+        'player_action': on_player_action,
+        'player_finished': on_player_finished,
+        'game_ended': on_game_ended,
+        'turn_changed': on_turn_changed,
+        'player_eliminated': on_player_eliminated,
+        'error': on_error,
+    }
 
     def connect(self):
         try:
+            # returns once the connection is up, the server's greeting is applied by poll()
             self.sio.connect(SERVER_URL)
-            time.sleep(0.5)  # Wait for connection
+            self.connected = True
             return True
         except Exception as e:
             print(f"Failed to connect to server: {e}")
@@ -505,34 +617,41 @@ class NetworkManager:
             self.sio.disconnect()
 
     def create_room(self, username, difficulty="Medium", game_mode="standard"):
-        self.sio.emit('create_room', {
+        self.game_mode = game_mode
+        return self._emit('create_room', {
             "username": username,
             "difficulty": difficulty,
             "max_players": 3,
             "game_mode": game_mode
         })
-        self.game_mode = game_mode
-        time.sleep(0.5)  # Wait for response
 
     def join_room(self, room_code, username):
-        self.sio.emit('join_room', {
+        return self._emit('join_room', {
             "room_code": room_code,
             "username": username
         })
-        time.sleep(0.5)  # Wait for response
 
     def mark_ready(self):
-        self.sio.emit('player_ready', {})
+        return self._emit('player_ready', {})
 
     def send_action(self, action, row, col):
-        self.sio.emit('game_action', {
+        return self._emit('game_action', {
             "action": action,
             "row": row,
             "col": col
         })
 
+    def send_reveal_batch(self, row, col, cells):
+        """One message for a reveal and every cell its flood opened, as flat indices row * cols + col"""
+        return self._emit('game_action', {
+            "action": "reveal_batch",
+            "row": row,
+            "col": col,
+            "cells": cells
+        })
+
     def send_finished(self, score, time_taken):
-        self.sio.emit('game_finished', {
+        return self._emit('game_finished', {
             "score": score,
             "time": time_taken
         })
@@ -579,6 +698,7 @@ class MinesweeperGame:
         self.font_large = pygame.font.Font(None, 36)
         self.font_medium = pygame.font.Font(None, 24)
         self.font_small = pygame.font.Font(None, 18)
+        self.font_huge = pygame.font.Font(None, 96)
 
     def create_ui_elements(self):
         # Mode buttons
@@ -648,10 +768,6 @@ class MinesweeperGame:
         self.create_ui_elements()
 
     def reset_game(self):
-        # Use network seed if in multiplayer
-        if self.mode == "multiplayer" and self.network and self.network.board_seed:
-            random.seed(self.network.board_seed)
-
         self.board = [[Cell(row, col) for col in range(self.difficulty.cols)]
                       for row in range(self.difficulty.rows)]
         self.game_over = False
@@ -660,28 +776,23 @@ class MinesweeperGame:
         self.start_time = None
         self.elapsed_time = 0
         self.flags_placed = 0
+        self.revealed_count = 0  # safe cells revealed, the game is won when all of them are
         self.hints_remaining = 3
         self.hint_cell = None
         self.hovered_cell = None
         self.score = 0
 
     def place_mines(self, exclude_row, exclude_col):
-        mines_placed = 0
-        exclude_cells = set()
-
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                r, c = exclude_row + dr, exclude_col + dc
-                if 0 <= r < self.difficulty.rows and 0 <= c < self.difficulty.cols:
-                    exclude_cells.add((r, c))
-
-        while mines_placed < self.difficulty.mines:
-            row = random.randint(0, self.difficulty.rows - 1)
-            col = random.randint(0, self.difficulty.cols - 1)
+        # Use network seed if in multiplayer so every player gets the same board
+        if self.mode == "multiplayer" and self.network and self.network.board_seed:
+            seed = self.network.board_seed
+        else:
+            seed = random.getrandbits(32)
 
-            if not self.board[row][col].is_mine and (row, col) not in exclude_cells:
-                self.board[row][col].is_mine = True
-                mines_placed += 1
+        for i in generate_mines(seed, self.difficulty.rows, self.difficulty.cols, self.difficulty.mines,
+                                first_click=(exclude_row, exclude_col)):
+            row, col = divmod(i, self.difficulty.cols)
+            self.board[row][col].is_mine = True
 
         # Calculate adjacent mines
         for row in range(self.difficulty.rows):
@@ -734,10 +845,8 @@ class MinesweeperGame:
                 self.reveal_all_mines()
             return
 
-        # Send action to network if multiplayer
-        if self.mode == "multiplayer" and self.network and self.network.game_started:
-            self.network.send_action("reveal", row, col)
-
+        self.revealed_count += 1
+        opened = []
         # In Luck Mode, only reveal one cell (no flood fill)
         if self.game_mode == "luck":
             # Don't flood fill in Luck Mode
@@ -745,14 +854,37 @@ class MinesweeperGame:
         else:
             # Standard mode: flood fill if no adjacent mines
             if cell.adjacent_mines == 0:
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0:
-                            continue
-                        self.reveal_cell(row + dr, col + dc)
+                opened = self.flood_fill(row, col)
+
+        # Send action to network if multiplayer, one message however much the click opened
+        if self.mode == "multiplayer" and self.network and self.network.game_started:
+            if opened:
+                self.network.send_reveal_batch(row, col, pack_cells(opened, self.difficulty.cols))
+            else:
+                self.network.send_action("reveal", row, col)
 
         self.check_win()
 
+    def flood_fill(self, row, col):
+        """Reveal the opening around a revealed zero, iteratively so big openings cannot hit the recursion limit.
+        Returns the (row, col) of every cell it opened."""
+        rows, cols = self.difficulty.rows, self.difficulty.cols
+        opened = []
+        to_visit = [(row, col)]
+        while to_visit:
+            r, c = to_visit.pop()
+            for nr in range(max(r - 1, 0), min(r + 2, rows)):
+                for nc in range(max(c - 1, 0), min(c + 2, cols)):
+                    neighbor = self.board[nr][nc]
+                    if neighbor.is_revealed or neighbor.is_flagged:
+                        continue
+                    neighbor.is_revealed = True
+                    self.revealed_count += 1
+                    opened.append((nr, nc))
+                    if neighbor.adjacent_mines == 0:
+                        to_visit.append((nr, nc))
+        return opened
+
     def reveal_all_mines(self):
         for row in range(self.difficulty.rows):
             for col in range(self.difficulty.cols):
@@ -778,11 +910,8 @@ class MinesweeperGame:
             self.network.send_action("flag", row, col)
 
     def check_win(self):
-        for row in range(self.difficulty.rows):
-            for col in range(self.difficulty.cols):
-                cell = self.board[row][col]
-                if not cell.is_mine and not cell.is_revealed:
-                    return
+        if self.revealed_count < self.difficulty.rows * self.difficulty.cols - self.difficulty.mines:
+            return
 
         self.game_won = True
         self.game_over = True
@@ -843,8 +972,9 @@ class MinesweeperGame:
         for row in range(self.difficulty.rows):
             for col in range(self.difficulty.cols):
                 cell = self.board[row][col]
-                if not cell.is_mine:
+                if not cell.is_mine and not cell.is_revealed:
                     cell.is_revealed = True
+                    self.revealed_count += 1
 
         # Trigger win
         self.check_win()
@@ -919,6 +1049,7 @@ class MinesweeperGame:
         # Also submit to global leaderboard if online
         if self.mode == "multiplayer" and self.network and self.network.connected:
             try:
+                import requests
                 requests.post(f"{SERVER_URL}/api/leaderboard/submit", json=entry, timeout=2)
             except:
                 pass
@@ -934,7 +1065,7 @@ class MinesweeperGame:
             title_text = f"MINESWEEPER - {self.username}"
             title_color = TEXT_COLOR
 
-        title = self.font_large.render(title_text, True, title_color)
+        title = render_text(self.font_large, title_text, title_color)
         self.screen.blit(title, (self.padding, self.padding))
 
         # Draw mode buttons
@@ -953,7 +1084,7 @@ class MinesweeperGame:
             else:
                 room_text = "Connecting to room..."
 
-            room_surf = self.font_small.render(room_text, True, BUTTON_COLOR)
+            room_surf = render_text(self.font_small, room_text, BUTTON_COLOR)
             self.screen.blit(room_surf, (self.padding + 160, multi_y))
 
         # Draw game info
@@ -970,7 +1101,7 @@ class MinesweeperGame:
                 else:
                     turn_text = f"⏳ {self.network.current_turn}'s turn"
                     turn_color = TEXT_COLOR
-                turn_surf = self.font_medium.render(turn_text, True, turn_color)
+                turn_surf = render_text(self.font_medium, turn_text, turn_color)
                 self.screen.blit(turn_surf, (self.padding, info_y))
                 info_y += 28
 
@@ -981,12 +1112,14 @@ class MinesweeperGame:
         elif self.game_over:
             info_text += "   💥 GAME OVER"
 
-        info_surface = self.font_medium.render(info_text, True, TEXT_COLOR)
+        info_surface = render_text(self.font_medium, info_text, TEXT_COLOR)
         self.screen.blit(info_surface, (self.padding, info_y))
 
         # Draw game board
         board_x = self.padding
         board_y = self.top_panel_height
+        # revealed cells, blank and numbered, are pre-rendered tiles
+        tiles = number_tiles(self.font_medium, NUMBER_COLORS, self.cell_size - 2, CELL_REVEALED)
 
         for row in range(self.difficulty.rows):
             for col in range(self.difficulty.cols):
@@ -1000,17 +1133,15 @@ class MinesweeperGame:
                 show_mine_cheat = self.cheat_mode and cell.is_mine and not cell.is_revealed and not cell.is_flagged
 
                 if cell.is_revealed:
-                    pygame.draw.rect(self.screen, CELL_REVEALED, rect, border_radius=3)
-
                     if cell.is_mine:
+                        pygame.draw.rect(self.screen, CELL_REVEALED, rect, border_radius=3)
                         pygame.draw.circle(self.screen, MINE_COLOR,
                                          rect.center, self.cell_size // 4)
-                    elif cell.adjacent_mines > 0 and self.game_mode != "luck":
+                    elif self.game_mode != "luck":
+                        self.screen.blit(tiles[cell.adjacent_mines], rect)
+                    else:
                         # Only show numbers in Standard Mode
-                        color = NUMBER_COLORS[cell.adjacent_mines]
-                        text = self.font_medium.render(str(cell.adjacent_mines), True, color)
-                        text_rect = text.get_rect(center=rect.center)
-                        self.screen.blit(text, text_rect)
+                        self.screen.blit(tiles[0], rect)
                 else:
                     color = CELL_HOVER if is_hovered and not self.game_over else CELL_HIDDEN
                     pygame.draw.rect(self.screen, color, rect, border_radius=3)
@@ -1055,7 +1186,7 @@ class MinesweeperGame:
         else:
             title_text = "LEADERBOARD"
 
-        title = self.font_medium.render(title_text, True, TEXT_COLOR)
+        title = render_text(self.font_medium, title_text, TEXT_COLOR)
         title_rect = title.get_rect(centerx=panel_x + panel_width // 2)
         self.screen.blit(title, (title_rect.x, panel_y + 10))
 
@@ -1085,9 +1216,9 @@ class MinesweeperGame:
                 name_text = f"{username} {status}"
                 score_text = f"{score} pts" if finished else "Playing..."
 
-                rank_surf = self.font_small.render(rank_text, True, TEXT_COLOR)
-                name_surf = self.font_small.render(name_text, True, color)
-                score_surf = self.font_small.render(score_text, True, TEXT_COLOR)
+                rank_surf = render_text(self.font_small, rank_text, TEXT_COLOR)
+                name_surf = render_text(self.font_small, name_text, color)
+                score_surf = render_text(self.font_small, score_text, TEXT_COLOR)
 
                 self.screen.blit(rank_surf, (panel_x + 10, entry_y))
                 self.screen.blit(name_surf, (panel_x + 35, entry_y))
@@ -1096,7 +1227,7 @@ class MinesweeperGame:
                 entry_y += 25
         else:
             # Show local leaderboard
-            diff_name = self.font_small.render(f"{self.difficulty.display_name} Mode", True, BUTTON_COLOR)
+            diff_name = render_text(self.font_small, f"{self.difficulty.display_name} Mode", BUTTON_COLOR)
             diff_rect = diff_name.get_rect(centerx=panel_x + panel_width // 2)
             self.screen.blit(diff_name, (diff_rect.x, panel_y + 40))
 
@@ -1108,9 +1239,9 @@ class MinesweeperGame:
                 username = entry.get('username', 'Player')[:10]
                 score_text = f"{entry['score']} pts"
 
-                rank_surf = self.font_small.render(rank_text, True, TEXT_COLOR)
-                name_surf = self.font_small.render(username, True, BUTTON_COLOR)
-                score_surf = self.font_small.render(score_text, True, TEXT_COLOR)
+                rank_surf = render_text(self.font_small, rank_text, TEXT_COLOR)
+                name_surf = render_text(self.font_small, username, BUTTON_COLOR)
+                score_surf = render_text(self.font_small, score_text, TEXT_COLOR)
 
                 self.screen.blit(rank_surf, (panel_x + 10, entry_y))
                 self.screen.blit(name_surf, (panel_x + 35, entry_y))
@@ -1119,7 +1250,7 @@ class MinesweeperGame:
                 entry_y += 25
 
             if not entries:
-                no_scores = self.font_small.render("No scores yet!", True, TEXT_COLOR)
+                no_scores = render_text(self.font_small, "No scores yet!", TEXT_COLOR)
                 no_scores_rect = no_scores.get_rect(centerx=panel_x + panel_width // 2)
                 self.screen.blit(no_scores, (no_scores_rect.x, panel_y + 100))
 
@@ -1142,21 +1273,23 @@ class MinesweeperGame:
             emoji = "💀"
 
         # Draw result
-        font_huge = pygame.font.Font(None, 96)
-        result_surf = font_huge.render(result_text, True, result_color)
+        result_surf = render_text(self.font_huge, result_text, result_color)
         result_rect = result_surf.get_rect(center=(self.width // 2, self.height // 2 - 50))
         self.screen.blit(result_surf, result_rect)
 
         # Draw emoji
-        emoji_surf = font_huge.render(emoji, True, TEXT_COLOR)
+        emoji_surf = render_text(self.font_huge, emoji, TEXT_COLOR)
         emoji_rect = emoji_surf.get_rect(center=(self.width // 2, self.height // 2 + 50))
         self.screen.blit(emoji_surf, emoji_rect)
 
         # Instructions
-        inst_surf = self.font_medium.render("Press ESC to exit", True, TEXT_COLOR)
+        inst_surf = render_text(self.font_medium, "Press ESC to exit", TEXT_COLOR)
         inst_rect = inst_surf.get_rect(center=(self.width // 2, self.height // 2 + 150))
         self.screen.blit(inst_surf, inst_rect)
 
+    def wait_for_next_frame(self, clock):
+        wait_for_next_frame(clock, self.start_time if not self.game_over else None)
+
     def run(self):
         clock = pygame.time.Clock()
         running = True
@@ -1165,6 +1298,7 @@ class MinesweeperGame:
         if self.mode == "multiplayer" and self.network:
             waiting = True
             while waiting and not self.network.game_started:
+                self.network.poll()
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
@@ -1175,7 +1309,7 @@ class MinesweeperGame:
                         button.handle_event(event)
 
                 self.draw()
-                clock.tick(60)
+                self.wait_for_next_frame(clock)
 
             # Sync game mode from network
             if self.network.game_started:
@@ -1183,6 +1317,8 @@ class MinesweeperGame:
                 print(f"Game started in {self.game_mode} mode")
 
         while running:
+            if self.network:
+                self.network.poll()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
@@ -1220,7 +1356,7 @@ class MinesweeperGame:
                 self.elapsed_time = int(time.time() - self.start_time)
 
             self.draw()
-            clock.tick(60)
+            self.wait_for_next_frame(clock)
 
         pygame.quit()
 
@@ -1292,7 +1428,7 @@ if __name__ == '__main__':
                                     print("Returning to lobby...")
                                     break
                                 else:
-                                    network.create_room(display_username, game_mode=game_mode_choice)
+                                    network.wait(network.create_room(display_username, game_mode=game_mode_choice))
                                     if network.room_code:
                                         print(f"\nRoom created! Code: {network.room_code}")
                                         print(f"Game Mode: {game_mode_choice.capitalize()}")
@@ -1307,7 +1443,7 @@ if __name__ == '__main__':
                         elif lobby_choice == "join":
                             room_code = get_room_code()
                             if room_code:
-                                network.join_room(room_code, display_username)
+                                network.wait(network.join_room(room_code, display_username))
                                 if network.room_code:
                                     print(f"\nJoined room: {room_code}")
                                     game = MinesweeperGame(username, mode="multiplayer", network_manager=network)
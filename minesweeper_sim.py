@@ -0,0 +1,148 @@
+"""Headless simulation harness: play many games with a bot and report how it went.
+
+    python -m minesweeper_sim --games 1000 --bot probability
+
+Every game runs on its own field.GameSession, games are spread over a multiprocessing
+pool and pygame is never imported. Reports win rate, mean 3BV/s of won games, guesses
+per game and games per second, which makes it an engine throughput benchmark as well
+as a way to tune difficulty presets and scoring.
+"""
+
+import argparse
+import dataclasses
+import json
+import multiprocessing
+import random
+import time
+
+from typing import Callable
+
+import field
+from field_noguess import PRESETS
+
+MAX_MOVES = 100000
+
+Move = tuple[int, int, bool, bool]  # x, y, flag instead of reveal, whether it was a guess
+
+
+def _hidden_cells(session: field.GameSession) -> list[tuple[int, int]]:
+    return [(x, y) for x in range(session.width) for y in range(session.height) if session.board.state(x, y) == 0]
+
+
+def random_bot(session: field.GameSession, rng: random.Random) -> Move:
+    """Click any hidden cell"""
+    x, y = rng.choice(_hidden_cells(session))
+    return x, y, False, True
+
+
+def constraint_bot(session: field.GameSession, rng: random.Random) -> Move:
+    """Play the solver's deductions, click a random hidden cell when there are none"""
+    for x, y in session.solver.safe:
+        return x, y, False, False
+    for x, y in session.solver.mines:
+        return x, y, True, False
+    return random_bot(session, rng)
+
+
+def probability_bot(session: field.GameSession, rng: random.Random) -> Move:
+    """Play the solver's deductions, guess the cell least likely to be a mine when there are none"""
+    if session.solver.has_moves():
+        return constraint_bot(session, rng)
+    probabilities = session.mine_probabilities()
+    lowest = min(probabilities.values())
+    x, y = rng.choice([pos for pos, p in probabilities.items() if p == lowest])
+    return x, y, False, lowest > 0
+
+
+BOTS: dict[str, Callable[[field.GameSession, random.Random], Move]] = {
+    'random': random_bot,
+    'constraint': constraint_bot,
+    'probability': probability_bot,
+}
+
+
+@dataclasses.dataclass
+class GameResult:
+    won: bool
+    bbbv: int
+    seconds: float
+    guesses: int
+    moves: int
+
+
+def play(bot: str, width: int, height: int, mine_count: int, seed: int, engine: str = 'list') -> GameResult:
+    """Play one seeded game from the middle of the board until it is won or lost"""
+    rng = random.Random(seed)
+    choose = BOTS[bot]
+
+    session = field.GameSession(random.Random(seed))
+    started = time.perf_counter()
+    session.start_game(width, height, mine_count, engine=engine)
+    session.cell_up(width // 2, height // 2)  # the first click is always safe
+
+    guesses = moves = 0
+    while not (session.game_over() or session.game_won()) and moves < MAX_MOVES:
+        x, y, flag, guess = choose(session, rng)
+        if flag:
+            session.flag_cell(x, y)
+        else:
+            session.cell_up(x, y)
+        guesses += guess
+        moves += 1
+
+    return GameResult(session.game_won(), session.get_3bv(), time.perf_counter() - started, guesses, moves)
+
+
+def _play_task(args: tuple) -> GameResult:
+    return play(*args)
+
+
+def simulate(bot: str, width: int, height: int, mine_count: int, games: int,
+             workers: int = None, engine: str = 'list', first_seed: int = 0) -> dict:
+    """Play games seeded first_seed, first_seed + 1, ... across worker processes and summarise them"""
+    tasks = [(bot, width, height, mine_count, seed, engine) for seed in range(first_seed, first_seed + games)]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_play_task(task) for task in tasks]
+    else:
+        # spawned, not forked: a parent that imported pygame has threads a fork would deadlock on
+        with multiprocessing.get_context('spawn').Pool(workers) as pool:
+            results = pool.map(_play_task, tasks, chunksize=max(1, games // (4 * (workers or multiprocessing.cpu_count()))))
+    elapsed = time.perf_counter() - started
+
+    won = [r for r in results if r.won]
+    return {
+        'bot': bot,
+        'size': [width, height, mine_count],
+        'games': games,
+        'win_rate': len(won) / games,
+        'mean_3bv_per_s': sum(r.bbbv / r.seconds for r in won) / len(won) if won else 0.0,
+        'guesses_per_game': sum(r.guesses for r in results) / games,
+        'games_per_second': games / elapsed,
+    }
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Play minesweeper games headlessly with a bot')
+    parser.add_argument('--games', type=int, default=100, help='games per difficulty')
+    parser.add_argument('--bot', choices=list(BOTS), default='probability')
+    parser.add_argument('--difficulty', choices=[*PRESETS, 'all'], default='all')
+    parser.add_argument('--engine', choices=field.ENGINES, default='list')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--json', action='store_true', help='print one JSON object per difficulty')
+    args = parser.parse_args(argv)
+
+    names = list(PRESETS) if args.difficulty == 'all' else [args.difficulty]
+    for name in names:
+        width, height, mine_count = PRESETS[name]
+        summary = simulate(args.bot, width, height, mine_count, args.games, args.workers, args.engine, args.seed)
+        if args.json:
+            print(json.dumps({'difficulty': name, **summary}))
+        else:
+            print(f"{name:>6}: win rate {summary['win_rate']:6.1%}  3BV/s {summary['mean_3bv_per_s']:8.1f}  "
+                  f"guesses/game {summary['guesses_per_game']:5.2f}  games/s {summary['games_per_second']:7.1f}")
+
+
+if __name__ == '__main__':
+    main()
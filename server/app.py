@@ -109,6 +109,9 @@ with app.app_context():
 # BUG #105, #354 FIX: Thread-safe in-memory storage with size limits
 from concurrency import ThreadSafeDict, create_room_atomic, join_room_atomic
 
+# One board generator shared with the pygame and web clients
+from board_generator import check_cells
+
 game_rooms = ThreadSafeDict()  # {room_code: {host, players, difficulty, status, board_seed}}
 player_sessions = ThreadSafeDict()  # {session_id: {username, room_code}}
 MAX_ROOMS = 1000  # Prevent memory exhaustion
@@ -958,12 +961,13 @@ def handle_game_action(data):
     action = data.get("action")
 
     # Validate action type
-    valid_actions = ["reveal", "flag", "eliminated"]
+    # reveal_batch is a reveal plus the cells its flood opened, sent as one message
+    valid_actions = ["reveal", "reveal_batch", "flag", "eliminated"]
     if action not in valid_actions:
         return
 
     # Validate row and col if provided
-    if action in ["reveal", "flag"]:
+    if action in ["reveal", "reveal_batch", "flag"]:
         try:
             row = data.get("row")
             col = data.get("col")
@@ -979,6 +983,15 @@ def handle_game_action(data):
         except (ValueError, TypeError):
             return
 
+    # Validate the flat indices of the opened cells; luck mode boards may not match the
+    # room difficulty, so check against the same reasonable max board size as row and col
+    cells = None
+    if action == "reveal_batch":
+        try:
+            cells = check_cells(data.get("cells"), 101 * 101)
+        except ValueError:
+            return
+
     # Handle elimination in ALL game modes
     if action == "eliminated":
         # Mark player as eliminated and record their score
@@ -1065,15 +1078,18 @@ def handle_game_action(data):
         return
 
     # Broadcast action to other players in room
-    emit('player_action', {
+    relayed = {
         "username": session["username"],
         "action": action,
         "row": data.get("row"),
         "col": data.get("col")
-    }, room=room_code, skip_sid=request.sid)
+    }
+    if cells is not None:
+        relayed["cells"] = cells
+    emit('player_action', relayed, room=room_code, skip_sid=request.sid)
 
     # In Luck Mode, change turn after reveal action
-    if room["game_mode"] == "luck" and action == "reveal":
+    if room["game_mode"] == "luck" and action in ["reveal", "reveal_batch"]:
         # Find next player
         current_idx = next((i for i, p in enumerate(room["players"]) if p["username"] == room["current_turn"]), 0)
         next_idx = (current_idx + 1) % len(room["players"])
@@ -0,0 +1,104 @@
+"""
+Deterministic Board Generator
+One mine placement algorithm shared by the server, the pygame clients and the web client
+(server/web/game.js has a line-for-line port)
+
+A board is fully described by (seed, rows, cols, mines, first_click): mines are drawn with a
+mulberry32 PRNG and a partial Fisher-Yates shuffle over the flat cell index row * cols + col,
+skipping the safe zone around the first click. No retries, O(mines) work per board, and any
+client or the server can regenerate the same board from the room's seed.
+
+Layout: the server is deployed from server/ on its own and imports this file as the top-level
+module board_generator. The desktop clients run from the repository root and import it as
+server.board_generator, server/ being a namespace package with no __init__.py. Keep this file
+free of imports from the rest of server/ so both ways keep working.
+"""
+
+from typing import Callable
+
+ALGORITHM = 'mulberry32-fy'
+SAFE_RADIUS = 2  # 5x5 block around the first click is kept free of mines
+
+
+def mulberry32(seed: int) -> Callable[[], int]:
+    """32-bit PRNG returning uint32s, bit-for-bit identical to the usual JavaScript version"""
+    state = seed & 0xFFFFFFFF
+
+    def next_u32() -> int:
+        nonlocal state
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = state
+        t = ((t ^ (t >> 15)) * (t | 1)) & 0xFFFFFFFF
+        t ^= (t + ((t ^ (t >> 7)) * (t | 61))) & 0xFFFFFFFF
+        return t ^ (t >> 14)
+
+    return next_u32
+
+
+def safe_zone(rows: int, cols: int, first_click: tuple[int, int] = None, safe_radius: int = SAFE_RADIUS) -> list[int]:
+    """Sorted flat indices of the cells around first_click that must not hold a mine"""
+    if first_click is None or safe_radius < 0:
+        return []
+    row, col = first_click
+    return [r * cols + c
+            for r in range(max(row - safe_radius, 0), min(row + safe_radius + 1, rows))
+            for c in range(max(col - safe_radius, 0), min(col + safe_radius + 1, cols))]
+
+
+def generate_mines(seed: int, rows: int, cols: int, mine_count: int,
+                   first_click: tuple[int, int] = None, safe_radius: int = SAFE_RADIUS) -> list[int]:
+    """Mine positions as flat indices row * cols + col, in draw order"""
+    excluded = safe_zone(rows, cols, first_click, safe_radius)
+    available = rows * cols - len(excluded)
+    if mine_count > available:
+        raise ValueError(f'Cannot place {mine_count} mines in {available} available cells')
+
+    next_u32 = mulberry32(seed)
+    swaps = {}  # sparse Fisher-Yates: only the slots that were swapped are stored
+    mines = []
+    for i in range(mine_count):
+        j = i + (next_u32() * (available - i) >> 32)
+        picked = swaps.get(j, j)
+        swaps[j] = swaps.get(i, i)
+
+        # picked is a rank among the allowed cells, step over the excluded ones
+        for cell in excluded:
+            if cell > picked:
+                break
+            picked += 1
+        mines.append(picked)
+    return mines
+
+
+def generate_board(seed: int, rows: int, cols: int, mine_count: int,
+                   first_click: tuple[int, int] = None, safe_radius: int = SAFE_RADIUS) -> list[list[int]]:
+    """Full board as rows of cell values: -1 for a mine, otherwise the number of adjacent mines"""
+    board = [[0] * cols for _ in range(rows)]
+    for i in generate_mines(seed, rows, cols, mine_count, first_click, safe_radius):
+        row, col = divmod(i, cols)
+        board[row][col] = -1
+        for r in range(max(row - 1, 0), min(row + 2, rows)):
+            for c in range(max(col - 1, 0), min(col + 2, cols)):
+                if board[r][c] >= 0:
+                    board[r][c] += 1
+    return board
+
+
+def pack_cells(cells: list[tuple[int, int]], cols: int) -> list[int]:
+    """(row, col) pairs as flat indices row * cols + col, the form a reveal_batch carries them in"""
+    return [row * cols + col for row, col in cells]
+
+
+def unpack_cells(packed: list[int], cols: int) -> list[tuple[int, int]]:
+    return [divmod(i, cols) for i in packed]
+
+
+def check_cells(packed, cell_count: int) -> list[int]:
+    """Validated flat indices of a reveal_batch: distinct ints below cell_count, at most one per cell"""
+    if not isinstance(packed, list) or len(packed) > cell_count:
+        raise ValueError('Cell list must be a list no longer than the board')
+    if not all(type(i) is int and 0 <= i < cell_count for i in packed):
+        raise ValueError(f'Cells must be flat indices below {cell_count}')
+    if len(set(packed)) != len(packed):
+        raise ValueError('Cells must not repeat')
+    return packed
@@ -17,7 +17,7 @@ const state = {
     players: [],
     gameStarted: false,
     currentTurn: null,
-    seededRandom: null, // Store seeded random for multiplayer
+    boardSeed: null, // Room board seed for multiplayer
     lastGameWinner: null, // Track winner for mode selection
 
     // Game variables
@@ -46,6 +46,7 @@ const state = {
     survivalLevelTimeout: null, // BUG #49 FIX: Track survival level timeout
     gameResultTimeout: null, // BUG #237 FIX: Track game result timeout for cleanup
     tilesClicked: 0, // Track tiles clicked for new scoring system
+    revealBatch: null, // Flat indices (row * cols + col) opened by the flood in progress, sent with the click that started it
     totalGameClicks: 0, // For multiplayer: total clicks from all players
     soundEnabled: true, // Sound system toggle
 
@@ -1274,7 +1275,8 @@ function connectToServer() {
 
         // Handle other players' actions
         // Validate row/col bounds before accessing board
-        if (data.action === 'reveal' && data.row !== undefined && data.col !== undefined) {
+        // reveal_batch is a reveal whose flood opened more cells, listed in data.cells
+        if ((data.action === 'reveal' || data.action === 'reveal_batch') && data.row !== undefined && data.col !== undefined) {
             if (data.row < 0 || data.row >= state.difficulty.rows || data.col < 0 || data.col >= state.difficulty.cols) {
                 console.error('player_action out of bounds:', data);
                 return;
@@ -1586,18 +1588,8 @@ function startMultiplayerGame(boardSeed) {
     // BUG #68, #70, #74 FIXES: Validate board seed and handle edge cases
     const validSeed = (typeof boardSeed === 'number' && boardSeed > 0) ? boardSeed : Math.floor(Math.random() * 1000000) + 1;
 
-    // Seed random for consistent board across players
-    state.seededRandom = (() => {
-        const m = 2 ** 35 - 31;
-        const a = 185852;
-        let s = Math.abs(validSeed) % m;
-        if (s === 0) s = 1; // Prevent seed of exactly 0
-        return () => {
-            s = (s * a) % m;
-            const result = s / m;
-            return result === 0 ? 0.0001 : result; // BUG #74 FIX: Never return exact 0
-        };
-    })();
+    // Every player generates the same board from the room seed (see generateMines)
+    state.boardSeed = validSeed;
 
     resetGame();
     updateTurnIndicator();
@@ -1896,6 +1888,52 @@ function resetGame() {
     updateTurnIndicator();
 }
 
+// mulberry32 PRNG returning uint32s - must stay identical to server/board_generator.py
+function mulberry32(seed) {
+    let a = seed >>> 0;
+    return () => {
+        a = (a + 0x6D2B79F5) >>> 0;
+        let t = a;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return (t ^ (t >>> 14)) >>> 0;
+    };
+}
+
+// Mine positions as flat indices row * cols + col, port of server/board_generator.generate_mines
+// Partial Fisher-Yates over the cells outside the safe zone: no retries, same board on every client
+function generateMines(seed, rows, cols, mineCount, firstRow, firstCol, safeRadius) {
+    const excluded = [];
+    if (safeRadius >= 0) {
+        for (let r = Math.max(firstRow - safeRadius, 0); r < Math.min(firstRow + safeRadius + 1, rows); r++) {
+            for (let c = Math.max(firstCol - safeRadius, 0); c < Math.min(firstCol + safeRadius + 1, cols); c++) {
+                excluded.push(r * cols + c);
+            }
+        }
+    }
+    const available = rows * cols - excluded.length;
+    if (mineCount > available) {
+        throw new Error(`Cannot place ${mineCount} mines in ${available} available cells`);
+    }
+
+    const nextU32 = mulberry32(seed);
+    const swaps = new Map();
+    const mines = [];
+    for (let i = 0; i < mineCount; i++) {
+        const j = i + Math.floor(nextU32() * (available - i) / 4294967296);
+        let picked = swaps.has(j) ? swaps.get(j) : j;
+        swaps.set(j, swaps.has(i) ? swaps.get(i) : i);
+
+        // picked is a rank among the allowed cells, step over the excluded ones
+        for (const cell of excluded) {
+            if (cell > picked) break;
+            picked++;
+        }
+        mines.push(picked);
+    }
+    return mines;
+}
+
 function placeMines(excludeRow, excludeCol) {
     // CRITICAL FIX: Prevent double mine placement
     if (state.minesPlaced) {
@@ -1903,46 +1941,33 @@ function placeMines(excludeRow, excludeCol) {
         return;
     }
 
-    let minesPlaced = 0;
-    const excludeCells = new Set();
-
     // SURVIVAL MODE: After level 20, disable safe first click (pure luck mode)
     const disableSafeFirstClick = state.gameMode === 'survival' && state.survivalLevel > 20;
 
-    if (!disableSafeFirstClick) {
-        // Larger exclusion zone (5x5) to ensure first click always flood fills
-        // This guarantees the clicked cell and its neighbors have 0 adjacent mines
-        for (let dr = -2; dr <= 2; dr++) {
-            for (let dc = -2; dc <= 2; dc++) {
-                const r = excludeRow + dr;
-                const c = excludeCol + dc;
-                if (r >= 0 && r < state.difficulty.rows && c >= 0 && c < state.difficulty.cols) {
-                    excludeCells.add(`${r},${c}`);
-                }
-            }
-        }
-    }
-
-    // Use seeded random for multiplayer, Math.random for solo
-    const getRandom = state.mode === 'multiplayer' && state.seededRandom ? state.seededRandom : Math.random;
+    // Larger exclusion zone (5x5) to ensure first click always flood fills
+    // This guarantees the clicked cell and its neighbors have 0 adjacent mines
+    const safeRadius = disableSafeFirstClick ? -1 : 2;
 
     // BUG #288 FIX: Prevent infinite loop if not enough cells available
     const totalCells = state.difficulty.rows * state.difficulty.cols;
-    const availableCells = totalCells - excludeCells.size;
+    const excludedRows = Math.min(excludeRow + safeRadius + 1, state.difficulty.rows) - Math.max(excludeRow - safeRadius, 0);
+    const excludedCols = Math.min(excludeCol + safeRadius + 1, state.difficulty.cols) - Math.max(excludeCol - safeRadius, 0);
+    const availableCells = totalCells - (disableSafeFirstClick ? 0 : excludedRows * excludedCols);
     if (state.difficulty.mines > availableCells) {
         console.error(`Cannot place ${state.difficulty.mines} mines in ${availableCells} available cells`);
         // Cap mines to available cells
         state.difficulty.mines = Math.max(1, availableCells - 1);
     }
 
-    while (minesPlaced < state.difficulty.mines) {
-        const row = Math.floor(getRandom() * state.difficulty.rows);
-        const col = Math.floor(getRandom() * state.difficulty.cols);
+    // Room seed for multiplayer (offset per survival level so levels differ), random seed for solo
+    const seed = state.mode === 'multiplayer' && state.boardSeed
+        ? state.boardSeed + state.survivalLevel - 1
+        : Math.floor(Math.random() * 4294967296);
 
-        if (!state.board[row][col].isMine && !excludeCells.has(`${row},${col}`)) {
-            state.board[row][col].isMine = true;
-            minesPlaced++;
-        }
+    const mines = generateMines(seed, state.difficulty.rows, state.difficulty.cols, state.difficulty.mines,
+                                excludeRow, excludeCol, safeRadius);
+    for (const i of mines) {
+        state.board[Math.floor(i / state.difficulty.cols)][i % state.difficulty.cols].isMine = true;
     }
 
     // Calculate adjacent mines
@@ -2151,9 +2176,11 @@ function revealCell(row, col, isUserClick = true) {
         }
     }
 
-    // Send action to server if multiplayer
-    if (state.mode === 'multiplayer' && state.gameStarted) {
-        state.socket.emit('game_action', { action: 'reveal', row, col, clicks: state.tilesClicked });
+    // In multiplayer, cells opened by a flood ride along with the reveal that started it
+    const online = state.mode === 'multiplayer' && state.gameStarted;
+    const batch = state.revealBatch;
+    if (online && batch) {
+        batch.push(row * state.difficulty.cols + col);
     }
 
     // Update stats display
@@ -2161,6 +2188,9 @@ function revealCell(row, col, isUserClick = true) {
 
     // Flood fill if no adjacent mines (not in Luck Mode)
     if (state.gameMode !== 'luck' && cell.adjacentMines === 0) {
+        if (online && !batch) {
+            state.revealBatch = [];
+        }
         for (let dr = -1; dr <= 1; dr++) {
             for (let dc = -1; dc <= 1; dc++) {
                 if (dr === 0 && dc === 0) continue;
@@ -2169,6 +2199,17 @@ function revealCell(row, col, isUserClick = true) {
         }
     }
 
+    // Send action to server if multiplayer: one message per reveal, however much it opened
+    if (online && !batch) {
+        const cells = state.revealBatch;
+        state.revealBatch = null;
+        if (cells && cells.length > 0) {
+            state.socket.emit('game_action', { action: 'reveal_batch', row, col, cells, clicks: state.tilesClicked });
+        } else {
+            state.socket.emit('game_action', { action: 'reveal', row, col, clicks: state.tilesClicked });
+        }
+    }
+
     checkWin();
 
     // Speed Chess: Switch turn after each successful click
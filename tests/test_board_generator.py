@@ -0,0 +1,124 @@
+"""
+Test the deterministic board generator shared by server and clients
+"""
+
+import pytest
+
+from server.board_generator import (check_cells, generate_board, generate_mines, mulberry32, pack_cells, safe_zone,
+                                    unpack_cells)
+
+# Reference vectors: server/web/game.js must produce exactly these
+REFERENCE_MINES = [
+    ((1, 9, 9, 10, (4, 4), 2), [55, 1, 45, 79, 3, 19, 61, 67, 43, 80]),
+    ((123456, 16, 30, 99, (0, 29), 2), [
+        189, 384, 478, 83, 110, 122, 235, 298, 162, 321, 161, 103, 190, 412, 391, 462, 422, 400, 143, 85,
+        2, 201, 403, 266, 477, 149, 430, 238, 175, 12, 286, 206, 234, 144, 407, 118, 86, 215, 274, 163,
+        80, 319, 61, 192, 53, 195, 168, 186, 436, 30, 343, 311, 337, 281, 23, 42, 306, 78, 121, 150,
+        44, 64, 336, 208, 255, 188, 185, 227, 224, 196, 197, 385, 199, 219, 47, 428, 359, 258, 269, 182,
+        397, 226, 463, 455, 69, 426, 405, 271, 76, 314, 411, 213, 415, 90, 365, 479, 376, 19, 176]),
+    ((4294967295, 16, 16, 40, (7, 7), -1), [
+        229, 49, 183, 241, 216, 140, 176, 125, 41, 253, 224, 57, 95, 192, 129, 197, 235, 8, 52, 111,
+        237, 238, 207, 221, 50, 46, 144, 90, 98, 33, 132, 88, 147, 14, 80, 122, 154, 169, 70, 96]),
+]
+
+
+class TestMulberry32:
+    """Test the PRNG"""
+
+    def test_reference_output(self):
+        """Test the first outputs match the JavaScript implementation"""
+        next_u32 = mulberry32(1)
+        assert [next_u32() for _ in range(3)] == [2693262067, 11749833, 2265367787]
+
+    def test_range(self):
+        """Test outputs are unsigned 32-bit values"""
+        next_u32 = mulberry32(-5)
+        assert all(0 <= next_u32() < 2 ** 32 for _ in range(1000))
+
+
+class TestGenerateMines:
+    """Test mine placement"""
+
+    @pytest.mark.parametrize('args, expected', REFERENCE_MINES)
+    def test_reference_vectors(self, args, expected):
+        """Test the canonical boards every client has to reproduce"""
+        seed, rows, cols, mines, first_click, radius = args
+        assert generate_mines(seed, rows, cols, mines, first_click, radius) == expected
+
+    def test_distinct_and_outside_safe_zone(self):
+        """Test mines are distinct, in range and never in the safe zone"""
+        for seed in range(200):
+            first_click = (seed % 16, seed * 7 % 30)
+            mines = generate_mines(seed, 16, 30, 99, first_click)
+            assert len(set(mines)) == 99
+            assert all(0 <= i < 16 * 30 for i in mines)
+            assert not set(mines) & set(safe_zone(16, 30, first_click))
+
+    def test_fills_every_allowed_cell(self):
+        """Test asking for every allowed cell returns exactly those cells"""
+        mines = generate_mines(7, 9, 9, 81 - 25, (4, 4))
+        assert sorted(mines) == sorted(set(range(81)) - set(safe_zone(9, 9, (4, 4))))
+
+    def test_too_many_mines(self):
+        """Test an impossible mine count is rejected"""
+        with pytest.raises(ValueError):
+            generate_mines(1, 9, 9, 81 - 25 + 1, (4, 4))
+
+    def test_every_cell_reachable(self):
+        """Test each allowed cell gets a mine with roughly equal frequency"""
+        counts = [0] * 25
+        for seed in range(5000):
+            for i in generate_mines(seed, 5, 5, 5, (0, 0), 0):
+                counts[i] += 1
+        assert counts[0] == 0
+        assert all(800 < c < 1280 for c in counts[1:])  # expected 5000 * 5 / 24 ~ 1042
+
+
+class TestGenerateBoard:
+    """Test full board values"""
+
+    def test_numbers(self):
+        """Test every number counts its neighbouring mines"""
+        board = generate_board(99, 16, 16, 40, (8, 8))
+        mines = {divmod(i, 16) for i in generate_mines(99, 16, 16, 40, (8, 8))}
+        for r in range(16):
+            for c in range(16):
+                if (r, c) in mines:
+                    assert board[r][c] == -1
+                else:
+                    expected = sum((r + dr, c + dc) in mines for dr in (-1, 0, 1) for dc in (-1, 0, 1))
+                    assert board[r][c] == expected
+        assert board[8][8] == 0
+
+
+class TestCells:
+    """Test the flat cell lists of reveal_batch messages"""
+
+    def test_round_trip(self):
+        """Test packing and unpacking cells keeps them and their order"""
+        cells = [(0, 0), (15, 29), (3, 7), (0, 29)]
+        assert pack_cells(cells, 30) == [0, 479, 97, 29]
+        assert unpack_cells(pack_cells(cells, 30), 30) == cells
+
+    def test_check(self):
+        """Test only lists of distinct in-range ints pass"""
+        assert check_cells([0, 5, 80], 81) == [0, 5, 80]
+        assert check_cells([], 81) == []
+        for bad in ([81], [-1], [1, 1], [1.0], [True], ['1'], None, '123', {1: 2}, list(range(82))):
+            with pytest.raises(ValueError):
+                check_cells(bad, 81)
+
+
+class TestLayout:
+    """Test the generator imports both ways it is used"""
+
+    def test_imports_standalone(self):
+        """Test the module loads on its own, as the server deployed from server/ imports it"""
+        import importlib.util
+        import pathlib
+
+        path = pathlib.Path(__file__).parent.parent / 'server' / 'board_generator.py'
+        spec = importlib.util.spec_from_file_location('board_generator', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        assert module.generate_mines(1, 9, 9, 10, (4, 4)) == generate_mines(1, 9, 9, 10, (4, 4))
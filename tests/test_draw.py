@@ -0,0 +1,197 @@
+"""
+Test draw.py only redraws what changed, driven without a window
+"""
+
+import os
+import pathlib
+import random
+
+import pytest
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+
+import draw  # noqa: E402
+import draw_atlas  # noqa: E402
+import field  # noqa: E402
+
+
+def open_screen(monkeypatch, width, height, mine_count):
+    """A game on the dummy display with its first frame drawn"""
+    monkeypatch.chdir(pathlib.Path(__file__).parent.parent)  # assets are loaded relative to the repo
+    monkeypatch.setattr(draw, '_screen', None)  # the dummy driver cannot resize a window, open a new one
+    monkeypatch.setattr(draw, '_zoom', 1)
+    monkeypatch.setattr(draw, '_camera', [0, 0])
+    pygame.init()
+    draw.load_assets()
+    random.seed(3)
+    field.start_game(width, height, mine_count)
+    draw.set_screen(width, height)
+    assert draw.draw_screen() == [draw._screen.get_rect()]
+    return draw._screen
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """A 30x16 game"""
+    yield open_screen(monkeypatch, 30, 16, 99)
+    field.unsubscribe(draw._cells_changed)
+    pygame.display.quit()
+
+
+@pytest.fixture
+def big_screen(monkeypatch):
+    """A 64x64 game zoomed in twice, far bigger than the dummy display's 1024x768 desktop"""
+    screen = open_screen(monkeypatch, 64, 64, 600)
+    draw.zoom(1)
+    draw.scroll(-10 ** 6, -10 ** 6)
+    draw.draw_screen()
+    yield screen
+    field.unsubscribe(draw._cells_changed)
+    pygame.display.quit()
+
+
+def pixels(surface, fmt='RGB'):
+    return pygame.image.tobytes(surface, fmt)
+
+
+def matches_full_redraw(screen):
+    """Test the incrementally drawn screen is what drawing everything gives"""
+    drawn = pixels(screen)
+    draw.invalidate()
+    draw.draw_screen()
+    return drawn == pixels(screen)
+
+
+class TestDirtyRectangles:
+    """Test frames redraw only the changed cells and header"""
+
+    def test_idle_frame_draws_nothing(self, screen):
+        """Test a frame where nothing changed updates no area"""
+        assert draw.draw_screen() == []
+
+    def test_flag_redraws_cell_and_header(self, screen):
+        """Test flagging a cell updates that cell and the mine count"""
+        field.flag_cell(5, 5)
+        rects = draw.draw_screen()
+        assert rects[0] == pygame.Rect(5 * 16 + 4, 5 * 16 + 40, 16, 16)
+        assert rects[1].top == 0 and len(rects) == 2
+        assert matches_full_redraw(screen)
+
+    def test_preview_and_hint(self, screen):
+        """Test the pressed cells and the hint highlight are redrawn when they come and go"""
+        field.cell_up(15, 8)
+        draw.draw_screen()
+        x, y = next((x, y) for x in range(30) for y in range(16)
+                    if field.get_cell_state(x, y)[0] > 0 and field.get_cell_state(x, y)[1] == 1
+                    and field.hidden_neighbors(x, y))
+        field.set_preview(x, y)
+        assert len(draw.draw_screen()) > 1
+        assert matches_full_redraw(screen)
+        field.clear_preview()
+        assert draw.draw_screen()
+        assert matches_full_redraw(screen)
+
+        field.get_session()._hint_cell = next((x, y) for x in range(30) for y in range(16)
+                                              if field.get_cell_state(x, y)[1] == 0)
+        assert draw.draw_screen()
+        assert matches_full_redraw(screen)
+
+    def test_moves_and_undo(self, screen):
+        """Test a game played and taken back frame by frame always matches a full redraw"""
+        field.cell_up(15, 8)
+        draw.draw_screen()
+        for x, y in [(0, 0), (29, 15), (3, 12), (20, 2)]:
+            if field.get_cell_state(x, y)[0] < 0:
+                field.flag_cell(x, y)
+            else:
+                field.cell_up(x, y)
+            draw.draw_screen()
+            assert matches_full_redraw(screen)
+        while field.can_undo():
+            field.undo()
+            draw.draw_screen()
+            assert matches_full_redraw(screen)
+
+    def test_new_game_repaints(self, screen):
+        """Test starting another game of the same size repaints the whole field"""
+        field.cell_up(15, 8)
+        draw.draw_screen()
+        field.start_game(30, 16, 99)
+        assert draw.draw_screen() == [screen.get_rect()]
+        assert matches_full_redraw(screen)
+
+
+class TestAtlas:
+    """Test the sprite atlas"""
+
+    def test_atlas_is_up_to_date(self, monkeypatch):
+        """Test the saved atlas holds every sprite exactly as its own png has it"""
+        monkeypatch.chdir(pathlib.Path(__file__).parent.parent)
+        atlas, rects = draw_atlas.load()
+        names = sorted(path.stem for path in pathlib.Path('assets').glob('*.png') if path.name != draw_atlas.ATLAS_IMAGE)
+        assert sorted(rects) == names
+        for name, sprite in draw_atlas.sprites(atlas, rects).items():
+            assert pixels(sprite, 'RGBA') == pixels(pygame.image.load(f'assets/{name}.png'), 'RGBA')
+
+    def test_pack(self):
+        """Test packed sprites stay inside the atlas and never overlap"""
+        images = {f'{w}x{h}': pygame.Surface((w, h)) for w, h in [(52, 40), (16, 16), (200, 10), (10, 18), (4, 4)]}
+        atlas, rects = draw_atlas.pack(images, width=64)
+        assert atlas.get_width() == 200
+        for name, rect in rects.items():
+            assert rect.size == images[name].get_size()
+            assert atlas.get_rect().contains(rect)
+            assert rect.collidelist([other for other in rects.values() if other is not rect]) == -1
+
+
+class TestCamera:
+    """Test the view of boards bigger than the window"""
+
+    def test_window_fits_desktop(self, big_screen):
+        """Test the window is capped to the desktop and only the tiles in view are drawn"""
+        view_w, view_h = draw._field.get_size()
+        assert big_screen.get_width() <= 1024 and big_screen.get_height() <= 768
+        columns, rows = draw._visible_cells()
+        assert len(columns) == -(-view_w // 32) and len(rows) == -(-view_h // 32)
+        draw.scroll(16, 16)  # half a tile: one more row and column peek in
+        columns, rows = draw._visible_cells()
+        assert len(columns) == view_w // 32 + 1 and len(rows) == view_h // 32 + 1
+
+    def test_cell_at(self, big_screen):
+        """Test window positions map to cells through the camera and zoom"""
+        assert draw.cell_at(4, 40) == (0, 0)
+        assert draw.cell_at(4 + 33, 40 + 65) == (1, 2)
+        draw.scroll(64, 32)
+        assert draw.cell_at(4, 40) == (2, 1)
+        assert draw.cell_at(0, 0) is None
+        draw.scroll(10 ** 6, 10 ** 6)
+        view_w, view_h = draw._field.get_size()
+        assert draw.cell_at(4 + view_w - 1, 40 + view_h - 1) == (63, 63)
+
+    def test_zoom_keeps_anchor(self, big_screen):
+        """Test zooming keeps the cell under the mouse under the mouse, short of the board's edges"""
+        draw.scroll(400, 400)
+        anchor = (300, 200)
+        cell = draw.cell_at(*anchor)
+        draw.zoom(1, anchor)
+        assert draw.get_zoom() == 3 and draw.cell_at(*anchor) == cell
+        draw.zoom(-1, anchor)
+        assert draw.get_zoom() == 2 and draw.cell_at(*anchor) == cell
+        draw.zoom(-5, anchor)
+        # at zoom 1 the board is barely wider than the view, the camera stops at its right edge
+        assert draw.get_zoom() == 1 and draw._camera[0] == 1024 - draw._field.get_width()
+        assert draw.cell_at(*anchor)[1] == cell[1]
+
+    def test_scrolled_frames_match_full_redraw(self, big_screen):
+        """Test scrolling repaints the view and cell changes land where the camera puts them"""
+        draw.scroll(500, 700)
+        assert draw.draw_screen()[0] == draw._view_rect()
+        x, y = draw.cell_at(400, 300)
+        field.flag_cell(x, y)
+        field.flag_cell(0, 0)  # out of view, nothing to draw
+        rects = draw.draw_screen()
+        assert len(rects) == 2 and rects[0].collidepoint(400, 300)
+        assert matches_full_redraw(big_screen)
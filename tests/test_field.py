@@ -0,0 +1,814 @@
+"""
+Test field.py game engine
+"""
+
+import importlib
+import itertools
+import random
+import sys
+
+import pytest
+
+import field
+import field_chunks
+import field_solver
+import field_topology
+from server import board_generator
+
+
+def snapshot():
+    """Full (content, state) grid of the current game"""
+    return [[field.get_cell_state(x, y) for y in range(field.get_field_height())]
+            for x in range(field.get_field_width())]
+
+
+def play_game(engine, seed, width=16, height=16, mines=40):
+    """Start a seeded game and click through it until it ends"""
+    random.seed(seed)
+    field.start_game(width, height, mines, engine=engine)
+    rng = random.Random(seed)
+    field.cell_up(width // 2, height // 2)
+    for _ in range(200):
+        if field.game_over() or field.game_won():
+            break
+        x, y = rng.randrange(width), rng.randrange(height)
+        if rng.random() < 0.2:
+            field.flag_cell(x, y)
+        else:
+            field.cell_up(x, y)
+    return snapshot()
+
+
+class TestStartGame:
+    """Test board creation"""
+
+    def test_mine_count_and_numbers(self):
+        """Test every number matches its neighbouring mines"""
+        field.start_game(16, 16, 40)
+        grid = snapshot()
+        mines = {(x, y) for x in range(16) for y in range(16) if grid[x][y][0] == -1}
+        assert len(mines) == 40
+
+        for x in range(16):
+            for y in range(16):
+                if (x, y) in mines:
+                    continue
+                expected = sum((i, j) in mines for i, j in field.iter_neighbors(x, y))
+                assert grid[x][y] == (expected, 0)
+
+    def test_invalid_sizes(self):
+        """Test size and mine count limits"""
+        with pytest.raises(ValueError):
+            field.start_game(4, 10, 5)
+        with pytest.raises(ValueError):
+            field.start_game(field.MAX_FIELD_SIZE + 1, 10, 5)
+        with pytest.raises(ValueError):
+            field.start_game(10, 10, 51)
+        with pytest.raises(ValueError):
+            field.start_game(10, 10, 5, engine='nope')
+
+    def test_oversize_builds_no_board(self, monkeypatch):
+        """Test a board too big for its engine is refused before any of it is allocated"""
+        def build(*args):
+            raise AssertionError('board built')
+        monkeypatch.setattr(field.CellBoard, '__init__', build)
+        with pytest.raises(ValueError, match='too big'):
+            field.start_game(1500, 1500, 10)
+
+
+class TestGamePlay:
+    """Test reveal, flag and end of game"""
+
+    def test_first_click_is_safe(self):
+        """Test the first revealed cell is never a mine"""
+        for seed in range(20):
+            random.seed(seed)
+            field.start_game(5, 5, 12)
+            field.cell_up(2, 2)
+            assert not field.game_over()
+            assert field.get_cell_state(2, 2)[1] == 1
+
+    def test_flag_toggle(self):
+        """Test flagging and unflagging updates mines left"""
+        field.start_game(9, 9, 10)
+        field.flag_cell(0, 0)
+        assert field.get_cell_state(0, 0)[1] == 2
+        assert field.get_mines_left() == 9
+        field.flag_cell(0, 0)
+        assert field.get_cell_state(0, 0)[1] == 0
+        assert field.get_mines_left() == 10
+
+    def test_game_over_reveal(self):
+        """Test hitting a mine reveals mines and marks false flags"""
+        random.seed(3)
+        field.start_game(9, 9, 10)
+        field.cell_up(4, 4)
+        grid = snapshot()
+        mine = next((x, y) for x in range(9) for y in range(9) if grid[x][y] == (-1, 0))
+        safe = next((x, y) for x in range(9) for y in range(9) if grid[x][y][0] >= 0 and grid[x][y][1] == 0)
+        field.flag_cell(*safe)
+        field.cell_up(*mine)
+
+        assert field.game_over()
+        assert field.get_cell_state(*mine) == (-2, 1)
+        assert field.get_cell_state(*safe)[1] == 3
+        for x in range(9):
+            for y in range(9):
+                content, state = field.get_cell_state(x, y)
+                if content == -1:
+                    assert state == 1
+
+    def test_victory(self):
+        """Test revealing every safe cell wins and flags all mines"""
+        random.seed(5)
+        field.start_game(9, 9, 10)
+        field.cell_up(0, 0)
+        for x in range(9):
+            for y in range(9):
+                if field.get_cell_state(x, y)[0] >= 0:
+                    field.cell_up(x, y)
+
+        assert field.game_won()
+        assert field.get_mines_left() == 0
+        for x in range(9):
+            for y in range(9):
+                content, state = field.get_cell_state(x, y)
+                assert state == (2 if content == -1 else 1)
+
+
+def flood(grid, x, y):
+    """Reference flood fill: cells revealed by clicking (x, y), found by plain BFS"""
+    w, h = len(grid), len(grid[0])
+    region, to_visit = set(), [(x, y)]
+    while to_visit:
+        x, y = to_visit.pop()
+        if not (0 <= x < w and 0 <= y < h) or (x, y) in region:
+            continue
+        region.add((x, y))
+        if grid[x][y][0] == 0:
+            to_visit.extend((x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+    return region
+
+
+class TestOpenings:
+    """Test precomputed openings and 3BV"""
+
+    def test_reveal_matches_flood_fill(self):
+        """Test clicking a zero reveals exactly its flood-fill region"""
+        for seed in range(20):
+            random.seed(seed)
+            field.start_game(16, 16, 30)
+            grid = snapshot()
+            zero = next(((x, y) for x in range(16) for y in range(16) if grid[x][y][0] == 0), None)
+            if zero is None:
+                continue
+            changed = {(x, y) for x, y, _, _ in field.cell_up(*zero)}
+            assert changed == flood(grid, *zero)
+
+    def test_3bv(self):
+        """Test 3BV counts openings plus isolated numbers"""
+        for seed in range(20):
+            random.seed(seed)
+            field.start_game(16, 16, 40)
+            grid = snapshot()
+            covered, openings = set(), 0
+            for x in range(16):
+                for y in range(16):
+                    if grid[x][y][0] == 0 and (x, y) not in covered:
+                        openings += 1
+                        covered |= flood(grid, x, y)
+            isolated = sum(1 for x in range(16) for y in range(16) if grid[x][y][0] > 0 and (x, y) not in covered)
+            assert field.get_3bv() == openings + isolated
+
+    def test_relabel_after_first_click_mine(self):
+        """Test openings follow the board when the first click moves a mine"""
+        for seed in range(50):
+            random.seed(seed)
+            field.start_game(8, 8, 20)
+            grid = snapshot()
+            mine = next((x, y) for x in range(8) for y in range(8) if grid[x][y][0] == -1)
+            field.cell_up(*mine)
+            grid = snapshot()
+            revealed = {(x, y) for x in range(8) for y in range(8) if grid[x][y][1] == 1}
+            if field.game_won():
+                continue
+            expected = flood(grid, *mine) if grid[mine[0]][mine[1]][0] == 0 else {mine}
+            assert revealed == expected
+
+
+class TestSolver:
+    """Test the incremental hint solver"""
+
+    def play_correctly(self, seed, steps=60):
+        """Play with flags only on real mines, stopping before the game ends"""
+        random.seed(seed)
+        field.start_game(16, 16, 40)
+        rng = random.Random(seed)
+        field.cell_up(8, 8)
+        for _ in range(steps):
+            x, y = rng.randrange(16), rng.randrange(16)
+            content, state = field.get_cell_state(x, y)
+            if content == -1:
+                field.flag_cell(x, y)
+            elif state == 0:
+                field.cell_up(x, y)
+
+    def test_deductions_are_correct(self):
+        """Test every deduced cell really is safe or a mine"""
+        for seed in range(20):
+            self.play_correctly(seed)
+            for x, y in field.get_session().solver.safe:
+                content, state = field.get_cell_state(x, y)
+                assert content >= 0 and state == 0
+            for x, y in field.get_session().solver.mines:
+                assert field.get_cell_state(x, y)[0] == -1
+
+    def test_incremental_matches_fresh_solve(self):
+        """Test incremental updates reach the same deductions as solving from scratch"""
+        for seed in range(20):
+            self.play_correctly(seed)
+            fresh = field_solver.Solver(field.iter_neighbors)
+            fresh.update([(x, y, *field.get_cell_state(x, y)) for x in range(16) for y in range(16)])
+            assert set(fresh.safe) == set(field.get_session().solver.safe)
+            assert set(fresh.mines) == set(field.get_session().solver.mines)
+
+    def test_subset_rule(self):
+        """Test the 1-2-1 pattern, which needs more than the single-number rule"""
+        solver = field_solver.Solver(lambda x, y: [(i, j) for i in range(x - 1, x + 2) for j in range(y - 1, y + 2)
+                                                   if (i, j) != (x, y) and 0 <= i < 5 and 0 <= j < 2])
+        solver.update([(x, 0, 1 if x != 2 else 2, 1) for x in range(1, 4)] + [(0, 0, 0, 1), (4, 0, 0, 1)])
+        assert set(solver.mines) == {(1, 1), (3, 1)}
+        assert set(solver.safe) == {(2, 1), (0, 1), (4, 1)}
+        assert 'safe' in solver.explain(2, 1)
+        assert solver.explain(0, 0) is None
+
+    def test_unflag_redoes_deductions(self):
+        """Test removing a wrong flag replaces what was deduced from it"""
+        solver = field_solver.Solver(lambda x, y: [(i, j) for i in range(x - 1, x + 2) for j in range(y - 1, y + 2)
+                                                   if (i, j) != (x, y) and 0 <= i < 3 and 0 <= j < 2])
+        solver.update([(0, 0, 1, 1), (1, 0, 1, 1), (2, 0, 1, 1), (0, 1, 0, 2)])
+        assert set(solver.safe) == {(1, 1), (2, 1)}
+        solver.update([(0, 1, 0, 0)])
+        assert set(solver.safe) == {(0, 1), (2, 1)}
+        assert set(solver.mines) == {(1, 1)}
+
+
+class TestMineProbabilities:
+    """Test exact mine probabilities"""
+
+    def brute_force(self):
+        """Probabilities from every mine layout consistent with the visible board"""
+        w, h = field.get_field_width(), field.get_field_height()
+        grid = snapshot()
+        hidden = [(x, y) for x in range(w) for y in range(h) if grid[x][y][1] == 0]
+        flags = {(x, y) for x in range(w) for y in range(h) if grid[x][y][1] == 2}
+        numbers = [(grid[x][y][0], list(field.iter_neighbors(x, y)))
+                   for x in range(w) for y in range(h) if grid[x][y][1] == 1]
+        hits, total = {pos: 0 for pos in hidden}, 0
+        for layout in itertools.combinations(hidden, field.get_mines_left()):
+            mines = flags | set(layout)
+            if all(number == sum(n in mines for n in around) for number, around in numbers):
+                total += 1
+                for pos in layout:
+                    hits[pos] += 1
+        return {pos: hits[pos] / total for pos in hidden}
+
+    def test_matches_brute_force(self):
+        """Test against enumerating every layout of a small board"""
+        checked = 0
+        for seed in range(20):
+            random.seed(seed)
+            field.start_game(5, 5, 5)
+            field.cell_up(0, 0)
+            if field.game_over() or field.game_won():
+                continue
+            expected = self.brute_force()
+            actual = field.mine_probabilities()
+            assert actual.keys() == expected.keys()
+            for pos in expected:
+                assert actual[pos] == pytest.approx(expected[pos])
+            checked += 1
+        assert checked > 5
+
+    def test_expert_board_is_fast(self):
+        """Test a mid-game expert board is solved by components, not brute force"""
+        random.seed(7)
+        field.start_game(30, 16, 99)
+        field.cell_up(15, 8)
+        for _ in range(10):
+            hint = field.find_safe_hint()
+            if hint is None:
+                break
+            field.cell_up(*hint)
+        probabilities = field.mine_probabilities()
+        assert sum(probabilities.values()) == pytest.approx(field.get_mines_left())
+
+
+class TestChangeSets:
+    """Test mutating calls report exactly the cells they changed"""
+
+    @pytest.mark.parametrize('engine', field.ENGINES)
+    def test_changes_replay_to_same_board(self, engine):
+        """Test applying change sets to a copy reproduces the board states"""
+        if engine == 'numpy':
+            pytest.importorskip('numpy')
+        for seed in range(10):
+            random.seed(seed)
+            field.start_game(16, 16, 40, engine=engine)
+            mirror = {(x, y): field.get_cell_state(x, y) for x in range(16) for y in range(16)}
+            rng = random.Random(seed)
+            while not (field.game_over() or field.game_won()):
+                x, y = rng.randrange(16), rng.randrange(16)
+                before = dict(mirror)
+                action = field.flag_cell if rng.random() < 0.2 else field.cell_up
+                for cx, cy, content, state in action(x, y):
+                    assert (content, state) == field.get_cell_state(cx, cy)
+                    assert (content, state) != before[cx, cy]
+                    mirror[cx, cy] = content, state
+                assert mirror == {pos: field.get_cell_state(*pos) for pos in mirror}
+
+    def test_subscriber(self):
+        """Test subscribers receive each non-empty change set once"""
+        received = []
+        field.subscribe(received.append)
+        try:
+            field.start_game(9, 9, 10)
+            changes = field.cell_up(4, 4)
+            assert field.cell_up(4, 4) == []  # already revealed, nothing changes
+        finally:
+            field.unsubscribe(received.append)
+
+        assert received == [changes]
+        field.flag_cell(0, 0)
+        assert len(received) == 1
+
+
+class TestNeighborCounts:
+    """Test the incrementally kept neighbour counts"""
+
+    @pytest.mark.parametrize('engine', ['list', 'bits', 'chunks'])
+    def test_counts_match_board(self, engine):
+        """Test flagged and hidden neighbour counts match a recount after every move"""
+        for seed in range(5):
+            random.seed(seed)
+            field.start_game(12, 10, 20, engine=engine)
+            rng = random.Random(seed)
+            while not (field.game_over() or field.game_won()):
+                x, y = rng.randrange(12), rng.randrange(10)
+                (field.flag_cell if rng.random() < 0.3 else field.cell_up)(x, y)
+                if field.game_over():
+                    break
+                for i in range(12):
+                    for j in range(10):
+                        states = [field.get_cell_state(*n)[1] for n in field.iter_neighbors(i, j)]
+                        assert field.flagged_neighbors(i, j) == states.count(2)
+                        assert field.hidden_neighbors(i, j) == states.count(0)
+
+
+class TestTopology:
+    """Test neighbour tables and the torus and hex variants"""
+
+    @pytest.mark.parametrize('topology', field_topology.TOPOLOGIES)
+    def test_table_is_symmetric(self, topology):
+        """Test every neighbour relation goes both ways and has the expected degree"""
+        offsets, indices = field_topology.neighbor_table(7, 6, topology)
+        assert len(offsets) == 7 * 6 + 1
+        for i in range(7 * 6):
+            around = indices[offsets[i]:offsets[i + 1]]
+            assert i not in around and len(set(around)) == len(around)
+            for j in around:
+                assert i in indices[offsets[j]:offsets[j + 1]]
+        degrees = {offsets[i + 1] - offsets[i] for i in range(7 * 6)}
+        assert max(degrees) == (6 if topology == 'hex' else 8)
+        if topology == 'torus':
+            assert degrees == {8}
+
+    def test_table_is_cached(self):
+        """Test a board size is only tabulated once, and the shared table cannot be changed"""
+        offsets, indices = field_topology.neighbor_table(9, 9, 'torus')
+        assert field_topology.neighbor_table(9, 9, 'torus')[1] is indices
+        with pytest.raises(TypeError):
+            indices[0] = 1
+
+    def test_only_list_engine_tabulates(self):
+        """Test engines limited to the square topology never build a table"""
+        field_topology.neighbor_table.cache_clear()
+        field.start_game(200, 200, 4000, engine='bits')
+        field.cell_up(100, 100)
+        assert field_topology.neighbor_table.cache_info().currsize == 0
+
+    @pytest.mark.parametrize('topology', ['torus', 'hex'])
+    def test_numbers_follow_topology(self, topology):
+        """Test numbers count mines over the topology's neighbours and openings flood over it"""
+        for seed in range(10):
+            random.seed(seed)
+            field.start_game(12, 9, 20, topology=topology)
+            grid = snapshot()
+            for x in range(12):
+                for y in range(9):
+                    if grid[x][y][0] >= 0:
+                        expected = sum(grid[i][j][0] == -1 for i, j in field.iter_neighbors(x, y))
+                        assert grid[x][y][0] == expected
+
+            zero = next(((x, y) for x in range(12) for y in range(9) if grid[x][y][0] == 0), None)
+            if zero is None:
+                continue
+            region, to_visit = set(), [zero]
+            while to_visit:
+                pos = to_visit.pop()
+                if pos not in region:
+                    region.add(pos)
+                    if grid[pos[0]][pos[1]][0] == 0:
+                        to_visit.extend(field.iter_neighbors(*pos))
+            assert {(x, y) for x, y, _, _ in field.cell_up(*zero)} == region
+
+    def test_square_only_engines(self):
+        """Test engines with built-in square stencils reject other topologies"""
+        with pytest.raises(ValueError):
+            field.start_game(9, 9, 10, engine='bits', topology='hex')
+        with pytest.raises(ValueError):
+            field.start_game(9, 9, 10, topology='triangle')
+
+
+class TestGameSession:
+    """Test independent game sessions"""
+
+    def test_sessions_are_independent(self):
+        """Test two sessions side by side do not share any state"""
+        a, b = field.GameSession(), field.GameSession()
+        a.start_game(9, 9, 10)
+        b.start_game(16, 12, 40, engine='bits')
+        received = []
+        b.subscribe(received.append)
+
+        a.cell_up(4, 4)
+        a.flag_cell(0, 0)
+        assert received == []
+        assert b.get_time() == 0 and b.get_mines_left() == 40
+        assert all(b.get_cell_state(x, y)[1] == 0 for x in range(16) for y in range(12))
+        assert b.cell_up(15, 11) == received[0]
+        assert (a.get_field_width(), b.get_field_width()) == (9, 16)
+
+    def test_module_functions_use_default_session(self):
+        """Test the module level API drives get_session()"""
+        field.start_game(9, 9, 10)
+        session = field.get_session()
+        field.cell_up(4, 4)
+        assert session.revealed_count > 0
+        assert snapshot() == [[session.get_cell_state(x, y) for y in range(9)] for x in range(9)]
+
+    def test_slots(self):
+        """Test sessions have no per-instance dict"""
+        with pytest.raises(AttributeError):
+            field.GameSession().unknown = 1
+
+
+class TestArrayEngine:
+    """Test the numpy engine behaves exactly like the list engine"""
+
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip('numpy')
+
+    def test_same_games(self):
+        """Test identical seeds give identical games on both engines"""
+        for seed in range(10):
+            assert play_game('numpy', seed) == play_game('list', seed)
+            assert field.get_engine() == 'list'
+
+    def test_openings_match_flood(self):
+        """Test the array engine's opening labels give the same 3BV and openings as the list engine's flood"""
+        for seed in range(20):
+            random.seed(seed)
+            field.start_game(30, 16, 60, engine='numpy')
+            session = field.get_session()
+            # the same board on the list engine, labelled by its flood
+            flooded = field.GameSession()
+            flooded.start_game(30, 16, 0)
+            for x in range(30):
+                for y in range(16):
+                    flooded.board.set_content(x, y, session.board.content(x, y))
+            flooded._label_openings()
+            assert session.get_3bv() == flooded.get_3bv()
+            assert session._mine_cells == flooded._mine_cells
+            for i in range(30 * 16):
+                if flooded._opening_of[i] >= 0:
+                    cells = session._openings[session._opening_of[i]]
+                    assert sorted(cells) == sorted(flooded._openings[flooded._opening_of[i]])
+
+    def test_large_board(self):
+        """Test the array engine accepts boards beyond the list engine limit"""
+        field.start_game(256, 256, 10000, engine='numpy')
+        assert field.get_engine() == 'numpy'
+        field.cell_up(0, 0)
+        assert not field.game_over()
+
+
+class TestBatchAnalysis:
+    """Test generating and analysing stacks of boards with numpy"""
+
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip('numpy')
+
+    def test_matches_generator(self):
+        """Test every board of a batch is the board the shared generator gives for its seed"""
+        import field_numpy
+        for first_click, radius in (((8, 15), 2), ((0, 0), 1), (None, 2)):
+            mines = field_numpy.batch_mines(range(30), 16, 30, 99, first_click, radius)
+            numbers = field_numpy.batch_numbers(mines)
+            for seed in range(30):
+                assert numbers[seed].tolist() == board_generator.generate_board(seed, 16, 30, 99, first_click, radius)
+
+    def test_openings_and_3bv(self):
+        """Test opening sizes and 3BV against a flood fill of every board"""
+        import field_numpy
+        numbers = field_numpy.batch_numbers(field_numpy.batch_mines(range(40), 12, 9, 15, (6, 4)))
+        labels, sizes, owners = field_numpy.batch_openings(numbers)
+        bbbv = field_numpy.batch_3bv(numbers)
+
+        for b in range(40):
+            grid = [[(int(v), 0) for v in row] for row in numbers[b]]
+            covered, regions = set(), []
+            for r in range(12):
+                for c in range(9):
+                    if grid[r][c][0] == 0 and (r, c) not in covered:
+                        region = flood(grid, r, c)
+                        covered |= region
+                        regions.append(region)
+                        assert sizes[labels[b, r, c]] == len(region)
+                        assert owners[labels[b, r, c]] == b
+            isolated = sum(1 for r in range(12) for c in range(9) if grid[r][c][0] > 0 and (r, c) not in covered)
+            assert bbbv[b] == len(regions) + isolated
+        assert len(sizes) == len(owners) == labels.max() + 1
+
+
+class TestSnapshots:
+    """Test saving and resuming games as binary snapshots"""
+
+    @pytest.mark.parametrize('engine, topology', [
+        ('list', 'square'), ('numpy', 'square'), ('bits', 'square'), ('list', 'hex')])
+    def test_round_trip(self, engine, topology):
+        """Test a resumed game has the same board, counters and hints and plays on identically"""
+        if engine == 'numpy':
+            pytest.importorskip('numpy')
+        for seed in range(5):
+            random.seed(seed)
+            field.start_game(20, 14, 40, engine=engine, topology=topology)
+            rng = random.Random(seed)
+            for _ in range(15):
+                x, y = rng.randrange(20), rng.randrange(14)
+                (field.flag_cell if rng.random() < 0.3 else field.cell_up)(x, y)
+
+            resumed = field.GameSession()
+            resumed.load(field.save(), engine=engine)
+            assert snapshot() == [[resumed.get_cell_state(x, y) for y in range(14)] for x in range(20)]
+            assert (resumed.game_over(), resumed.game_won()) == (field.game_over(), field.game_won())
+            assert resumed.get_mines_left() == field.get_mines_left()
+            assert resumed.get_3bv() == field.get_3bv()
+            for _ in range(15):
+                x, y = rng.randrange(20), rng.randrange(14)
+                assert resumed.cell_up(x, y) == field.cell_up(x, y)
+
+    def test_compact(self):
+        """Test a 64x64 board packs into half a byte per content plus two bits per state"""
+        field.start_game(64, 64, 600)
+        field.cell_up(32, 32)
+        assert len(field.save()) < 64 * 64 * 3 // 4 + 64
+
+    def test_without_numpy(self, monkeypatch):
+        """Test the list engine saves and loads with numpy missing"""
+        import field_snapshot
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+        importlib.reload(field_snapshot)
+        field.start_game(9, 9, 10)
+        field.cell_up(4, 4)
+        field.flag_cell(*next((x, y) for x in range(9) for y in range(9) if field.get_cell_state(x, y)[1] == 0))
+        resumed = field.GameSession()
+        resumed.load(field.save())
+        assert snapshot() == [[resumed.get_cell_state(x, y) for y in range(9)] for x in range(9)]
+
+    def test_oversize_load(self):
+        """Test a snapshot too big for the loading engine is refused"""
+        field.start_game(100, 100, 1000, engine='bits')
+        with pytest.raises(ValueError, match='too big'):
+            field.GameSession().load(field.save())
+
+    def test_rejects_bad_data(self):
+        """Test snapshots with a wrong magic, version, topology or length are refused"""
+        import field_snapshot
+        field.start_game(9, 9, 10)
+        data = field.save()
+        bad_topology = data[:5] + bytes([99]) + data[6:]
+        for bad in (b'XXXX' + data[4:], data[:4] + bytes([99]) + data[5:], bad_topology, data[:-1], data[:10]):
+            with pytest.raises(ValueError):
+                field_snapshot.unpack(bad)
+        with pytest.raises(ValueError, match='topology'):
+            field_snapshot.unpack(bad_topology)
+
+
+class TestMoveLog:
+    """Test undo and redo through the move log"""
+
+    @pytest.mark.parametrize('engine', ['list', 'numpy', 'bits'])
+    def test_packed_cells(self, engine):
+        """Test every engine packs its whole board like pack_cell does cell by cell, lost games included"""
+        import field_history
+        if engine == 'numpy':
+            pytest.importorskip('numpy')
+        for seed in range(5):
+            play_game(engine, seed, width=21, height=13, mines=50)
+            board = field.get_session().board
+            assert board.packed_cells() == bytes(field_history.pack_cell(*field.get_cell_state(x, y))
+                                                 for x in range(21) for y in range(13))
+
+    @pytest.mark.parametrize('engine', ['list', 'numpy', 'bits'])
+    def test_jump_to_any_move(self, engine):
+        """Test jumping back and forth restores the board and counters after every move"""
+        if engine == 'numpy':
+            pytest.importorskip('numpy')
+        for seed in range(10):
+            random.seed(seed)
+            field.start_game(16, 16, 40, engine=engine)
+            rng = random.Random(seed)
+            history = [(snapshot(), field.get_mines_left(), field.get_3bv(), False, False)]
+            while not (field.game_over() or field.game_won()):
+                x, y = rng.randrange(16), rng.randrange(16)
+                if (field.flag_cell if rng.random() < 0.2 else field.cell_up)(x, y):
+                    history.append((snapshot(), field.get_mines_left(), field.get_3bv(),
+                                    field.game_over(), field.game_won()))
+            assert len(field.get_move_log()) == len(history) - 1
+
+            for move in rng.sample(range(len(history)), len(history)):
+                field.jump_to(move)
+                assert (snapshot(), field.get_mines_left(), field.get_3bv(),
+                        field.game_over(), field.game_won()) == history[move]
+
+    def test_undo_redo(self):
+        """Test undo and redo step one move and report only the cells that move touched"""
+        field.start_game(9, 9, 10)
+        field.cell_up(4, 4)
+        before = snapshot()
+        field.flag_cell(0, 0) if field.get_cell_state(0, 0)[1] == 0 else field.flag_cell(8, 8)
+        flagged = snapshot()
+
+        assert len(field.undo()) == 1
+        assert snapshot() == before and field.can_redo()
+        assert len(field.redo()) == 1
+        assert snapshot() == flagged and not field.can_redo()
+
+        field.jump_to(0)
+        assert not field.can_undo() and field.undo() == []
+        assert field.get_time() == 0  # back before the first click, the clock stops
+
+    def test_new_move_drops_redo(self):
+        """Test moving after an undo forgets the undone moves"""
+        field.start_game(9, 9, 10)
+        field.cell_up(4, 4)
+        hidden = [pos for pos in itertools.product(range(9), repeat=2) if field.get_cell_state(*pos)[1] == 0]
+        field.flag_cell(*hidden[0])
+        field.undo()
+        field.flag_cell(*hidden[1])
+        assert len(field.get_move_log()) == 2 and not field.can_redo()
+        assert [action for action, *_ in field.get_move_log().actions()] == ['cell_up', 'flag_cell']
+
+    def test_undo_first_click_on_mine(self):
+        """Test undoing a first click that moved a mine puts the mine back"""
+        random.seed(0)
+        field.start_game(9, 9, 10)
+        x, y = next(pos for pos in itertools.product(range(9), repeat=2) if field.get_cell_state(*pos)[0] == -1)
+        before = snapshot()
+        field.cell_up(x, y)
+        assert field.get_cell_state(x, y)[0] >= 0
+        field.undo()
+        assert snapshot() == before
+
+    def test_solver_after_undo(self):
+        """Test deductions left after undoing only name cells that are what they were deduced to be"""
+        for seed in range(10):
+            random.seed(seed)
+            field.start_game(16, 16, 40)
+            rng = random.Random(seed)
+            while not (field.game_over() or field.game_won()):
+                field.cell_up(rng.randrange(16), rng.randrange(16))
+            solver = field.get_session().solver
+            for move in range(len(field.get_move_log()) - 1, -1, -1):
+                field.jump_to(move)
+                assert all(field.get_cell_state(*pos)[0] >= 0 for pos in solver.safe)
+                assert all(field.get_cell_state(*pos)[0] < 0 for pos in solver.mines)
+                assert all(solver.explain(*pos) for pos in [*solver.safe, *solver.mines])
+
+    def test_compact(self):
+        """Test a flag costs one packed delta and keyframes are kept at the interval"""
+        field.start_game(20, 20, 40)
+        field.cell_up(10, 10)
+        hidden = [pos for pos in itertools.product(range(20), repeat=2) if field.get_cell_state(*pos)[1] == 0]
+        for pos in hidden[:70]:
+            field.flag_cell(*pos)
+        log = field.get_move_log()
+        assert all(len(move.deltas) == 1 and move.deltas.itemsize <= 4 for move in log.moves[1:])
+        assert sorted(log.keyframes) == [0, 64]
+
+    def test_replay_actions(self):
+        """Test the recorded actions replay the same game from the same seed"""
+        play_game('list', 3)
+        actions = field.get_move_log().actions()
+        final = snapshot()
+
+        random.seed(3)
+        session = field.GameSession()
+        session.start_game(16, 16, 40)
+        for action, *args in actions:
+            getattr(session, action)(*args)
+        assert [[session.get_cell_state(x, y) for y in range(16)] for x in range(16)] == final
+
+
+class TestBitEngine:
+    """Test the bitboard engine behaves like the list engine"""
+
+    def test_same_games(self):
+        """Test identical seeds give identical games on both engines"""
+        for seed in range(10):
+            assert play_game('bits', seed) == play_game('list', seed)
+
+    def test_whole_board_rules(self):
+        """Test whole-board single-number checks agree with the solver"""
+        for seed in range(30):
+            play_game('bits', seed, mines=30)
+            board = field.get_session().board
+            if board.has_logical_moves():
+                assert field.get_session().solver.has_moves()
+
+            hint = board.find_safe_hint(random.Random(seed))
+            if hint is not None:
+                content, state = field.get_cell_state(*hint)
+                assert content >= 0 and state == 0
+
+    def test_session_uses_whole_board_rules(self):
+        """Test the session's hints come from the bitboard rules first and guesses are seeded"""
+        def hints(seed):
+            session = field.GameSession(random.Random(seed))
+            session.start_game(16, 16, 50, engine='bits')
+            session.cell_up(8, 8)
+            board_hint = session.board.find_safe_hint(guess=False)
+            assert board_hint is None or session.find_safe_hint() == board_hint
+            if board_hint is not None:
+                assert session.has_logical_moves()
+            return session.board.find_safe_hint(session.rng)
+
+        assert [hints(seed) for seed in range(10)] == [hints(seed) for seed in range(10)]
+
+    def test_large_board(self):
+        """Test a 256x256 bitboard game"""
+        field.start_game(256, 256, 10000, engine='bits')
+        field.cell_up(128, 128)
+        assert not field.game_over()
+        field.get_session().board.has_logical_moves()
+        x, y = field.get_session().board.find_safe_hint(random.Random(0))
+        assert field.get_cell_state(x, y)[0] >= 0
+
+
+class TestChunkEngine:
+    """Test the lazily generated chunk engine"""
+
+    def test_numbers_across_chunks(self):
+        """Test numbers on chunk borders count the mines of the neighbouring chunks"""
+        board = field_chunks.ChunkBoard(21, 19, chunk_size=8)
+        assert board.generate(7, 0.2) == sum(round(0.2 * w * h) for w in (8, 8, 5) for h in (8, 8, 3))
+        mines = {(x, y) for x in range(21) for y in range(19) if board.content(x, y) == -1}
+        for x in range(21):
+            for y in range(19):
+                if (x, y) not in mines:
+                    expected = sum((i, j) in mines for i in (x - 1, x, x + 1) for j in (y - 1, y, y + 1))
+                    assert board.content(x, y) == expected
+
+    def test_same_seed_same_board(self):
+        """Test chunks are regenerated identically from the seed, in any order"""
+        a, b = field_chunks.ChunkBoard(64, 64, chunk_size=8), field_chunks.ChunkBoard(64, 64, chunk_size=8)
+        a.generate(3, 0.15)
+        b.generate(3, 0.15)
+        cells = [(x, y) for x in range(64) for y in range(64)]
+        assert [a.content(*pos) for pos in cells] == [b.content(*pos) for pos in reversed(cells)][::-1]
+
+    def test_flood_crosses_chunks(self, monkeypatch):
+        """Test clicking a zero reveals its whole flood-fill region over chunk borders"""
+        monkeypatch.setattr(field_chunks, 'CHUNK_SIZE', 8)
+        for seed in range(10):
+            random.seed(seed)
+            field.start_game(40, 40, 160, engine='chunks')
+            grid = snapshot()
+            zero = next(((x, y) for x in range(40) for y in range(40) if grid[x][y][0] == 0), None)
+            if zero is None:
+                continue
+            changed = {(x, y) for x, y, _, _ in field.cell_up(*zero)}
+            assert changed == flood(grid, *zero)
+
+    def test_memory_follows_explored_area(self):
+        """Test a huge board only generates the chunks the game has reached"""
+        field.start_game(100000, 100000, 1500000000, engine='chunks')
+        field.cell_up(50000, 50000)
+        assert not field.game_over()
+        board = field.get_session().board
+        assert len(board._mines) < 100
+        assert field.get_mines_left() == field.get_session().mine_count
+        assert field.find_safe_hint() is not None
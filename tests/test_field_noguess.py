@@ -0,0 +1,73 @@
+"""
+Test no-guess board generation and the seed pool
+"""
+
+import field
+import field_noguess
+
+
+class TestLayout:
+    """Test seeded mine layouts"""
+
+    def test_deterministic(self):
+        """Test the same seed always gives the same board"""
+        assert field_noguess.layout(42, 16, 16, 40) == field_noguess.layout(42, 16, 16, 40)
+        assert field_noguess.layout(42, 16, 16, 40) != field_noguess.layout(43, 16, 16, 40)
+
+    def test_start_area_clear(self):
+        """Test no mine touches the start cell"""
+        sx, sy = field_noguess.start_cell(30, 16)
+        for seed in range(20):
+            mines = field_noguess.layout(seed, 30, 16, 99)
+            assert len(set(mines)) == 99
+            for i in mines:
+                x, y = divmod(i, 16)
+                assert abs(x - sx) > 1 or abs(y - sy) > 1
+
+
+class TestSolvability:
+    """Test the no-guess check"""
+
+    def test_forced_guess_rejected(self):
+        """Test a board that ends in a 50/50 is not solvable"""
+        # the column of 1s at x=1 fits mines at (0, 0) and (0, 3) as well as at (0, 1) and (0, 4)
+        assert not field_noguess.is_solvable([0 * 5 + 0, 0 * 5 + 3], 5, 5)
+        assert field_noguess.is_solvable([4 * 5 + 4], 5, 5)
+
+    def test_rejects_unsolvable_seeds(self):
+        """Test find_seed skips seeds whose board needs a guess"""
+        bad = next(seed for seed in range(100)
+                   if not field_noguess.is_solvable(field_noguess.layout(seed, 30, 16, 99), 30, 16))
+        assert field_noguess.find_seed(30, 16, 99, first_seed=bad) != bad
+
+    def test_found_seed_is_solvable(self):
+        """Test find_seed returns a board that passes the check"""
+        seed = field_noguess.find_seed(16, 16, 40, first_seed=1)
+        assert field_noguess.is_solvable(field_noguess.layout(seed, 16, 16, 40), 16, 16)
+
+
+class TestSeedPool:
+    """Test the on-disk seed pool"""
+
+    def test_fill_and_draw(self, tmp_path):
+        """Test filling with worker processes and drawing every seed back"""
+        pool = field_noguess.SeedPool(str(tmp_path), size=3)
+        assert pool.fill(9, 9, 10, workers=2) == 3
+        assert pool.fill(9, 9, 10, workers=2) == 0
+        assert pool.available(9, 9, 10) == 3
+
+        for _ in range(3):
+            seed = pool.draw(9, 9, 10)
+            assert field_noguess.is_solvable(field_noguess.layout(seed, 9, 9, 10), 9, 9)
+        assert pool.available(9, 9, 10) == 0
+        assert isinstance(pool.draw(9, 9, 10), int)  # empty pool still gives a seed
+
+    def test_start_game_no_guess(self, tmp_path, monkeypatch):
+        """Test a no-guess game opens a region at the highlighted start cell"""
+        monkeypatch.setattr(field_noguess, '_default_pool', field_noguess.SeedPool(str(tmp_path)))
+        field.start_game(16, 16, 40, no_guess=True)
+        start = field.get_hint_cell()
+        assert start == field_noguess.start_cell(16, 16)
+        assert field.get_cell_state(*start) == (0, 0)
+        field.cell_up(*start)
+        assert not field.game_over()
@@ -0,0 +1,78 @@
+"""
+Test the benchmark suite and its regression gate
+"""
+
+import json
+
+import pytest
+
+import field
+import minesweeper_bench
+
+
+class TestCases:
+    """Test the benchmark cases"""
+
+    @pytest.mark.parametrize('name', list(minesweeper_bench.CASES))
+    def test_case_runs(self, name):
+        """Test every case prepares its board and times a call"""
+        assert minesweeper_bench.measure(minesweeper_bench.CASES[name], budget=0) > 0
+
+    def test_flood_case_opens_the_board(self):
+        """Test the flood fill case really opens the whole board in one click"""
+        minesweeper_bench.CASES['field-flood-empty']()()
+        assert field.game_won()
+
+
+class TestIdleCpu:
+    """Test the idle game loop comparison"""
+
+    def test_idle_cpu(self, monkeypatch):
+        """Test both loops run for their time and report a share of a core"""
+        pygame = pytest.importorskip('pygame')
+        import draw
+        monkeypatch.setattr(draw, '_screen', None)  # the dummy driver cannot resize a window, open a new one
+        results = minesweeper_bench.idle_cpu(0.2)
+        pygame.display.quit()
+        field.unsubscribe(draw._cells_changed)
+        assert list(results) == ['fixed-rate', 'adaptive']
+        assert all(0 <= percent <= 100 for percent in results.values())
+
+
+class TestGate:
+    """Test comparing results with a baseline"""
+
+    def test_compare(self):
+        """Test only cases slower than the threshold count, new cases are ignored"""
+        baseline = {'cases': {'a': 1.0, 'b': 1.0}}
+        results = {'cases': {'a': 1.2, 'b': 1.5, 'c': 9.0}}
+        assert minesweeper_bench.compare(results, baseline, threshold=25) == ['b']
+        assert minesweeper_bench.compare(results, baseline, threshold=10) == ['a', 'b']
+
+    def test_startup_not_gated(self):
+        """Test the startup cases never fail the comparison"""
+        baseline = {'cases': {name: 1.0 for name in minesweeper_bench.UNGATED}}
+        results = {'cases': {name: 9.0 for name in minesweeper_bench.UNGATED}}
+        assert minesweeper_bench.compare(results, baseline) == []
+
+    def test_missing_baseline(self, tmp_path, capsys):
+        """Test comparing against a baseline that was never saved fails before running anything"""
+        with pytest.raises(SystemExit):
+            minesweeper_bench.main(['--compare', str(tmp_path / 'baseline.json')])
+        assert 'save one here first' in capsys.readouterr().err
+
+    def test_cli(self, tmp_path, capsys):
+        """Test --save writes a baseline and --compare fails on a regression against it"""
+        path = tmp_path / 'baseline.json'
+        assert minesweeper_bench.main(['mp-place-mines-easy', '--budget', '0', '--save', str(path)]) == 0
+        baseline = json.loads(path.read_text())
+        assert list(baseline['cases']) == ['mp-place-mines-easy']
+
+        baseline['cases']['mp-place-mines-easy'] *= 1000
+        path.write_text(json.dumps(baseline))
+        assert minesweeper_bench.main(['mp-place-mines-easy', '--budget', '0', '--compare', str(path)]) == 0
+
+        baseline['cases']['mp-place-mines-easy'] /= 1e9
+        path.write_text(json.dumps(baseline))
+        assert minesweeper_bench.main(['mp-place-mines-easy', '--budget', '0', '--compare', str(path)]) == 1
+        assert 'mp-place-mines-easy' in capsys.readouterr().err
@@ -0,0 +1,61 @@
+"""
+Test the headless simulation harness
+"""
+
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+
+import minesweeper_sim
+
+
+class TestPlay:
+    """Test single bot games"""
+
+    @pytest.mark.parametrize('bot', list(minesweeper_sim.BOTS))
+    def test_game_finishes(self, bot):
+        """Test every bot plays a game to its end"""
+        result = minesweeper_sim.play(bot, 9, 9, 10, seed=1)
+        assert result.moves < minesweeper_sim.MAX_MOVES
+        assert result.bbbv > 0 and result.seconds > 0
+
+    def test_deterministic(self):
+        """Test the same seed replays the same game"""
+        a = minesweeper_sim.play('probability', 16, 16, 40, seed=7)
+        b = minesweeper_sim.play('probability', 16, 16, 40, seed=7)
+        assert (a.won, a.bbbv, a.guesses, a.moves) == (b.won, b.bbbv, b.guesses, b.moves)
+
+    def test_leaves_global_random_alone(self):
+        """Test a game neither reseeds nor draws from the caller's random generator"""
+        random.seed(5)
+        state = random.getstate()
+        minesweeper_sim.play('probability', 16, 16, 40, seed=7)
+        assert random.getstate() == state
+
+    def test_constraint_bot_only_guesses_when_stuck(self):
+        """Test a game the solver clears alone needs no guesses"""
+        results = [minesweeper_sim.play('constraint', 9, 9, 10, seed) for seed in range(20)]
+        assert any(r.won and r.guesses == 0 for r in results)
+
+
+class TestSimulate:
+    """Test batches of games"""
+
+    def test_pool_matches_serial(self):
+        """Test worker processes give the same summary as playing in-process"""
+        serial = minesweeper_sim.simulate('constraint', 9, 9, 10, games=8, workers=1)
+        pooled = minesweeper_sim.simulate('constraint', 9, 9, 10, games=8, workers=2)
+        for key in ('win_rate', 'guesses_per_game'):
+            assert serial[key] == pooled[key]
+        assert pooled['games_per_second'] > 0
+
+    def test_cli_without_pygame(self):
+        """Test the command line runs a batch without importing pygame"""
+        code = ("import sys, minesweeper_sim; "
+                "minesweeper_sim.main(['--games', '2', '--difficulty', 'easy', '--workers', '1', '--json']); "
+                "assert 'pygame' not in sys.modules")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        assert json.loads(output)['games'] == 2
@@ -0,0 +1,293 @@
+"""
+Test the board logic of the pygame clients, driven without a window
+"""
+
+import os
+import random
+import time
+import types
+
+import pytest
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+pytest.importorskip('pygame')
+
+import client_loop  # noqa: E402
+import minesweeper_enhanced  # noqa: E402
+import minesweeper_final  # noqa: E402
+import minesweeper_multiplayer  # noqa: E402
+import text_cache  # noqa: E402
+
+CLIENTS = [minesweeper_enhanced, minesweeper_final, minesweeper_multiplayer]
+
+
+def headless_game(client, difficulty, tmp_path):
+    """A solo MinesweeperGame of the client that never opens a window or writes the real leaderboard"""
+    game = client.MinesweeperGame.__new__(client.MinesweeperGame)
+    game.username = 'tester'
+    game.mode = 'solo'
+    game.network = None
+    game.cheat_mode = False
+    game.game_mode = 'standard'
+    game.difficulty = difficulty
+    game.leaderboard = {'Easy': [], 'Medium': [], 'Hard': []}
+    game.leaderboard_file = str(tmp_path / 'leaderboard.json')
+    game.reset_game()
+    return game
+
+
+def lay_mines(game, mines):
+    """Put mines on a fresh board and start the game as if the first click had happened"""
+    rows, cols = game.difficulty.rows, game.difficulty.cols
+    for row, col in mines:
+        game.board[row][col].is_mine = True
+    for row in range(rows):
+        for col in range(cols):
+            game.board[row][col].adjacent_mines = sum(
+                game.board[r][c].is_mine for r in range(max(row - 1, 0), min(row + 2, rows))
+                for c in range(max(col - 1, 0), min(col + 2, cols)) if (r, c) != (row, col))
+    game.first_click = False
+    game.start_time = time.time()
+
+
+def revealed_safe(game):
+    return sum(cell.is_revealed and not cell.is_mine for row in game.board for cell in row)
+
+
+@pytest.mark.parametrize('client', CLIENTS, ids=lambda client: client.__name__)
+class TestReveal:
+    """Test flood fill and the win check"""
+
+    def test_huge_opening(self, client, tmp_path):
+        """Test one click opens a board far past the recursion limit, short of the walled-in last cell"""
+        rows = cols = 200
+        game = headless_game(client, types.SimpleNamespace(rows=rows, cols=cols, mines=3), tmp_path)
+        lay_mines(game, [(rows - 2, cols - 1), (rows - 1, cols - 2), (rows - 2, cols - 2)])
+        game.reveal_cell(0, 0)
+        assert game.revealed_count == revealed_safe(game) == rows * cols - 4
+        assert not game.board[rows - 1][cols - 1].is_revealed
+        assert not game.game_won
+
+    def test_flags_stop_the_flood(self, client, tmp_path):
+        """Test a flagged cell inside an opening stays hidden and is not counted"""
+        game = headless_game(client, types.SimpleNamespace(rows=9, cols=9, mines=1), tmp_path)
+        lay_mines(game, [(8, 8)])
+        game.toggle_flag(4, 4)
+        game.reveal_cell(0, 0)
+        assert not game.board[4][4].is_revealed
+        assert game.revealed_count == revealed_safe(game) == 9 * 9 - 2
+
+    def test_win_on_last_safe_cell(self, client, tmp_path):
+        """Test the game is won exactly when the last safe cell is revealed"""
+        random.seed(0)
+        game = headless_game(client, client.Difficulty.EASY, tmp_path)
+        game.reveal_cell(4, 4)
+        hidden = [(r, c) for r in range(9) for c in range(9)
+                  if not game.board[r][c].is_mine and not game.board[r][c].is_revealed]
+        for row, col in hidden:
+            assert not game.game_won
+            game.reveal_cell(row, col)
+            assert game.revealed_count == revealed_safe(game)
+        assert game.game_won and game.score > 0
+
+
+class RecordingNetwork:
+    """Stands in for the NetworkManager of a started multiplayer game and records what would be sent"""
+    game_started = True
+    current_turn = None
+
+    def __init__(self):
+        self.sent = []
+
+    def send_action(self, action, row, col):
+        self.sent.append((action, row, col))
+
+    def send_reveal_batch(self, row, col, cells):
+        self.sent.append(('reveal_batch', row, col, cells))
+
+
+class TestRevealMessages:
+    """Test a reveal in the multiplayer client sends one message however much it opens"""
+
+    def online_game(self, tmp_path):
+        game = headless_game(minesweeper_multiplayer, types.SimpleNamespace(rows=9, cols=9, mines=3), tmp_path)
+        game.mode = 'multiplayer'
+        game.network = RecordingNetwork()
+        # the walled-in last cell keeps the flood from winning the game
+        lay_mines(game, [(7, 8), (8, 7), (7, 7)])
+        return game
+
+    def test_flood_is_one_batch(self, tmp_path):
+        """Test a flood sends the click and the cells it opened in one message"""
+        game = self.online_game(tmp_path)
+        game.reveal_cell(0, 0)
+        [(action, row, col, cells)] = game.network.sent
+        assert (action, row, col) == ('reveal_batch', 0, 0)
+        assert sorted(cells) == [r * 9 + c for r in range(9) for c in range(9)
+                                 if game.board[r][c].is_revealed and (r, c) != (0, 0)]
+
+    def test_number_is_a_plain_reveal(self, tmp_path):
+        """Test revealing a number sends a plain reveal"""
+        game = self.online_game(tmp_path)
+        game.reveal_cell(6, 6)
+        assert game.network.sent == [('reveal', 6, 6)]
+
+
+class TestNetworkManager:
+    """Test server events are queued for the game loop and requests answered through futures"""
+
+    def manager(self):
+        manager = minesweeper_multiplayer.NetworkManager()
+        manager.emitted = []
+
+        def emit(event, data, callback=None):
+            manager.emitted.append((event, data, callback))
+        manager.sio.emit = emit
+        return manager
+
+    def receive(self, manager, event, data=None):
+        """Deliver a server event the way the Socket.IO thread does"""
+        manager.sio.handlers['/'][event](*([] if data is None else [data]))
+
+    def test_events_apply_on_poll(self):
+        """Test events change nothing until the game loop polls"""
+        manager = self.manager()
+        self.receive(manager, 'game_start', {'board_seed': 7, 'game_mode': 'luck', 'current_turn': 'a'})
+        self.receive(manager, 'turn_changed', {'current_turn': 'b'})
+        assert not manager.game_started
+        manager.poll()
+        assert manager.game_started and manager.board_seed == 7
+        assert (manager.game_mode, manager.current_turn) == ('luck', 'b')
+
+    def test_request_resolves_on_response(self):
+        """Test create_room resolves with room_created, without waiting a fixed time"""
+        manager = self.manager()
+        future = manager.create_room('a', game_mode='luck')
+        assert manager.emitted[0][0] == 'create_room' and not future.done()
+        self.receive(manager, 'player_joined', {'players': [], 'username': 'b'})
+        assert not future.done()
+        self.receive(manager, 'room_created', {'room_code': '123456'})
+        assert manager.wait(future, timeout=0) == {'room_code': '123456'}
+        assert manager.room_code == '123456'
+
+    def test_error_fails_request(self):
+        """Test an error event fails the oldest request still waiting"""
+        manager = self.manager()
+        first, second = manager.join_room('123456', 'a'), manager.join_room('654321', 'a')
+        self.receive(manager, 'error', {'message': 'Room not found'})
+        with pytest.raises(minesweeper_multiplayer.ServerError, match='Room not found'):
+            first.result(timeout=0)
+        assert not second.done()
+        assert manager.wait(second, timeout=0) is None
+        self.receive(manager, 'disconnect')
+        with pytest.raises(ConnectionError):
+            second.result(timeout=0)
+        manager.poll()
+        assert manager.room_code is None and not manager.connected
+
+    @pytest.mark.parametrize('data', ['Room is full', None])
+    def test_error_without_payload_dict(self, data):
+        """Test an error event that is not a dict still fails the request and is queued"""
+        manager = self.manager()
+        future = manager.join_room('123456', 'a')
+        self.receive(manager, 'error', data)
+        with pytest.raises(minesweeper_multiplayer.ServerError):
+            future.result(timeout=0)
+        manager.poll()
+        assert manager.events.empty()
+
+    def test_action_resolves_on_ack(self):
+        """Test game actions resolve with the server's ack"""
+        manager = self.manager()
+        future = manager.send_action('flag', 1, 2)
+        [(event, data, callback)] = manager.emitted
+        assert (event, data) == ('game_action', {'action': 'flag', 'row': 1, 'col': 2})
+        callback()
+        assert future.result(timeout=0) is None
+
+
+@pytest.mark.parametrize('client', CLIENTS, ids=lambda client: client.__name__)
+class TestCachedText:
+    """Test a frame whose text did not change renders none"""
+
+    def test_steady_frame_renders_no_text(self, client, tmp_path):
+        """Test redrawing an unchanged game renders no text"""
+        random.seed(0)
+        game = headless_game(client, client.Difficulty.EASY, tmp_path)
+        game.cell_size, game.top_panel_height, game.right_panel_width, game.padding = 30, 180, 250, 20
+        game.show_game_result = False
+        try:
+            game.setup_window()
+            game.create_ui_elements()
+            game.reveal_cell(4, 4)
+            game.start_time = None  # stop the clock, the timer would re-render once a second
+            game.draw()
+            misses = text_cache.get_cache().misses
+            game.draw()
+            assert text_cache.get_cache().misses == misses
+        finally:
+            client.pygame.display.quit()
+
+
+class TestTextCache:
+    """Test the rendered text cache"""
+
+    def test_least_recently_used_is_evicted(self):
+        """Test a full cache drops the surface used longest ago"""
+        pygame = minesweeper_multiplayer.pygame
+        pygame.font.init()
+        font = pygame.font.Font(None, 18)
+        cache = text_cache.TextCache(max_surfaces=2)
+        first = cache.render(font, 'a', (0, 0, 0))
+        cache.render(font, 'b', (0, 0, 0))
+        assert cache.render(font, 'a', (0, 0, 0)) is first
+        cache.render(font, 'c', (0, 0, 0))
+        assert len(cache) == 2 and (cache.hits, cache.misses) == (1, 3)
+        assert cache.render(font, 'a', (0, 0, 0)) is first
+        cache.render(font, 'b', (0, 0, 0))
+        assert cache.misses == 4
+
+    def test_number_tiles(self):
+        """Test number tiles are drawn once and hold a blank tile then one per number"""
+        pygame = minesweeper_multiplayer.pygame
+        pygame.font.init()
+        font = pygame.font.Font(None, 24)
+        colors = minesweeper_multiplayer.NUMBER_COLORS
+        tiles = text_cache.number_tiles(font, colors, 28, (200, 200, 200))
+        assert len(tiles) == max(colors) + 1 and tiles[3].get_size() == (28, 28)
+        assert text_cache.number_tiles(font, colors, 28, (200, 200, 200)) is tiles
+
+
+class TestFramePacing:
+    """Test the shared game loop wait"""
+
+    @pytest.fixture(autouse=True)
+    def display(self):
+        client_loop.pygame.display.init()
+        yield
+        client_loop.pygame.display.quit()
+
+    def test_event_ends_wait_and_stays_queued(self):
+        """Test a waiting event is handed back to the next frame"""
+        pygame = client_loop.pygame
+        pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+        client_loop.wait_for_next_frame(pygame.time.Clock())
+        assert [event.type for event in pygame.event.get()] == [pygame.USEREVENT]
+
+    def test_timer_ends_wait_on_next_second(self):
+        """Test a running timer wakes the loop by its next second"""
+        pygame = client_loop.pygame
+        pygame.event.clear()
+        started = time.time()
+        client_loop.wait_for_next_frame(pygame.time.Clock(), started - 0.9)
+        assert time.time() - started < 0.5
+
+    def test_next_tick_ends_wait(self):
+        """Test a deadline given in seconds, as main.py's game gives it, wakes the loop"""
+        pygame = client_loop.pygame
+        pygame.event.clear()
+        started = time.time()
+        client_loop.wait_for_next_frame(pygame.time.Clock(), next_tick=0.05)
+        assert time.time() - started < 0.5
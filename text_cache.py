@@ -0,0 +1,78 @@
+"""Rendered text surfaces for the pygame clients, so a frame whose text did not change renders none.
+
+font.render is the most expensive call in drawing a frame, and nearly every string a
+client draws (cell numbers, button labels, leaderboard rows) is the same frame after frame.
+Surfaces are cached by font, text and colour, and the least recently used one is dropped
+once the cache is full, so a ticking timer cannot grow it without bound.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+MAX_SURFACES = 512
+
+
+class TextCache:
+    """Rendered text keyed by (font, text, colour, antialias), least recently used evicted first"""
+
+    def __init__(self, max_surfaces: int = MAX_SURFACES):
+        self.max_surfaces = max_surfaces
+        self.hits = 0
+        self.misses = 0
+        self._surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self._number_tiles: dict[tuple, list[pygame.Surface]] = {}
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def render(self, font: pygame.font.Font, text: str, color, antialias: bool = True) -> pygame.Surface:
+        """font.render(text, antialias, color), rendered once while it stays in the cache"""
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._surfaces[key] = font.render(text, antialias, color)
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def number_tiles(self, font: pygame.font.Font, colors: dict[int, tuple], size: int, background,
+                     border_radius: int = 3) -> list[pygame.Surface]:
+        """Revealed cell tiles, size pixels square, with the number n centred in colors[n] at index n.
+
+        Index 0 is the blank revealed tile. A set is drawn once per font, size and colours.
+        """
+        key = (font, size, tuple(background), border_radius, tuple(tuple(colors[n]) for n in sorted(colors)))
+        tiles = self._number_tiles.get(key)
+        if tiles is None:
+            blank = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.rect(blank, background, blank.get_rect(), border_radius=border_radius)
+            tiles = [blank]
+            for n in range(1, max(colors) + 1):
+                tile = blank.copy()
+                text = font.render(str(n), True, colors[n])
+                tile.blit(text, text.get_rect(center=tile.get_rect().center))
+                tiles.append(tile)
+            self._number_tiles[key] = tiles
+        return tiles
+
+    def clear(self):
+        self._surfaces.clear()
+        self._number_tiles.clear()
+
+
+# One cache shared by everything a client draws
+_cache = TextCache()
+
+
+def get_cache() -> TextCache:
+    return _cache
+
+
+render = _cache.render
+number_tiles = _cache.number_tiles